@@ -0,0 +1,263 @@
+"""Module with batch analysis of positions from PGN and EPD files.
+
+Run from the client directory:
+    python -m bot.batch_analysis games.pgn -o results.jsonl -j 8
+"""
+from typing import Iterator, Iterable, Optional, TextIO, Dict, Any
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+from bot.uci_protocol import UCIProtocol, DEADLINE_MARGIN
+from bot.engine_pool import EnginePool
+from bot.engine_cache import EngineCache, CachedResult, FULL_STRENGTH
+from game.model.headless_board import IllegalMoveError
+from utils.pgn import read_pgn, read_epd
+
+DEFAULT_MOVE_TIME = 0.5
+DEFAULT_WINDOW = 256
+FULL_SKILL_LEVEL = 20
+
+Position = Dict[str, Any]
+
+
+def read_positions(paths: Iterable[str],
+                   chess960: bool = False) -> Iterator[Position]:
+    """Reads positions from PGN and EPD files lazily.\
+        Every position of every game is read from PGN files
+
+    Args:
+        paths (Iterable[str]): Paths to files, EPD files end with .epd
+        chess960 (bool): Whether EPD positions are Fisher random.\
+            Games from PGN files are checked by their Variant header.\
+                Defaults to False
+
+    Yields:
+        Position: Position's id, FEN string and Fisher random mode
+    """
+    logger = logging.getLogger('batch_analysis')
+    for path in paths:
+        with open(path, encoding='utf-8') as file:
+            if path.lower().endswith('.epd'):
+                for index, (fen, operations) in enumerate(read_epd(file)):
+                    position_id = operations.get('id', f'{path}:{index}')
+                    yield {'id': position_id, 'fen': fen,
+                           'chess960': chess960}
+                continue
+
+            for game_index, game in enumerate(read_pgn(file)):
+                try:
+                    for ply, (fen, _) in enumerate(game.positions()):
+                        yield {'id': f'{path}:{game_index}:{ply}', 'fen': fen,
+                               'chess960': game.chess960}
+                except IllegalMoveError as error:
+                    logger.warning('Skipping rest of game %s:%s: %s',
+                                   path, game_index, error)
+
+
+class BatchAnalyzer:
+    """Class that analyzes a stream of positions with a pool of engines.\
+        Positions whose search misses its deadline are written\
+            with an error instead of a result"""
+
+    def __init__(self, pool: EnginePool, movetime: float = DEFAULT_MOVE_TIME,
+                 window: int = DEFAULT_WINDOW, ordered: bool = False,
+                 cache: Optional[EngineCache] = None) -> None:
+        self._pool = pool
+        self._movetime = movetime
+        self._window_size = max(window, pool.size)
+        self._ordered = ordered
+        self._cache = cache
+        self._logger = logging.getLogger('batch_analysis')
+
+        self._window: asyncio.Semaphore = None
+        self._pending: Dict[int, Position] = {}
+        self._next_index = 0
+        self._output: TextIO = None
+        self.analyzed = 0
+        self.failed = 0
+        self.nodes = 0
+
+    async def run(self, positions: Iterable[Position],
+                  output: TextIO) -> None:
+        """Analyzes positions and writes results as JSON lines\
+            as soon as they are ready
+
+        Args:
+            positions (Iterable[Position]): Positions to analyze
+            output (TextIO): Output for results
+        """
+        self._window = asyncio.Semaphore(self._window_size)
+        self._output = output
+        queue: asyncio.Queue[Optional[tuple]] = asyncio.Queue(self._pool.size)
+
+        async with asyncio.TaskGroup() as group:
+            for _ in range(self._pool.size):
+                group.create_task(self._worker(queue))
+            for index, position in enumerate(positions):
+                await self._window.acquire()
+                await queue.put((index, position))
+            for _ in range(self._pool.size):
+                await queue.put(None)
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        chess960 = False
+        async with self._pool.lease(fisher=chess960,
+                                    limit_strength=False) as protocol:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                index, position = item
+                if position['chess960'] != chess960:
+                    chess960 = position['chess960']
+                    protocol.fisher_random(chess960)
+
+                cached = await self._cached(position['fen'], chess960)
+                if not cached:
+                    cached = await self._analyze(protocol, position['fen'],
+                                                 chess960)
+                result = dict(position)
+                if not cached:
+                    result['error'] = 'deadline exceeded'
+                    self._result_ready(index, result)
+                    continue
+                result.update({
+                    'best_move': cached.best_move,
+                    'score_cp': cached.score_cp,
+                    'score_mate': cached.score_mate,
+                    'depth': cached.depth,
+                    'nodes': cached.nodes
+                })
+                self._result_ready(index, result)
+
+    async def _cached(self, fen: str,
+                      chess960: bool) -> Optional[CachedResult]:
+        if not self._cache:
+            return None
+        return await asyncio.to_thread(self._cache.get, fen, FULL_SKILL_LEVEL,
+                                       self._movetime, chess960)
+
+    async def _analyze(self, protocol: UCIProtocol, fen: str,
+                       chess960: bool) -> Optional[CachedResult]:
+        stream = protocol.search(fen, self._movetime)
+        try:
+            async with asyncio.timeout(self._movetime + DEADLINE_MARGIN):
+                await stream.wait()
+        except TimeoutError:
+            await protocol.stop_search()
+        if not stream.finished:
+            self._logger.warning('Engine missed deadline on %s', fen)
+            return None
+
+        best_move = stream.best_move
+        info = stream.last
+        result = CachedResult(best_move, stream.ponder_move)
+        if info:
+            result.score_cp = info.score_cp
+            result.score_mate = info.score_mate
+            result.depth = info.depth
+            result.nodes = info.nodes
+        if self._cache:
+            await asyncio.to_thread(self._cache.put, fen, FULL_SKILL_LEVEL,
+                                    self._movetime, chess960, FULL_STRENGTH,
+                                    '', result)
+        return result
+
+    def _result_ready(self, index: int, result: Position) -> None:
+        if not self._ordered:
+            self._write(result)
+            return
+
+        self._pending[index] = result
+        while self._next_index in self._pending:
+            self._write(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _write(self, result: Position) -> None:
+        self._output.write(json.dumps(result) + '\n')
+        self._output.flush()
+        if 'error' in result:
+            self.failed += 1
+        else:
+            self.analyzed += 1
+            self.nodes += result['nodes'] or 0
+        self._window.release()
+
+
+async def analyze(args: argparse.Namespace, output: TextIO) -> None:
+    """Analyzes positions from input files with parameters of CLI
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+        output (TextIO): Output for results
+    """
+    pool = EnginePool(args.engine, args.jobs)
+    await pool.start()
+    cache = EngineCache(args.cache) if args.cache else None
+    analyzer = BatchAnalyzer(pool, args.movetime, args.window,
+                             args.ordered, cache)
+    start = time.perf_counter()
+    try:
+        await analyzer.run(read_positions(args.inputs, args.chess960),
+                           output)
+    finally:
+        await pool.close()
+        if cache:
+            cache.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'{analyzer.analyzed} positions in {elapsed:.1f} s, '
+          f'{analyzer.analyzed / elapsed:.1f} positions/sec, '
+          f'{analyzer.nodes / elapsed:.0f} nodes/sec', file=sys.stderr)
+    if analyzer.failed:
+        print(f'{analyzer.failed} positions missed the deadline',
+              file=sys.stderr)
+    if cache:
+        print(f'cache hit rate: {cache.hit_rate:.2f}, '
+              f'entries: {cache.entries}', file=sys.stderr)
+
+
+def main() -> None:
+    """Parses command line arguments and runs analysis"""
+    engine = None
+    if os.path.exists('config.json'):
+        with open('config.json', 'r', encoding='utf-8') as config_file:
+            engine = json.load(config_file).get('engine')
+
+    parser = argparse.ArgumentParser(
+        description='Analyzes positions from PGN and EPD files')
+    parser.add_argument('inputs', nargs='+', help='PGN or EPD files')
+    parser.add_argument('-o', '--output', default='-',
+                        help='JSON lines output file, stdout by default')
+    parser.add_argument('-e', '--engine', default=engine,
+                        required=engine is None, help='Path to UCI engine')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='Number of engine processes')
+    parser.add_argument('-t', '--movetime', type=float,
+                        default=DEFAULT_MOVE_TIME,
+                        help='Search time per position in seconds')
+    parser.add_argument('-w', '--window', type=int, default=DEFAULT_WINDOW,
+                        help='Maximum number of positions held in memory')
+    parser.add_argument('--ordered', action='store_true',
+                        help='Write results in the input order')
+    parser.add_argument('--chess960', action='store_true',
+                        help='Analyze EPD positions as Fisher random, '
+                        'PGN games are detected by Variant header')
+    parser.add_argument('--cache', default=None,
+                        help='Engine cache to look up and fill')
+    args = parser.parse_args()
+
+    if args.output == '-':
+        asyncio.run(analyze(args, sys.stdout))
+    else:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            asyncio.run(analyze(args, output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+"""Module with persistent cache of engine's search results.\
+    Cache is used from threads, so that the event loop never waits\
+        for the database"""
+from typing import Optional, Dict
+from dataclasses import dataclass
+import threading
+import logging
+import sqlite3
+
+DEFAULT_MAX_ENTRIES = 100000
+EVICTION_RATIO = 0.9
+FILES = 'abcdefgh'
+FULL_STRENGTH = 'full'
+
+SCHEMA_VERSION = 2
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS results (
+    fen TEXT NOT NULL,
+    skill INTEGER NOT NULL,
+    movetime INTEGER NOT NULL,
+    chess960 INTEGER NOT NULL,
+    strength TEXT NOT NULL,
+    history TEXT NOT NULL,
+    best_move TEXT NOT NULL,
+    ponder_move TEXT,
+    score_cp INTEGER,
+    score_mate INTEGER,
+    depth INTEGER,
+    nodes INTEGER,
+    used INTEGER NOT NULL,
+    PRIMARY KEY (fen, skill, movetime, chess960, strength, history)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+'''
+
+
+@dataclass(slots=True)
+class CachedResult:
+    """Class for a search result kept in the cache"""
+    best_move: str
+    ponder_move: Optional[str] = None
+    score_cp: Optional[int] = None
+    score_mate: Optional[int] = None
+    depth: Optional[int] = None
+    nodes: Optional[int] = None
+
+
+def normalize_fen(fen: str) -> str:
+    """Normalizes FEN string, so that equal positions have equal keys.\
+        Move counters are dropped, en passant square is kept only\
+            if a pawn can capture on it
+
+    Args:
+        fen (str): Position in FEN notation
+
+    Returns:
+        str: Normalized position
+    """
+    placement, turn, castling, en_passant = fen.split()[:4]
+    if en_passant != '-':
+        rows = placement.split('/')
+        rank = 3 if turn == 'w' else 4
+        row = ''.join('.' * int(char) if char.isnumeric() else char
+                      for char in rows[rank])
+        pawn = 'P' if turn == 'w' else 'p'
+        file = FILES.index(en_passant[0])
+        if not any(0 <= neighbour < 8 and row[neighbour] == pawn
+                   for neighbour in (file - 1, file + 1)):
+            en_passant = '-'
+    return f'{placement} {turn} {castling} {en_passant}'
+
+
+class EngineCache:
+    """SQLite cache of engine's results keyed by position, game history\
+        and search parameters with least recently used eviction.\
+            Results of limited strength searches are random,\
+                so they are only cached if it's allowed"""
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 limited_strength: bool = False) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self.limited_strength = limited_strength
+        self._logger = logging.getLogger('engine_cache')
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        version = self._connection.execute('PRAGMA user_version').fetchone()
+        if version[0] != SCHEMA_VERSION:
+            self._connection.execute('DROP TABLE IF EXISTS results')
+            self._connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        self._connection.executescript(SCHEMA)
+
+        self._entries, used = self._connection.execute(
+            'SELECT COUNT(*), COALESCE(MAX(used), 0) FROM results').fetchone()
+        self._used = used
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def entries(self) -> int:
+        """Property that contains number of cached results
+
+        Returns:
+            int: Number of results
+        """
+        return self._entries
+
+    @property
+    def hit_rate(self) -> float:
+        """Property that contains share of lookups found in the cache
+
+        Returns:
+            float: Hit rate from 0 to 1
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, int | float]:
+        """Gets statistics of the cache
+
+        Returns:
+            Dict[str, int | float]: Hits, misses, hit rate and entries
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'entries': self._entries
+        }
+
+    def get(self, fen: str, skill: int, movetime: float,
+            chess960: bool = False, strength: str = FULL_STRENGTH,
+            history: str = '') -> Optional[CachedResult]:
+        """Gets search result of a position and marks it as recently used
+
+        Args:
+            fen (str): Position in FEN notation
+            skill (int): Engine's skill level
+            movetime (float): Search time in seconds
+            chess960 (bool): Whether engine plays Fisher random.\
+                Defaults to False
+            strength (str): UCI_LimitStrength and UCI_Elo of engine.\
+                Defaults to 'full'
+            history (str): Moves that led to the position since the last\
+                capture or pawn move. Defaults to ''
+
+        Returns:
+            Optional[CachedResult]: Result if cached, None otherwise
+        """
+        key = (normalize_fen(fen), skill, int(movetime * 1000), chess960,
+               strength, history)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT best_move, ponder_move, score_cp, score_mate, depth, '
+                'nodes FROM results WHERE fen = ? AND skill = ? '
+                'AND movetime = ? AND chess960 = ? AND strength = ? '
+                'AND history = ?', key).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._used += 1
+            self._connection.execute(
+                'UPDATE results SET used = ? WHERE fen = ? AND skill = ? '
+                'AND movetime = ? AND chess960 = ? AND strength = ? '
+                'AND history = ?', (self._used, *key))
+        return CachedResult(*row)
+
+    def put(self, fen: str, skill: int, movetime: float, chess960: bool,
+            strength: str, history: str, result: CachedResult) -> None:
+        """Puts search result of a position, evicting least recently used\
+            results if cache is full
+
+        Args:
+            fen (str): Position in FEN notation
+            skill (int): Engine's skill level
+            movetime (float): Search time in seconds
+            chess960 (bool): Whether engine plays Fisher random
+            strength (str): UCI_LimitStrength and UCI_Elo of engine
+            history (str): Moves that led to the position since the last\
+                capture or pawn move
+            result (CachedResult): Search result
+        """
+        key = (normalize_fen(fen), skill, int(movetime * 1000), chess960,
+               strength, history)
+        with self._lock:
+            self._used += 1
+            cursor = self._connection.execute(
+                'INSERT OR REPLACE INTO results VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (*key, result.best_move, result.ponder_move, result.score_cp,
+                 result.score_mate, result.depth, result.nodes, self._used))
+            self._entries += cursor.rowcount
+            if self._entries > self._max_entries:
+                self._evict()
+
+    def close(self) -> None:
+        """Closes cache's database"""
+        self._logger.info('hits: %s, misses: %s, hit rate: %.2f, entries: %s',
+                          self.hits, self.misses, self.hit_rate,
+                          self._entries)
+        with self._lock:
+            self._connection.close()
+
+    def _evict(self) -> None:
+        self._entries = self._connection.execute(
+            'SELECT COUNT(*) FROM results').fetchone()[0]
+        if self._entries <= self._max_entries:
+            return
+
+        count = self._entries - int(self._max_entries * EVICTION_RATIO)
+        self._connection.execute(
+            'DELETE FROM results WHERE used IN '
+            '(SELECT used FROM results ORDER BY used LIMIT ?)', (count,))
+        self._entries -= count
+        self._logger.info('Evicted %s results', count)
@@ -0,0 +1,158 @@
+"""Module with a pool of warm UCI engines shared across games"""
+from typing import AsyncIterator, Optional, Dict
+from contextlib import asynccontextmanager
+import asyncio
+import logging
+
+from bot.uci_protocol import UCIProtocol
+from bot.engine_cache import EngineCache
+from utils.popen_uci import popen_uci
+
+
+class EnginePool:
+    """Pool of pre-started UCI engines that games lease and return"""
+
+    def __init__(self, engine_path: str, size: int = 1,
+                 cache: Optional[EngineCache] = None) -> None:
+        self._engine_path = engine_path
+        self._size = size
+        self._cache = cache
+        self._logger = logging.getLogger('engine_pool')
+        self._idle: asyncio.Queue[UCIProtocol] = None
+        self._transports: Dict[UCIProtocol,
+                               asyncio.SubprocessTransport] = {}
+        self._started = False
+
+    @property
+    def size(self) -> int:
+        """Property that contains maximum number of engines in the pool
+
+        Returns:
+            int: Size of the pool
+        """
+        return self._size
+
+    @property
+    def idle(self) -> int:
+        """Property that contains number of engines waiting for a game
+
+        Returns:
+            int: Number of idle engines
+        """
+        return self._idle.qsize() if self._idle else 0
+
+    def metrics(self) -> Dict[str, int]:
+        """Gets search metrics summed over all engines of the pool
+
+        Returns:
+            Dict[str, int]: Numbers of searches, searches stopped\
+                at the deadline and searches that fell back to the last pv
+        """
+        metrics: Dict[str, int] = {}
+        for protocol in self._transports:
+            for name, value in protocol.metrics.items():
+                metrics[name] = metrics.get(name, 0) + value
+        return metrics
+
+    async def start(self) -> None:
+        """Starts all engines of the pool. Does nothing if already started"""
+        if self._started:
+            return
+        self._started = True
+        self._idle = asyncio.Queue()
+
+        protocols = await asyncio.gather(
+            *(self._spawn() for _ in range(self._size)))
+        for protocol in protocols:
+            self._idle.put_nowait(protocol)
+        self._logger.info('Started %s engines', self._size)
+
+    async def close(self) -> None:
+        """Closes all engines of the pool"""
+        self._logger.info('Search metrics: %s', self.metrics())
+        for transport in self._transports.values():
+            transport.close()
+        self._transports.clear()
+        self._idle = None
+        self._started = False
+        if self._cache:
+            self._cache.close()
+        self._logger.info('Engine pool closed')
+
+    async def acquire(self, difficulty: int = 20, fisher: bool = False,
+                      ponder: bool = False, fen: Optional[str] = None,
+                      limit_strength: bool = True) -> UCIProtocol:
+        """Leases an engine and resets it for a new game.\
+            Waits if all engines are busy
+
+        Args:
+            difficulty (int): Skill level. Defaults to 20
+            fisher (bool): Fisher random mode. Defaults to False
+            ponder (bool): Whether engine will ponder. Defaults to False
+            fen (Optional[str]): Starting position of the game,\
+                if protocol should keep game's moves. Defaults to None
+            limit_strength (bool): Whether engine limits its strength.\
+                Defaults to True
+
+        Returns:
+            UCIProtocol: Engine's protocol
+        """
+        await self.start()
+        protocol = await self._idle.get()
+        if self._is_dead(protocol):
+            self._transports.pop(protocol).close()
+            protocol = await self._spawn()
+
+        protocol.new_game(fen)
+        protocol.limit_strength(limit_strength)
+        protocol.set_skill_level(difficulty)
+        protocol.fisher_random(fisher)
+        protocol.set_ponder(ponder)
+        await protocol.ping()
+        return protocol
+
+    def release(self, protocol: UCIProtocol) -> None:
+        """Returns leased engine to the pool
+
+        Args:
+            protocol (UCIProtocol): Engine's protocol
+        """
+        if protocol in self._transports:
+            self._idle.put_nowait(protocol)
+
+    @asynccontextmanager
+    async def lease(self, difficulty: int = 20, fisher: bool = False,
+                    ponder: bool = False, fen: Optional[str] = None,
+                    limit_strength: bool = True)\
+            -> AsyncIterator[UCIProtocol]:
+        """Context manager that leases an engine for a game
+
+        Args:
+            difficulty (int): Skill level. Defaults to 20
+            fisher (bool): Fisher random mode. Defaults to False
+            ponder (bool): Whether engine will ponder. Defaults to False
+            fen (Optional[str]): Starting position of the game,\
+                if protocol should keep game's moves. Defaults to None
+            limit_strength (bool): Whether engine limits its strength.\
+                Defaults to True
+
+        Yields:
+            UCIProtocol: Engine's protocol
+        """
+        protocol = await self.acquire(difficulty, fisher, ponder, fen,
+                                      limit_strength)
+        try:
+            yield protocol
+        finally:
+            self.release(protocol)
+
+    async def _spawn(self) -> UCIProtocol:
+        transport, protocol = await popen_uci(self._engine_path)
+        self._transports[protocol] = transport
+        protocol.cache = self._cache
+        return protocol
+
+    def _is_dead(self, protocol: UCIProtocol) -> bool:
+        transport = self._transports[protocol]
+        return transport.is_closing() or\
+            transport.get_returncode() is not None
@@ -0,0 +1,304 @@
+"""Module with NNUE-style evaluation of chess positions"""
+from typing import Optional, Tuple, Dict, List
+import sys
+import time
+
+import numpy as np
+
+WHITE, BLACK = 0, 1
+PIECE_TYPES = 'pnbrq'
+FEATURES_PER_KING = 2 * len(PIECE_TYPES) * 64
+FEATURES = 64 * FEATURES_PER_KING
+HIDDEN_SIZE = 256
+LAYER_SIZE = 32
+OUTPUT_SCALE = 600
+WEIGHTS_SHAPES = {
+    'ft_weight': lambda hidden: (FEATURES, hidden),
+    'ft_bias': lambda hidden: (hidden,),
+    'l1_weight': lambda hidden: (LAYER_SIZE, 2 * hidden),
+    'l1_bias': lambda hidden: (LAYER_SIZE,),
+    'l2_weight': lambda hidden: (LAYER_SIZE, LAYER_SIZE),
+    'l2_bias': lambda hidden: (LAYER_SIZE,),
+    'out_weight': lambda hidden: (LAYER_SIZE,),
+    'out_bias': lambda hidden: (1,)
+}
+
+
+class InvalidWeightsError(Exception):
+    """Error that raises when weights file has invalid or missing arrays"""
+
+
+def square_index(position: Tuple[int, int], perspective: int) -> int:
+    """Gets index of a square from the point of view of a side
+
+    Args:
+        position (Tuple[int, int]): Position of a square on a chessboard
+        perspective (int): WHITE or BLACK
+
+    Returns:
+        int: Index of a square, where 0 is the side's a1 square
+    """
+    file, rank = position
+    if perspective == WHITE:
+        rank = 7 - rank
+    return rank * 8 + file
+
+
+def feature_index(king_square: int, symbol: str, position: Tuple[int, int],
+                  perspective: int) -> int:
+    """Gets index of a (king square, piece, square) feature
+
+    Args:
+        king_square (int): Index of perspective's king square
+        symbol (str): Piece's symbol in FEN notation (not a king)
+        position (Tuple[int, int]): Position of a piece
+        perspective (int): WHITE or BLACK
+
+    Returns:
+        int: Index of an input feature
+    """
+    own = symbol.isupper() == (perspective == WHITE)
+    piece = PIECE_TYPES.index(symbol.lower()) + (0 if own else 5)
+    square = square_index(position, perspective)
+    return king_square * FEATURES_PER_KING + piece * 64 + square
+
+
+def pieces_from_fen(fen: str) -> Dict[Tuple[int, int], str]:
+    """Gets pieces placement from a FEN string
+
+    Args:
+        fen (str): Position in FEN notation
+
+    Returns:
+        Dict[Tuple[int, int], str]: Pieces' symbols by their positions
+    """
+    pieces: Dict[Tuple[int, int], str] = {}
+    for rank, row in enumerate(fen.split()[0].split('/')):
+        file = 0
+        for char in row:
+            if char.isnumeric():
+                file += int(char)
+                continue
+            pieces[(file, rank)] = char
+            file += 1
+    return pieces
+
+
+class NNUE:
+    """Small efficiently updatable neural network for position evaluation"""
+
+    def __init__(self, weights: Dict[str, np.ndarray]) -> None:
+        if 'ft_bias' not in weights:
+            raise InvalidWeightsError('Missing array: ft_bias')
+        hidden = weights['ft_bias'].shape[0]
+
+        for name, shape in WEIGHTS_SHAPES.items():
+            if name not in weights:
+                raise InvalidWeightsError(f'Missing array: {name}')
+            if weights[name].shape != shape(hidden):
+                raise InvalidWeightsError(f'Invalid shape of array: {name}')
+
+        self._hidden_size = hidden
+        self.ft_weight = np.ascontiguousarray(weights['ft_weight'],
+                                              dtype=np.float32)
+        self.ft_bias = weights['ft_bias'].astype(np.float32)
+        self.l1_weight = weights['l1_weight'].astype(np.float32)
+        self.l1_bias = weights['l1_bias'].astype(np.float32)
+        self.l2_weight = weights['l2_weight'].astype(np.float32)
+        self.l2_bias = weights['l2_bias'].astype(np.float32)
+        self.out_weight = weights['out_weight'].astype(np.float32)
+        self.out_bias = float(weights['out_bias'][0])
+
+    @classmethod
+    def load(cls, path: str) -> 'NNUE':
+        """Loads network from a .npz file
+
+        Args:
+            path (str): Path to the weights file
+
+        Raises:
+            InvalidWeightsError: Raises when file has invalid arrays
+
+        Returns:
+            NNUE: Network
+        """
+        with np.load(path) as data:
+            weights = {name: data[name] for name in data.files}
+        return cls(weights)
+
+    @classmethod
+    def random(cls, hidden_size: int = HIDDEN_SIZE, seed: int = 0) -> 'NNUE':
+        """Creates network with random weights
+
+        Args:
+            hidden_size (int): Size of the accumulator. Defaults to 256
+            seed (int): Random seed. Defaults to 0
+
+        Returns:
+            NNUE: Network
+        """
+        rng = np.random.default_rng(seed)
+        weights = {name: rng.normal(0, 0.05, shape(hidden_size))
+                   for name, shape in WEIGHTS_SHAPES.items()}
+        return cls(weights)
+
+    def save(self, path: str) -> None:
+        """Saves network to a .npz file
+
+        Args:
+            path (str): Path to the weights file
+        """
+        np.savez(path, ft_weight=self.ft_weight, ft_bias=self.ft_bias,
+                 l1_weight=self.l1_weight, l1_bias=self.l1_bias,
+                 l2_weight=self.l2_weight, l2_bias=self.l2_bias,
+                 out_weight=self.out_weight,
+                 out_bias=np.array([self.out_bias], dtype=np.float32))
+
+    @property
+    def hidden_size(self) -> int:
+        """Property that contains size of the accumulator
+
+        Returns:
+            int: Size of the accumulator
+        """
+        return self._hidden_size
+
+    def evaluate(self, accumulator: 'Accumulator', white_to_move: bool)\
+            -> int:
+        """Evaluates position from accumulator's values
+
+        Args:
+            accumulator (Accumulator): Accumulator of the position
+            white_to_move (bool): Side to move
+
+        Returns:
+            int: Evaluation in centipawns from side to move's point of view
+        """
+        us, them = (WHITE, BLACK) if white_to_move else (BLACK, WHITE)
+        inputs = np.concatenate((accumulator.values[us],
+                                 accumulator.values[them]))
+        np.clip(inputs, 0, 1, out=inputs)
+        hidden = self.l1_weight @ inputs + self.l1_bias
+        np.clip(hidden, 0, 1, out=hidden)
+        hidden = self.l2_weight @ hidden + self.l2_bias
+        np.clip(hidden, 0, 1, out=hidden)
+        output = float(self.out_weight @ hidden) + self.out_bias
+        return int(output * OUTPUT_SCALE)
+
+
+class Accumulator:
+    """First layer's values of NNUE for both sides,\
+        updated incrementally on every move"""
+
+    def __init__(self, network: NNUE,
+                 pieces: Dict[Tuple[int, int], str]) -> None:
+        self._network = network
+        self._pieces = dict(pieces)
+        self.values = np.empty((2, network.hidden_size), dtype=np.float32)
+        self.refresh(WHITE)
+        self.refresh(BLACK)
+
+    @property
+    def pieces(self) -> Dict[Tuple[int, int], str]:
+        """Property that contains pieces' symbols by their positions
+
+        Returns:
+            Dict[Tuple[int, int], str]: Pieces' placement
+        """
+        return self._pieces
+
+    def refresh(self, perspective: int) -> None:
+        """Recomputes accumulator's values for a side from scratch
+
+        Args:
+            perspective (int): WHITE or BLACK
+        """
+        king_square = self._king_square(perspective)
+        features = [feature_index(king_square, symbol, position, perspective)
+                    for position, symbol in self._pieces.items()
+                    if symbol not in 'Kk']
+        values = self.values[perspective]
+        values[:] = self._network.ft_bias
+        if features:
+            values += self._network.ft_weight[features].sum(axis=0)
+
+    def update(self, removed: List[Tuple[Tuple[int, int], str]],
+               added: List[Tuple[Tuple[int, int], str]]) -> None:
+        """Updates accumulator with added and removed pieces.\
+            Can be registered as Board's move listener
+
+        Args:
+            removed (List[Tuple[Tuple[int, int], str]]): Removed pieces
+            added (List[Tuple[Tuple[int, int], str]]): Added pieces
+        """
+        old_kings = [self._king_square(WHITE), self._king_square(BLACK)]
+        for position, _ in removed:
+            self._pieces.pop(position, None)
+        for position, symbol in added:
+            self._pieces[position] = symbol
+
+        weight = self._network.ft_weight
+        for perspective, king in ((WHITE, 'K'), (BLACK, 'k')):
+            if any(symbol == king for _, symbol in added):
+                self.refresh(perspective)
+                continue
+
+            king_square = old_kings[perspective]
+            values = self.values[perspective]
+            for position, symbol in removed:
+                if symbol not in 'Kk':
+                    values -= weight[feature_index(king_square, symbol,
+                                                   position, perspective)]
+            for position, symbol in added:
+                if symbol not in 'Kk':
+                    values += weight[feature_index(king_square, symbol,
+                                                   position, perspective)]
+
+    def _king_square(self, perspective: int) -> int:
+        king = 'K' if perspective == WHITE else 'k'
+        for position, symbol in self._pieces.items():
+            if symbol == king:
+                return square_index(position, perspective)
+        return 0
+
+
+def benchmark(network: NNUE, fen: str, count: int = 10000)\
+        -> Tuple[float, float]:
+    """Measures evaluation speed with incremental and full updates
+
+    Args:
+        network (NNUE): Network
+        fen (str): Position in FEN notation. Must have a knight on g1
+        count (int): Number of evaluations. Defaults to 10000
+
+    Returns:
+        Tuple[float, float]: Incremental and full recompute evals/sec
+    """
+    accumulator = Accumulator(network, pieces_from_fen(fen))
+    moves = [([((6, 7), 'N')], [((5, 5), 'N')]),
+             ([((5, 5), 'N')], [((6, 7), 'N')])]
+
+    start = time.perf_counter()
+    for i in range(count):
+        accumulator.update(*moves[i % 2])
+        network.evaluate(accumulator, i % 2 == 1)
+    incremental = count / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(count):
+        accumulator.update(*moves[i % 2])
+        accumulator.refresh(WHITE)
+        accumulator.refresh(BLACK)
+        network.evaluate(accumulator, i % 2 == 1)
+    full = count / (time.perf_counter() - start)
+
+    return incremental, full
+
+
+if __name__ == '__main__':
+    weights_path: Optional[str] = sys.argv[1] if len(sys.argv) > 1 else None
+    nnue = NNUE.load(weights_path) if weights_path else NNUE.random()
+    start_fen = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+    incremental_speed, full_speed = benchmark(nnue, start_fen)
+    print(f'incremental: {incremental_speed:.0f} evals/sec')
+    print(f'full recompute: {full_speed:.0f} evals/sec')
@@ -0,0 +1,257 @@
+"""Module with alpha-beta search over a headless board"""
+from typing import Callable, Optional, Tuple, Dict, List
+import threading
+import time
+
+from game.model.headless_board import HeadlessBoard, Move
+
+INFINITY = 1000000
+MATE_SCORE = 100000
+MAX_DEPTH = 64
+MATE_BOUND = MATE_SCORE - MAX_DEPTH
+CHECK_INTERVAL = 64
+MAX_TABLE_SIZE = 1000000
+EXACT, LOWER, UPPER = 0, 1, 2
+
+PIECE_VALUES = {'P': 100, 'N': 320, 'B': 330, 'R': 500, 'Q': 900, 'K': 0}
+CENTER_BONUS = [min(file, 7 - file) + min(rank, 7 - rank)
+                for rank in range(8) for file in range(8)]
+CENTER_WEIGHTS = {'P': 0, 'N': 6, 'B': 4, 'R': 1, 'Q': 2, 'K': 0}
+
+Evaluation = Callable[[HeadlessBoard], int]
+InfoCallback = Callable[[int, int, int, List[str]], None]
+
+
+class SearchAborted(Exception):
+    """Error that raises when search is stopped or runs out of time"""
+
+
+def evaluate_material(board: HeadlessBoard) -> int:
+    """Evaluates position by material, central placement of pieces\
+        and advancement of pawns
+
+    Args:
+        board (HeadlessBoard): Board
+
+    Returns:
+        int: Evaluation in centipawns from side to move's point of view
+    """
+    score = 0
+    for square in range(64):
+        piece = board.piece_at(square)
+        if not piece:
+            continue
+        kind = piece.upper()
+        value = PIECE_VALUES[kind] +\
+            CENTER_WEIGHTS[kind] * CENTER_BONUS[square]
+        if kind == 'P':
+            rank = square >> 3
+            value += 5 * ((6 - rank) if piece == 'P' else (rank - 1))
+        score += value if piece.isupper() else -value
+    return score if board.white_to_move else -score
+
+
+class Searcher:
+    """Iterative deepening alpha-beta search with quiescence search\
+        and transposition table. Can be stopped from another thread.\
+            Mate scores are stored in the table as distance from the node,\
+                so that they stay correct at any ply"""
+
+    def __init__(self, board: HeadlessBoard,
+                 evaluate: Evaluation = evaluate_material) -> None:
+        self.board = board
+        self.evaluate = evaluate
+        self.stop_event = threading.Event()
+        self.deadline: Optional[float] = None
+        self.max_nodes: Optional[int] = None
+        self.nodes = 0
+        self._table: Dict[int, Tuple[int, int, int, Optional[Move]]] = {}
+
+    def clear(self) -> None:
+        """Clears transposition table, e.g. before a new game"""
+        self._table.clear()
+
+    def search(self, max_depth: int = MAX_DEPTH,
+               info: Optional[InfoCallback] = None)\
+            -> Tuple[Optional[str], Optional[str]]:
+        """Searches current position until max depth, deadline,\
+            node limit or stop
+
+        Args:
+            max_depth (int): Maximum depth in plies. Defaults to 64
+            info (Optional[InfoCallback]): Called after every finished\
+                iteration with depth, score, nodes and pv. Defaults to None
+
+        Returns:
+            Tuple[Optional[str], Optional[str]]: Best move and expected\
+                reply in a long algebraic notation, None if there are\
+                    no legal moves
+        """
+        self.nodes = 0
+        if len(self._table) > MAX_TABLE_SIZE:
+            self._table.clear()
+
+        board = self.board
+        root_ply = board.ply
+        legal_moves = board.legal_moves()
+        if not legal_moves:
+            return None, None
+        pv = [board.to_uci(legal_moves[0])]
+
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(depth, -INFINITY, INFINITY, 0)
+            except SearchAborted:
+                while board.ply > root_ply:
+                    board.pop()
+                break
+            pv = self._principal_variation(depth) or pv
+            if info:
+                info(depth, score, self.nodes, pv)
+            if abs(score) >= MATE_SCORE - depth:
+                break
+
+        return pv[0], (pv[1] if len(pv) > 1 else None)
+
+    def _check_limits(self) -> None:
+        if self.stop_event.is_set():
+            raise SearchAborted
+        if self.deadline and time.monotonic() >= self.deadline:
+            raise SearchAborted
+        if self.max_nodes and self.nodes >= self.max_nodes:
+            raise SearchAborted
+
+    def _negamax(self, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        board = self.board
+        if ply and (board.halfmove_clock >= 100 or board.is_repetition(2)):
+            return 0
+        if depth <= 0:
+            return self._quiescence(alpha, beta, ply)
+
+        original_alpha = alpha
+        entry = self._table.get(board.key)
+        table_move = None
+        if entry:
+            entry_depth, entry_score, flag, table_move = entry
+            entry_score = self._from_table(entry_score, ply)
+            if ply and entry_depth >= depth:
+                if flag == EXACT or\
+                        (flag == LOWER and entry_score >= beta) or\
+                        (flag == UPPER and entry_score <= alpha):
+                    return entry_score
+
+        white = board.white_to_move
+        best_score, best_move = -INFINITY, None
+        for move in self._ordered_moves(table_move):
+            board.push(move)
+            if board.is_king_attacked(white):
+                board.pop()
+                continue
+            score = -self._negamax(depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if best_move is None:
+            return -MATE_SCORE + ply if board.is_check() else 0
+
+        flag = EXACT
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        self._table[board.key] = depth, self._to_table(best_score, ply),\
+            flag, best_move
+        return best_score
+
+    @staticmethod
+    def _to_table(score: int, ply: int) -> int:
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _from_table(score: int, ply: int) -> int:
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+    def _quiescence(self, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if self.nodes % CHECK_INTERVAL == 0:
+            self._check_limits()
+
+        board = self.board
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        white = board.white_to_move
+        for move in self._ordered_moves(None, captures_only=True):
+            board.push(move)
+            if board.is_king_attacked(white):
+                board.pop()
+                continue
+            score = -self._quiescence(-beta, -alpha, ply + 1)
+            board.pop()
+
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _ordered_moves(self, first: Optional[Move],
+                       captures_only: bool = False) -> List[Move]:
+        board = self.board
+        scored = []
+        for move in board.pseudo_legal_moves():
+            from_square, to_square, promote = move
+            victim = board.piece_at(to_square)
+            attacker = board.piece_at(from_square)
+            capture = victim and victim.isupper() != attacker.isupper()
+            if captures_only and not capture and not promote:
+                continue
+
+            score = 0
+            if move == first:
+                score = INFINITY
+            elif capture:
+                score = 10 * PIECE_VALUES[victim.upper()] -\
+                    PIECE_VALUES[attacker.upper()]
+            if promote:
+                score += PIECE_VALUES[promote.upper()]
+            scored.append((score, move))
+
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _principal_variation(self, depth: int) -> List[str]:
+        board = self.board
+        pv: List[str] = []
+        seen = set()
+        for _ in range(depth):
+            entry = self._table.get(board.key)
+            if not entry or not entry[3] or board.key in seen:
+                break
+            move = entry[3]
+            if not board.is_legal(move):
+                break
+            seen.add(board.key)
+            pv.append(board.to_uci(move))
+            board.push(move)
+        for _ in pv:
+            board.pop()
+        return pv
@@ -0,0 +1,272 @@
+"""Module with headless engine-vs-engine matches played in parallel.
+
+Run from the client directory:
+    python -m bot.tournament -n 100 -j 8 --skill1 10 --skill2 12
+"""
+from typing import Iterator, Optional, List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import AsyncExitStack
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+
+from bot.engine_pool import EnginePool
+from game.model.headless_board import HeadlessBoard, IllegalMoveError,\
+    START_FEN
+from utils.get_position import get_fisher_fen
+from utils.pgn import read_epd
+
+DEFAULT_MOVE_TIME = 0.1
+MAX_PLIES = 400
+MATERIAL_THRESHOLD = 5
+MATERIAL_PLIES = 8
+CONFIDENCE_Z = 1.96
+
+GameResult = Dict[str, Any]
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_pools: Dict[int, EnginePool] = {}
+
+
+def elo_difference(score: float) -> float:
+    """Gets Elo difference that corresponds to the expected score
+
+    Args:
+        score (float): Expected score from 0 to 1
+
+    Returns:
+        float: Elo difference, infinite for a score of 0 or 1
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def match_stats(scores: List[float]) -> Dict[str, float]:
+    """Gets match statistics from the first player's point of view
+
+    Args:
+        scores (List[float]): Score of every game: 1, 0.5 or 0
+
+    Returns:
+        Dict[str, float]: Wins, draws, losses, score, Elo difference\
+            and its 95% confidence interval
+    """
+    games = len(scores)
+    score = sum(scores) / games
+    variance = sum((value - score) ** 2 for value in scores) / games
+    margin = CONFIDENCE_Z * math.sqrt(variance / games)
+    return {
+        'wins': scores.count(1.0),
+        'draws': scores.count(0.5),
+        'losses': scores.count(0.0),
+        'score': score,
+        'elo': elo_difference(score),
+        'elo_low': elo_difference(score - margin),
+        'elo_high': elo_difference(score + margin)
+    }
+
+
+def _adjudicate(board: HeadlessBoard, imbalance_plies: int)\
+        -> Optional[tuple]:
+    outcome = board.outcome()
+    if outcome:
+        return outcome
+    if imbalance_plies >= MATERIAL_PLIES:
+        winner = '1-0' if board.material() > 0 else '0-1'
+        return winner, 'material'
+    if board.ply >= MAX_PLIES:
+        return '1/2-1/2', 'move limit'
+    return None
+
+
+async def _play(fen: str, chess960: bool, skills: Dict[int, int],
+                first_is_white: bool, movetime: float) -> GameResult:
+    board = HeadlessBoard(fen, chess960)
+    white, black = (1, 2) if first_is_white else (2, 1)
+    players = {True: white, False: black}
+
+    async with AsyncExitStack() as stack:
+        protocols = {
+            color: await stack.enter_async_context(
+                _pools[player].lease(skills[player], chess960, fen=fen,
+                                     limit_strength=False))
+            for color, player in players.items()
+        }
+        imbalance_plies = 0
+        while True:
+            outcome = _adjudicate(board, imbalance_plies)
+            if outcome:
+                break
+
+            mover = board.white_to_move
+            move = await protocols[mover].get_best_move(None, movetime)
+            try:
+                board.push_uci(move)
+            except IllegalMoveError:
+                outcome = ('0-1' if mover else '1-0'), 'illegal move'
+                break
+            for protocol in protocols.values():
+                protocol.push_move(move)
+
+            if abs(board.material()) >= MATERIAL_THRESHOLD:
+                imbalance_plies += 1
+            else:
+                imbalance_plies = 0
+
+    result, reason = outcome
+    first_score = {'1-0': 1.0, '0-1': 0.0}.get(result, 0.5)
+    if not first_is_white:
+        first_score = 1 - first_score
+    return {
+        'fen': fen,
+        'white': players[True],
+        'black': players[False],
+        'result': result,
+        'reason': reason,
+        'plies': board.ply,
+        'score': first_score
+    }
+
+
+def _init_worker(engines: Dict[int, str]) -> None:
+    global _loop
+    _loop = asyncio.new_event_loop()
+    for player, engine_path in engines.items():
+        _pools[player] = EnginePool(engine_path, 1)
+
+
+def play_game(fen: str, chess960: bool, skills: Dict[int, int],
+              first_is_white: bool, movetime: float) -> GameResult:
+    """Plays one game in a worker process. Engines of the process\
+        are kept running between games
+
+    Args:
+        fen (str): Starting position in FEN notation
+        chess960 (bool): Whether game is Fisher random
+        skills (Dict[int, int]): Skill levels of players 1 and 2
+        first_is_white (bool): Whether player 1 plays white
+        movetime (float): Search time per move in seconds
+
+    Returns:
+        GameResult: Result, its reason, length of the game\
+            and score of player 1
+    """
+    for pool in _pools.values():
+        _loop.run_until_complete(pool.start())
+    return _loop.run_until_complete(
+        _play(fen, chess960, skills, first_is_white, movetime))
+
+
+def openings(count: int, chess960: bool = False,
+             path: Optional[str] = None) -> Iterator[str]:
+    """Generates starting positions, each used for a pair of games
+
+    Args:
+        count (int): Number of positions
+        chess960 (bool): Generate Fisher random positions. Defaults to False
+        path (Optional[str]): EPD file with positions, used in a loop.\
+            Defaults to None
+
+    Yields:
+        str: Position in FEN notation
+    """
+    positions: List[str] = []
+    if path:
+        with open(path, encoding='utf-8') as file:
+            positions = [fen for fen, _ in read_epd(file)]
+
+    for index in range(count):
+        if positions:
+            yield positions[index % len(positions)]
+        elif chess960:
+            yield get_fisher_fen()
+        else:
+            yield START_FEN
+
+
+def run(args: argparse.Namespace) -> List[GameResult]:
+    """Plays a match with parameters of CLI and prints its results
+
+    Args:
+        args (argparse.Namespace): Parsed command line arguments
+
+    Returns:
+        List[GameResult]: Results of all games
+    """
+    engines = {1: args.engine1, 2: args.engine2 or args.engine1}
+    skills = {1: args.skill1, 2: args.skill2}
+    pairs = (args.games + 1) // 2
+    results: List[GameResult] = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.jobs, initializer=_init_worker,
+                             initargs=(engines,)) as executor:
+        futures = []
+        for fen in openings(pairs, args.chess960, args.openings):
+            for first_is_white in (True, False):
+                if len(futures) < args.games:
+                    futures.append(executor.submit(
+                        play_game, fen, args.chess960, skills,
+                        first_is_white, args.movetime))
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if args.verbose:
+                print(json.dumps(result), file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    stats = match_stats([result['score'] for result in results])
+    print(f'Player 1 (skill {args.skill1}) vs player 2 '
+          f'(skill {args.skill2}): +{stats["wins"]} ={stats["draws"]} '
+          f'-{stats["losses"]}, score {stats["score"]:.3f}')
+    print(f'Elo difference: {stats["elo"]:+.1f} '
+          f'[{stats["elo_low"]:+.1f}, {stats["elo_high"]:+.1f}]')
+    print(f'{len(results)} games in {elapsed:.1f} s, '
+          f'{len(results) / elapsed * 3600:.0f} games/hour')
+    return results
+
+
+def main() -> None:
+    """Parses command line arguments and plays a match"""
+    engine = None
+    if os.path.exists('config.json'):
+        with open('config.json', 'r', encoding='utf-8') as config_file:
+            engine = json.load(config_file).get('engine')
+
+    parser = argparse.ArgumentParser(
+        description='Plays engine-vs-engine games without graphics')
+    parser.add_argument('-n', '--games', type=int, default=100,
+                        help='Number of games')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help='Number of games played at once')
+    parser.add_argument('--engine1', default=engine, required=engine is None,
+                        help='Path to the first UCI engine')
+    parser.add_argument('--engine2', default=None,
+                        help='Path to the second UCI engine, the first one '
+                        'by default')
+    parser.add_argument('--skill1', type=int, default=20,
+                        help='Skill level of the first engine')
+    parser.add_argument('--skill2', type=int, default=20,
+                        help='Skill level of the second engine')
+    parser.add_argument('-t', '--movetime', type=float,
+                        default=DEFAULT_MOVE_TIME,
+                        help='Search time per move in seconds')
+    parser.add_argument('--chess960', action='store_true',
+                        help='Start games from Fisher random positions')
+    parser.add_argument('--openings', default=None,
+                        help='EPD file with starting positions')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Print every game result')
+    run(parser.parse_args())
+
+
+if __name__ == '__main__':
+    main()
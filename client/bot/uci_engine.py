@@ -0,0 +1,265 @@
+"""Module with engine side of UCI protocol, so that project's rules\
+    and search can be used from other chess GUIs.
+
+Run from the client directory:
+    python -m bot.uci_engine
+"""
+from typing import Iterable, Optional, TextIO, Dict
+import sys
+import threading
+import time
+
+from bot.search import Searcher, evaluate_material, MATE_SCORE, MAX_DEPTH
+from game.model.headless_board import HeadlessBoard, InvalidFENError,\
+    IllegalMoveError, START_FEN
+
+ENGINE_NAME = 'Chess'
+ENGINE_AUTHOR = 'bloodypenelope'
+DEFAULT_MOVES_TO_GO = 30
+MIN_MOVE_TIME = 10
+MOVE_OVERHEAD = 50
+GO_PARAMS = ('wtime', 'btime', 'winc', 'binc', 'movestogo', 'depth',
+             'nodes', 'movetime')
+OPTIONS = (
+    'option name UCI_Chess960 type check default false',
+    'option name Skill Level type spin default 20 min 0 max 20',
+    'option name Ponder type check default false',
+    'option name EvalFile type string default <empty>'
+)
+
+
+def time_budget(params: Dict[str, int], white: bool) -> Optional[float]:
+    """Gets time for a move from parameters of go command
+
+    Args:
+        params (Dict[str, int]): Parameters of go command in milliseconds
+        white (bool): Side to move
+
+    Returns:
+        Optional[float]: Time in seconds, None if search is not limited\
+            by time
+    """
+    if 'movetime' in params:
+        return params['movetime'] / 1000
+    remaining = params.get('wtime' if white else 'btime')
+    if remaining is None:
+        return None
+
+    increment = params.get('winc' if white else 'binc', 0)
+    moves_to_go = params.get('movestogo') or DEFAULT_MOVES_TO_GO
+    budget = remaining / moves_to_go + increment * 0.8
+    budget = min(budget, remaining / 2 - MOVE_OVERHEAD)
+    return max(budget, MIN_MOVE_TIME) / 1000
+
+
+def score_text(score: int) -> str:
+    """Converts search score to a score of UCI info line
+
+    Args:
+        score (int): Score in centipawns, mates are near MATE_SCORE
+
+    Returns:
+        str: 'cp <centipawns>' or 'mate <moves>'
+    """
+    if abs(score) >= MATE_SCORE - MAX_DEPTH:
+        plies = MATE_SCORE - abs(score)
+        moves = (plies + 1) // 2
+        return f'mate {moves if score > 0 else -moves}'
+    return f'cp {score}'
+
+
+class UCIEngine:
+    """Class that reads UCI commands and answers them.\
+        Search runs in a background thread, so that stop,\
+            ponderhit and isready are answered while searching"""
+
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        self._output = output
+        self._lock = threading.Lock()
+        self._chess960 = False
+        self._skill_level = 20
+        self._network = None
+        self._searcher = Searcher(HeadlessBoard())
+        self._thread: Optional[threading.Thread] = None
+        self._release = threading.Event()
+        self._budget: Optional[float] = None
+
+    def run(self, lines: Iterable[str]) -> None:
+        """Handles commands until quit or the end of input
+
+        Args:
+            lines (Iterable[str]): Commands, e.g. sys.stdin
+        """
+        for line in lines:
+            if not self.handle(line):
+                break
+        self._stop()
+
+    def handle(self, line: str) -> bool:
+        """Handles one command
+
+        Args:
+            line (str): Command
+
+        Returns:
+            bool: False if engine should quit, True otherwise
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+
+        match tokens[0]:
+            case 'uci':
+                self._send(f'id name {ENGINE_NAME}')
+                self._send(f'id author {ENGINE_AUTHOR}')
+                for option in OPTIONS:
+                    self._send(option)
+                self._send('uciok')
+            case 'isready':
+                self._send('readyok')
+            case 'ucinewgame':
+                self._stop()
+                self._searcher.clear()
+            case 'setoption':
+                self._set_option(tokens[1:])
+            case 'position':
+                self._stop()
+                self._set_position(tokens[1:])
+            case 'go':
+                self._stop()
+                self._go(tokens[1:])
+            case 'stop':
+                self._stop()
+            case 'ponderhit':
+                if self._budget is not None:
+                    self._searcher.deadline = time.monotonic() + self._budget
+                self._release.set()
+            case 'quit':
+                return False
+        return True
+
+    def _send(self, line: str) -> None:
+        with self._lock:
+            self._output.write(line + '\n')
+            self._output.flush()
+
+    def _stop(self) -> None:
+        if self._thread:
+            self._searcher.stop_event.set()
+            self._release.set()
+            self._thread.join()
+            self._thread = None
+
+    def _set_option(self, tokens: list) -> None:
+        if 'name' not in tokens:
+            return
+        value_index = tokens.index('value') if 'value' in tokens\
+            else len(tokens)
+        name = ' '.join(tokens[tokens.index('name') + 1:value_index])
+        value = ' '.join(tokens[value_index + 1:])
+
+        match name.lower():
+            case 'uci_chess960':
+                self._chess960 = value.lower() == 'true'
+                self._searcher.board.chess960 = self._chess960
+            case 'skill level':
+                try:
+                    self._skill_level = min(max(int(value), 0), 20)
+                except ValueError:
+                    self._send(f'info string invalid Skill Level: {value}')
+            case 'evalfile':
+                self._load_network(value)
+
+    def _load_network(self, path: str) -> None:
+        if not path or path == '<empty>':
+            self._network = None
+            return
+        self._network = None
+        try:
+            from bot.nnue import NNUE, InvalidWeightsError
+        except ImportError as exc:
+            self._send(f'info string cannot load EvalFile: {exc}')
+            return
+        try:
+            self._network = NNUE.load(path)
+        except (InvalidWeightsError, OSError, ValueError) as exc:
+            self._send(f'info string cannot load EvalFile: {exc}')
+
+    def _set_position(self, tokens: list) -> None:
+        if not tokens:
+            return
+        moves_index = tokens.index('moves') if 'moves' in tokens\
+            else len(tokens)
+        fen = START_FEN if tokens[0] == 'startpos'\
+            else ' '.join(tokens[1:moves_index])
+
+        try:
+            board = HeadlessBoard(fen, self._chess960)
+            for move in tokens[moves_index + 1:]:
+                board.push_uci(move)
+        except (InvalidFENError, IllegalMoveError) as exc:
+            self._send(f'info string invalid position: {exc}')
+            return
+
+        self._searcher.board = board
+        self._searcher.evaluate = evaluate_material
+        if self._network:
+            from bot.nnue import Accumulator
+            network = self._network
+            accumulator = Accumulator(network, board.pieces())
+            board.add_move_listener(accumulator.update)
+            self._searcher.evaluate = lambda position: network.evaluate(
+                accumulator, position.white_to_move)
+
+    def _go(self, tokens: list) -> None:
+        params: Dict[str, int] = {}
+        for index, token in enumerate(tokens[:-1]):
+            if token in GO_PARAMS:
+                try:
+                    params[token] = int(tokens[index + 1])
+                except ValueError:
+                    continue
+        infinite = 'infinite' in tokens
+        ponder = 'ponder' in tokens
+
+        searcher = self._searcher
+        searcher.stop_event.clear()
+        self._release.clear()
+        self._budget = time_budget(params, searcher.board.white_to_move)
+        searcher.deadline = None
+        if self._budget is not None and not infinite and not ponder:
+            searcher.deadline = time.monotonic() + self._budget
+        searcher.max_nodes = params.get('nodes')
+
+        max_depth = params.get('depth', MAX_DEPTH)
+        if self._skill_level < 20:
+            max_depth = min(max_depth, 1 + self._skill_level // 4)
+        wait_release = infinite or ponder
+        if not wait_release:
+            self._release.set()
+
+        self._thread = threading.Thread(target=self._search,
+                                        args=(max_depth,), daemon=True)
+        self._thread.start()
+
+    def _search(self, max_depth: int) -> None:
+        start = time.monotonic()
+
+        def info(depth: int, score: int, nodes: int, pv: list) -> None:
+            elapsed = max(time.monotonic() - start, 0.001)
+            self._send(f'info depth {depth} score {score_text(score)} '
+                       f'nodes {nodes} nps {int(nodes / elapsed)} '
+                       f'time {int(elapsed * 1000)} pv {" ".join(pv)}')
+
+        best_move, ponder_move = self._searcher.search(max_depth, info)
+        self._release.wait()
+        if not best_move:
+            self._send('bestmove 0000')
+        elif ponder_move:
+            self._send(f'bestmove {best_move} ponder {ponder_move}')
+        else:
+            self._send(f'bestmove {best_move}')
+
+
+if __name__ == '__main__':
+    UCIEngine().run(sys.stdin)
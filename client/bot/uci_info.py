@@ -0,0 +1,233 @@
+"""Module with parsing of UCI engine's info lines"""
+from typing import Optional, Deque, List, Dict
+from collections import deque
+from dataclasses import dataclass, field
+import asyncio
+import logging
+
+INT_FIELDS = ('depth', 'seldepth', 'multipv', 'nodes', 'nps', 'time',
+              'hashfull', 'tbhits', 'currmovenumber')
+MATE_SCORE = 100000
+
+
+@dataclass(slots=True)
+class InfoLine:
+    """Class that describes engine's info line"""
+    depth: Optional[int] = None
+    seldepth: Optional[int] = None
+    multipv: Optional[int] = None
+    score_cp: Optional[int] = None
+    score_mate: Optional[int] = None
+    bound: Optional[str] = None
+    nodes: Optional[int] = None
+    nps: Optional[int] = None
+    time: Optional[int] = None
+    hashfull: Optional[int] = None
+    tbhits: Optional[int] = None
+    currmove: Optional[str] = None
+    currmovenumber: Optional[int] = None
+    pv: List[str] = field(default_factory=list)
+    string: Optional[str] = None
+
+    def sort_key(self) -> int:
+        """Gets comparable score of the line, where mates are better\
+            than any centipawn score and faster mates are better
+
+        Returns:
+            int: Score from side to move's point of view
+        """
+        if self.score_mate is not None:
+            if self.score_mate > 0:
+                return MATE_SCORE - self.score_mate
+            return -MATE_SCORE - self.score_mate
+        return self.score_cp or 0
+
+
+def parse_info(line: str) -> InfoLine:
+    """Parses engine's info line
+
+    Args:
+        line (str): Line that starts with 'info'
+
+    Returns:
+        InfoLine: Parsed info line. Unknown tokens are skipped
+    """
+    info = InfoLine()
+    tokens = line.split()
+    i = 1
+    try:
+        while i < len(tokens):
+            key = tokens[i]
+            if key in INT_FIELDS:
+                setattr(info, key, int(tokens[i + 1]))
+                i += 2
+            elif key == 'score':
+                value = int(tokens[i + 2])
+                if tokens[i + 1] == 'mate':
+                    info.score_mate = value
+                else:
+                    info.score_cp = value
+                i += 3
+                if i < len(tokens) and tokens[i] in ('lowerbound',
+                                                     'upperbound'):
+                    info.bound = tokens[i][:5]
+                    i += 1
+            elif key == 'currmove':
+                info.currmove = tokens[i + 1]
+                i += 2
+            elif key == 'pv':
+                info.pv = tokens[i + 1:]
+                break
+            elif key == 'string':
+                info.string = ' '.join(tokens[i + 1:])
+                break
+            else:
+                i += 1
+    except (IndexError, ValueError):
+        pass
+    return info
+
+
+class InfoStream:
+    """Async iterator over info lines of a single engine's search.\
+        Drops the oldest lines when consumer falls behind"""
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self._lines: Deque[InfoLine] = deque()
+        self._maxsize = maxsize
+        self._event = asyncio.Event()
+        self._logger = logging.getLogger('uci')
+        self._finished = False
+        self._best_move: Optional[str] = None
+        self._ponder_move: Optional[str] = None
+        self._last: Optional[InfoLine] = None
+        self._pv: List[str] = []
+        self._variations: Dict[int, InfoLine] = {}
+        self._dropped = 0
+
+    @property
+    def finished(self) -> bool:
+        """Property that tells whether search has finished or not
+
+        Returns:
+            bool: True if engine sent its best move, False otherwise
+        """
+        return self._finished
+
+    @property
+    def best_move(self) -> Optional[str]:
+        """Property that contains engine's best move
+
+        Returns:
+            Optional[str]: Best move if search has finished, None otherwise
+        """
+        return self._best_move
+
+    @property
+    def ponder_move(self) -> Optional[str]:
+        """Property that contains opponent's reply expected by engine
+
+        Returns:
+            Optional[str]: Expected reply if engine sent it, None otherwise
+        """
+        return self._ponder_move
+
+    @property
+    def last(self) -> Optional[InfoLine]:
+        """Property that contains the latest info line with a score
+
+        Returns:
+            Optional[InfoLine]: Latest info line, even if it was dropped
+        """
+        return self._last
+
+    @property
+    def pv(self) -> List[str]:
+        """Property that contains the latest principal variation
+
+        Returns:
+            List[str]: Moves in a long algebraic notation,\
+                empty if engine sent no pv yet
+        """
+        return self._pv
+
+    @property
+    def variations(self) -> List[InfoLine]:
+        """Property that contains the latest exact info line of every\
+            principal variation in MultiPV mode, best first
+
+        Returns:
+            List[InfoLine]: Info lines sorted by score
+        """
+        return sorted(self._variations.values(), key=InfoLine.sort_key,
+                      reverse=True)
+
+    @property
+    def dropped(self) -> int:
+        """Property that contains number of dropped info lines
+
+        Returns:
+            int: Number of dropped info lines
+        """
+        return self._dropped
+
+    def put(self, info: InfoLine) -> None:
+        """Adds engine's info line to the stream
+
+        Args:
+            info (InfoLine): Info line
+        """
+        if info.score_cp is not None or info.score_mate is not None:
+            self._last = info
+        if info.pv:
+            self._pv = info.pv
+            if info.bound is None and (info.score_cp is not None or
+                                       info.score_mate is not None):
+                self._variations[info.multipv or 1] = info
+        if len(self._lines) >= self._maxsize:
+            self._lines.popleft()
+            self._dropped += 1
+        self._lines.append(info)
+        self._event.set()
+
+    def finish(self, best_move: str, ponder_move: Optional[str]) -> None:
+        """Finishes the stream with engine's best move
+
+        Args:
+            best_move (str): Best move in a long algebraic notation
+            ponder_move (Optional[str]): Expected opponent's reply
+        """
+        self._best_move = best_move
+        self._ponder_move = ponder_move
+        self._finished = True
+        self._event.set()
+
+        last = self._last
+        if last:
+            self._logger.info('Search finished: depth %s, nodes %s, '
+                              'nps %s, dropped %s info lines', last.depth,
+                              last.nodes, last.nps, self._dropped)
+
+    async def wait(self) -> str:
+        """Waits for the end of search, skipping remaining info lines
+
+        Returns:
+            str: Best move in a long algebraic notation
+        """
+        while not self._finished:
+            self._lines.clear()
+            self._event.clear()
+            await self._event.wait()
+        self._lines.clear()
+        return self._best_move
+
+    def __aiter__(self) -> 'InfoStream':
+        return self
+
+    async def __anext__(self) -> InfoLine:
+        while not self._lines:
+            if self._finished:
+                raise StopAsyncIteration
+            self._event.clear()
+            await self._event.wait()
+        return self._lines.popleft()
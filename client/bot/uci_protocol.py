@@ -1,14 +1,29 @@
 """Module with UCI protocol implementation"""
-from typing import Optional
+from typing import Optional, List, Dict
 import asyncio
 import logging
 
+from bot.uci_info import InfoLine, InfoStream, parse_info
+from bot.engine_cache import EngineCache, CachedResult, FULL_STRENGTH
+from game.model.headless_board import HeadlessBoard
+from utils.line_buffer import LineBuffer
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+DEADLINE_MARGIN = 0.2
+STOP_GRACE = 0.1
+STALE_TIMEOUT = 1.0
+
 
 class InvalidUCIEngineError(Exception):
     """Error that raises when invalid or\
         incompatible with UCI protocol engine was passed"""
 
 
+class NoLegalMovesError(Exception):
+    """Error that raises when engine missed the deadline\
+        in a position without legal moves"""
+
+
 class UCIProtocol(asyncio.SubprocessProtocol):
     """Cheap implementation of UCI protocol"""
 
@@ -17,36 +32,177 @@ class UCIProtocol(asyncio.SubprocessProtocol):
         self._response = asyncio.Queue()
         self._logger = logging.getLogger('uci')
         self._buffer = {
-            1: bytearray(),
-            2: bytearray()
+            1: LineBuffer(),
+            2: LineBuffer()
+        }
+        self._ponder_move: Optional[str] = None
+        self._pondering: Optional[str] = None
+        self._search: Optional[InfoStream] = None
+        self._start_fen: Optional[str] = None
+        self._moves: List[str] = []
+        self._board: Optional[HeadlessBoard] = None
+        self._skill_level = 20
+        self._limit_strength = False
+        self._elo: Optional[int] = None
+        self._chess960 = False
+        self.cache: Optional[EngineCache] = None
+        self._stale = 0
+        self._drained: Optional[asyncio.Future] = None
+        self.metrics: Dict[str, int] = {
+            'searches': 0,
+            'deadline_stops': 0,
+            'deadline_fallbacks': 0
         }
 
     def connection_made(self, transport: asyncio.BaseTransport) -> None:
         self._transport = transport
 
     def pipe_data_received(self, fd: int, data: bytes) -> None:
-        self._buffer[fd].extend(data)
-        while b'\n' in self._buffer[fd]:
-            line_bytes, self._buffer[fd] = self._buffer[fd].split(b'\n', 1)
-            if line_bytes.endswith(b'\r'):
-                line_bytes = line_bytes[:-1]
-            line = line_bytes.decode()
-
-            if fd == 1:
-                self._line_received(line)
-            else:
-                self._error_line_received(line)
+        if fd == 1:
+            self._buffer[fd].feed(data, self._stdout_line_received)
+        else:
+            self._buffer[fd].feed(data, self._stderr_line_received)
+
+    def _stdout_line_received(self, line: memoryview) -> None:
+        if line[:5] == b'info ' and (not self._search or self._stale):
+            return
+        self._line_received(str(line, 'utf-8'))
+
+    def _stderr_line_received(self, line: memoryview) -> None:
+        self._error_line_received(str(line, 'utf-8'))
 
     def _line_received(self, line: str) -> None:
         self._logger.info('stdout >> %s', line)
         if line in ('uciok', 'readyok'):
             self._response.put_nowait(line)
+        if line.startswith('info') and self._search and not self._stale:
+            self._search.put(parse_info(line))
         if line.startswith('bestmove'):
-            self._response.put_nowait(line.split(' ')[1])
+            if self._stale:
+                self._discard_best_move(line)
+                return
+            tokens = line.split(' ')
+            self._ponder_move = None
+            if len(tokens) >= 4 and tokens[2] == 'ponder':
+                self._ponder_move = tokens[3]
+            if self._search:
+                self._search.finish(tokens[1], self._ponder_move)
+                self._search = None
 
     def _error_line_received(self, line: str) -> None:
         self._logger.error('stderr >> %s', line)
 
+    def _send_position(self, fen: Optional[str],
+                       ponder_move: Optional[str] = None) -> None:
+        moves = []
+        if fen:
+            position = f'fen {fen}'
+        elif self._start_fen == START_FEN:
+            position = 'startpos'
+            moves = self._moves
+        else:
+            position = f'fen {self._start_fen}'
+            moves = self._moves
+        if ponder_move:
+            moves = moves + [ponder_move]
+
+        if moves:
+            moves_line = ' '.join(moves)
+            self._send_line(f'position {position} moves {moves_line}')
+        else:
+            self._send_line(f'position {position}')
+
+    def _send_go(self, limit: Optional[int],
+                 clock: Optional[Dict[str, int]] = None,
+                 ponder: bool = False) -> None:
+        go = 'go ponder' if ponder else 'go'
+        if clock:
+            params = ' '.join(f'{name} {value}'
+                              for name, value in clock.items())
+            self._send_line(f'{go} {params}')
+        elif limit is None:
+            self._send_line(f'{go} infinite')
+        else:
+            self._send_line(f'{go} movetime {int(limit * 1000)}')
+
+    async def _wait_best_move(self, stream: InfoStream, fen: Optional[str],
+                              deadline: float) -> str:
+        self.metrics['searches'] += 1
+        try:
+            return await asyncio.wait_for(stream.wait(), deadline)
+        except TimeoutError:
+            self.metrics['deadline_stops'] += 1
+            self._send_line('stop')
+
+        try:
+            return await asyncio.wait_for(stream.wait(), STOP_GRACE)
+        except TimeoutError:
+            self.metrics['deadline_fallbacks'] += 1
+            self._abandon(stream)
+
+        pv = stream.pv
+        if pv:
+            move = pv[0]
+            self._ponder_move = pv[1] if len(pv) > 1 else None
+        else:
+            board = HeadlessBoard(self._current_fen(fen), self._chess960)
+            legal_moves = board.legal_moves()
+            if not legal_moves:
+                raise NoLegalMovesError('Engine missed deadline '
+                                        'in a position without legal moves')
+            move = board.to_uci(legal_moves[0])
+            self._ponder_move = None
+        self._logger.warning('Engine missed deadline, fallback move: %s',
+                             move)
+        return move
+
+    def _abandon(self, stream: InfoStream) -> None:
+        if self._search is stream:
+            self._search = None
+            self._stale += 1
+
+    def _discard_best_move(self, line: str) -> None:
+        self._stale -= 1
+        self._logger.warning('Discarded late best move: %s', line)
+        if not self._stale and self._drained:
+            if not self._drained.done():
+                self._drained.set_result(None)
+            self._drained = None
+
+    async def _wait_drained(self) -> None:
+        if not self._stale:
+            return
+        if not self._drained:
+            self._drained = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._drained),
+                                   STALE_TIMEOUT)
+        except TimeoutError:
+            self._logger.error('Engine did not send %s late best moves',
+                               self._stale)
+
+    def _current_fen(self, fen: Optional[str]) -> str:
+        if fen:
+            return fen
+        if not self._board:
+            self._board = HeadlessBoard(self._start_fen or START_FEN,
+                                        self._chess960)
+            for move in self._moves:
+                self._board.push_uci(move)
+        return self._board.fen()
+
+    def _history(self, fen: Optional[str]) -> str:
+        if fen:
+            return ''
+        self._current_fen(fen)
+        start = max(len(self._moves) - self._board.halfmove_clock, 0)
+        return ' '.join(self._moves[start:])
+
+    def _strength(self) -> str:
+        if not self._limit_strength:
+            return FULL_STRENGTH
+        return f'elo {self._elo}' if self._elo else 'limited'
+
     def _send_line(self, line: str) -> None:
         stdin = self._transport.get_pipe_transport(0)
         stdin.write((line + '\n').encode())
@@ -60,6 +216,25 @@ class UCIProtocol(asyncio.SubprocessProtocol):
         except TimeoutError:
             return "error: time limit exceeded"
 
+    @property
+    def ponder_move(self) -> Optional[str]:
+        """Property that contains opponent's reply expected by engine\
+            after its last best move
+
+        Returns:
+            Optional[str]: Expected reply if engine sent it, None otherwise
+        """
+        return self._ponder_move
+
+    @property
+    def pondering(self) -> Optional[str]:
+        """Property that contains move that engine is pondering on
+
+        Returns:
+            Optional[str]: Pondered move if engine ponders, None otherwise
+        """
+        return self._pondering
+
     async def uci(self) -> None:
         """Tells engine to work in UCI mode"""
         self._send_line('uci')
@@ -72,13 +247,92 @@ class UCIProtocol(asyncio.SubprocessProtocol):
         response = await self._get_response()
         assert response == 'readyok'
 
-    def limit_strength(self) -> None:
-        """Allows engine to limit its strength"""
-        self._send_line('setoption name UCI_LimitStrength value true')
+    @property
+    def moves(self) -> List[str]:
+        """Property that contains moves of the current game
+
+        Returns:
+            List[str]: Moves in a long algebraic notation
+        """
+        return self._moves
+
+    def new_game(self, fen: Optional[str] = None) -> None:
+        """Tells engine that the next search will be from a different game
+
+        Args:
+            fen (Optional[str]): Starting position of the game in FEN\
+                notation. If passed, protocol keeps the game's moves and\
+                    searches can be started without FEN. Defaults to None
+        """
+        self._send_line('ucinewgame')
+        self._start_fen = fen
+        self._moves = []
+        self._board = None
+
+    def push_move(self, move: str) -> None:
+        """Adds move to the current game
+
+        Args:
+            move (str): Move in a long algebraic notation
+        """
+        self._moves.append(move)
+        if self._board:
+            self._board.push_uci(move)
+
+    def set_option(self, name: str, value: str | int | bool) -> None:
+        """Sets engine's option
+
+        Args:
+            name (str): Name of an option
+            value (str | int | bool): Value of an option
+        """
+        if isinstance(value, bool):
+            value = str(value).lower()
+        self._send_line(f'setoption name {name} value {value}')
+
+    def limit_strength(self, state: bool = True) -> None:
+        """Allows engine to limit its strength
+
+        Args:
+            state (bool): Whether to limit strength. Defaults to True
+        """
+        self.set_option('UCI_LimitStrength', state)
+        self._limit_strength = state
+
+    def set_elo(self, elo: int) -> None:
+        """Sets Elo rating engine plays at if it limits its strength
+
+        Args:
+            elo (int): Elo rating
+        """
+        self.set_option('UCI_Elo', elo)
+        self._elo = elo
+
+    def fisher_random(self, state: bool = True) -> None:
+        """Tells engine to play in Fisher random mode
 
-    def fisher_random(self) -> None:
-        """Tells engine to play in Fisher random mode"""
-        self._send_line('setoption name UCI_Chess960 value true')
+        Args:
+            state (bool): Whether to play Fisher random. Defaults to True
+        """
+        self.set_option('UCI_Chess960', state)
+        self._chess960 = state
+        self._board = None
+
+    def set_ponder(self, state: bool = True) -> None:
+        """Tells engine whether it will be asked to ponder
+
+        Args:
+            state (bool): Whether to ponder. Defaults to True
+        """
+        self.set_option('Ponder', state)
+
+    def set_multipv(self, count: int = 1) -> None:
+        """Sets number of principal variations engine searches
+
+        Args:
+            count (int): Number of variations. Defaults to 1
+        """
+        self.set_option('MultiPV', count)
 
     def set_skill_level(self, difficulty: int = 20) -> None:
         """Sets skill level of an engine. Ranges from 0 to 20
@@ -86,18 +340,164 @@ class UCIProtocol(asyncio.SubprocessProtocol):
         Args:
             difficulty (int): Skill level. Defaults to 20
         """
-        self._send_line(f'setoption name Skill Level value {difficulty}')
+        self.set_option('Skill Level', difficulty)
+        self._skill_level = difficulty
+
+    def search(self, fen: Optional[str], limit: Optional[int] = None,
+               maxsize: int = 16,
+               clock: Optional[Dict[str, int]] = None) -> InfoStream:
+        """Starts search and streams engine's info lines
+
+        Args:
+            fen (Optional[str]): Current position in FEN notation.\
+                Position of the current game is used if None
+            limit (Optional[int]): Limit of search time in seconds.\
+                Searches until stop if None. Defaults to None
+            maxsize (int): Number of info lines kept for a slow consumer.\
+                Defaults to 16
+            clock (Optional[Dict[str, int]]): Parameters of go command\
+                in milliseconds. Engine manages its time if passed.\
+                    Defaults to None
+
+        Returns:
+            InfoStream: Async iterator over info lines of the search
+        """
+        self._search = InfoStream(maxsize)
+        self._send_position(fen)
+        self._send_go(limit, clock)
+        return self._search
+
+    def stop(self) -> None:
+        """Tells engine to stop searching as soon as possible"""
+        self._send_line('stop')
+
+    async def get_best_move(self, fen: Optional[str], limit: int = 1,
+                            clock: Optional[Dict[str, int]] = None) -> str:
+        """Gets engine's best move in the position. Result is looked up\
+            in the cache first if protocol has one and clock is not passed.\
+                Limited strength results are cached only if cache allows it.\
+                    If engine misses the deadline, it is told to stop and\
+                        the first move of its last pv is returned
+
+        Args:
+            fen (Optional[str]): Current position in FEN notation.\
+                Position of the current game is used if None
+            limit (int): Limit of search time in seconds. If clock is\
+                passed, it is only used as a deadline. Defaults to 1
+            clock (Optional[Dict[str, int]]): Parameters of go command\
+                (wtime, btime, winc, binc, movestogo) in milliseconds.\
+                    Engine manages its time if passed. Defaults to None
+
+        Raises:
+            NoLegalMovesError: If engine missed the deadline\
+                and position has no legal moves
+
+        Returns:
+            str: Best move in a long algebraic notation
+        """
+        key = None
+        limited = self._limit_strength or self._skill_level < 20
+        if self.cache and not clock and\
+                (not limited or self.cache.limited_strength):
+            key = (self._current_fen(fen), self._skill_level, limit,
+                   self._chess960, self._strength(), self._history(fen))
+            cached = await asyncio.to_thread(self.cache.get, *key)
+            if cached:
+                self._ponder_move = cached.ponder_move
+                return cached.best_move
 
-    async def get_best_move(self, fen: str, limit: int = 1) -> str:
-        """Gets engine's best move in the position
+        stream = self.search(fen, limit, clock=clock)
+        deadline = limit if clock else limit + DEADLINE_MARGIN
+        move = await self._wait_best_move(stream, fen, deadline)
+        if key and stream.finished:
+            await asyncio.to_thread(self.cache.put, *key,
+                                    CachedResult(move, self._ponder_move))
+        return move
+
+    async def get_top_moves(self, fen: Optional[str], count: int,
+                            limit: int = 1) -> List[InfoLine]:
+        """Gets engine's best moves in the position with one MultiPV search.\
+            MultiPV is restored only after engine has stopped searching
 
         Args:
-            fen (str): Current position in FEN notation
+            fen (Optional[str]): Current position in FEN notation.\
+                Position of the current game is used if None
+            count (int): Number of moves
             limit (int): Limit of search time in seconds. Defaults to 1
 
+        Raises:
+            NoLegalMovesError: If engine missed the deadline\
+                and position has no legal moves
+
+        Returns:
+            List[InfoLine]: Info lines of principal variations sorted\
+                by score, best first. Move is the first move of a pv
+        """
+        self.set_multipv(count)
+        stream = self.search(fen, limit)
+        try:
+            await self._wait_best_move(stream, fen, limit + DEADLINE_MARGIN)
+        finally:
+            await self.stop_search()
+            await self._wait_drained()
+            self.set_multipv()
+        return stream.variations[:count]
+
+    def start_ponder(self, fen: Optional[str], move: str, limit: int = 1,
+                     clock: Optional[Dict[str, int]] = None) -> None:
+        """Starts search on opponent's time, assuming opponent's reply
+
+        Args:
+            fen (Optional[str]): Current position in FEN notation.\
+                Position of the current game is used if None
+            move (str): Expected opponent's reply in a long algebraic notation
+            limit (int): Limit of search time in seconds after ponderhit.\
+                Defaults to 1
+            clock (Optional[Dict[str, int]]): Parameters of go command\
+                in milliseconds. Defaults to None
+        """
+        self._search = InfoStream()
+        self._send_position(fen, move)
+        self._send_go(limit, clock, ponder=True)
+        self._pondering = move
+
+    async def ponderhit(self, limit: int = 1,
+                        clock: Optional[Dict[str, int]] = None) -> str:
+        """Tells engine that opponent played the pondered move
+
+        Args:
+            limit (int): Limit of search time in seconds. If clock is\
+                passed, it is only used as a deadline. Defaults to 1
+            clock (Optional[Dict[str, int]]): Parameters of go command\
+                the pondering was started with. Defaults to None
+
+        Raises:
+            NoLegalMovesError: If engine missed the deadline\
+                and position has no legal moves
+
         Returns:
             str: Best move in a long algebraic notation
         """
-        self._send_line(f'position fen {fen}')
-        self._send_line(f'go movetime {int(limit * 1000)}')
-        return await self._get_response(timeout=limit + 1)
+        stream = self._search
+        self._pondering = None
+        self._send_line('ponderhit')
+        deadline = limit if clock else limit + DEADLINE_MARGIN
+        return await self._wait_best_move(stream, None, deadline)
+
+    async def stop_search(self) -> None:
+        """Stops current search and waits for its best move, so that\
+            the next search starts from a clean state. Does nothing\
+                if engine is not searching"""
+        stream = self._search
+        if not stream:
+            return
+        self._send_line('stop')
+        try:
+            await asyncio.wait_for(stream.wait(), STOP_GRACE)
+        except TimeoutError:
+            self._abandon(stream)
+
+    async def stop_ponder(self) -> None:
+        """Stops search on opponent's time and discards its result"""
+        self._pondering = None
+        await self.stop_search()
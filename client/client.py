@@ -1,20 +1,38 @@
 """Module with chess game's client implementation"""
-from typing import Tuple
+from typing import Optional, Tuple, Dict, List
+import itertools
 import asyncio
 import logging
 import socket
-import json
 
+from utils.framing import FrameReader, FrameTooLargeError, write_frames, \
+    MAX_FRAME_SIZE
+from utils.codec import CODECS
 
-class ChessClient:
-    """Class that describes chess game's client"""
 
-    def __init__(self, address: Tuple[str, int], recv_size: int) -> None:
+class ChessClient:
+    """Class that describes chess game's client. Responses are matched\
+        with queries by id, so several queries can be pipelined.\
+            Messages that are not responses, e.g. match of the game,\
+                are put in events queue.\
+                    Encoding is negotiated with the server on connect"""
+
+    def __init__(self, address: Tuple[str, int], recv_size: int,
+                 max_frame_size: int = MAX_FRAME_SIZE,
+                 encoding: str = 'json') -> None:
         self._host, self._port = address
         self._recv_size = recv_size
+        self._max_frame_size = max_frame_size
+        self._encoding = encoding
+        self._codec = CODECS['json']
+        self._frames: Optional[FrameReader] = None
         self._logger = logging.getLogger('client')
         self._reader, self._writer = None, None
         self._connected = False
+        self._listener: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._query_ids = itertools.count(1)
+        self.events: asyncio.Queue[dict] = asyncio.Queue()
 
     @property
     def address(self) -> Tuple[str, int]:
@@ -34,6 +52,15 @@ class ChessClient:
         """
         return self._connected
 
+    @property
+    def encoding(self) -> str:
+        """Property that contains encoding used with the server
+
+        Returns:
+            str: 'json' or 'binary'
+        """
+        return self._codec.name
+
     async def connect(self) -> None:
         """Connects client to the server"""
         if self._writer:
@@ -45,6 +72,12 @@ class ChessClient:
                 *self.address)
             self._logger.info('Connected to the server')
             self._connected = True
+            self._codec = CODECS['json']
+            self._frames = FrameReader(self._reader, self._max_frame_size,
+                                       self._recv_size)
+            if self._encoding != self._codec.name:
+                await self._negotiate()
+            self._listener = asyncio.create_task(self._listen())
         except (ConnectionRefusedError, socket.gaierror):
             self._logger.error('Could not connect to the server')
 
@@ -55,13 +88,17 @@ class ChessClient:
 
         try:
             self._logger.info('Disconnecting from the server...')
+            if self._listener:
+                self._listener.cancel()
             self._writer.close()
             await self._writer.wait_closed()
             self._logger.info('Disconnected from the server')
         except ConnectionError:
             self._logger.error('Connection is already closed')
         finally:
+            self._fail_pending(ConnectionError('Disconnected'))
             self._reader, self._writer = None, None
+            self._frames, self._listener = None, None
             self._connected = False
 
     async def fetch(self, query: dict) -> dict:
@@ -73,20 +110,96 @@ class ChessClient:
         Returns:
             dict: Response from the server
         """
+        return (await self.fetch_many([query]))[0]
+
+    async def fetch_many(self, queries: List[dict]) -> List[dict]:
+        """Sends several queries with one write and drain\
+            and waits for all responses
+
+        Args:
+            queries (List[dict]): Queries
+
+        Returns:
+            List[dict]: Responses in order of queries
+        """
         if not self._writer:
             raise ConnectionError('Connection is not established yet')
 
+        loop = asyncio.get_running_loop()
+        futures = []
+        payloads = []
+        for query in queries:
+            query_id = next(self._query_ids)
+            future = loop.create_future()
+            self._pending[query_id] = future
+            futures.append(future)
+            payloads.append(self._codec.encode({**query, 'id': query_id}))
+
         try:
-            self._writer.write(json.dumps(query).encode())
+            write_frames(self._writer, payloads)
             await self._writer.drain()
-            self._logger.info('Sent query to the server')
+            self._logger.debug('Sent %s queries to the server', len(queries))
+            return list(await asyncio.gather(*futures))
+        except ConnectionError as exc:
+            self._logger.exception('Fetch failed: %s', exc)
+            return [{"error": str(exc)} for _ in queries]
 
-            response = await self._reader.read(self._recv_size)
-            if not response:
-                raise ConnectionError('Lost connection')
-            self._logger.info('Received response from the server')
+    async def resume(self, token: str, index: int) -> dict:
+        """Reconnects to the server if connection was lost\
+            and resumes a game
 
-            return json.loads(response)
-        except (ConnectionError, json.JSONDecodeError) as exc:
-            self._logger.exception('Fetch failed: %s', exc)
-            return json.loads({"error": exc})
+        Args:
+            token (str): Session token from the match event
+            index (int): Number of game's moves that client has seen
+
+        Returns:
+            dict: Response with moves that client has missed
+        """
+        if self._writer and not self._connected:
+            await self.disconnect()
+        if not self._writer:
+            await self.connect()
+        return await self.fetch({'method': 'resume',
+                                 'body': {'token': token, 'index': index}})
+
+    async def _negotiate(self) -> None:
+        hello = {'method': 'hello', 'body': {'encoding': self._encoding}}
+        write_frames(self._writer, [self._codec.encode(hello)])
+        await self._writer.drain()
+        response = self._codec.decode((await self._frames.read())[0])
+        if response.get('data') == self._encoding:
+            self._codec = CODECS[self._encoding]
+            self._logger.info('Using %s encoding', self._encoding)
+        else:
+            self._logger.error('Server refused %s encoding: %s',
+                               self._encoding, response.get('error'))
+
+    async def _listen(self) -> None:
+        try:
+            while True:
+                for payload in await self._frames.read():
+                    self._dispatch(payload)
+        except (ConnectionError, FrameTooLargeError) as exc:
+            self._logger.error('Lost connection: %s', exc)
+            self._connected = False
+            self._fail_pending(ConnectionError(str(exc)))
+
+    def _dispatch(self, payload: bytes) -> None:
+        try:
+            message = self._codec.decode(payload)
+        except ValueError:
+            self._logger.error('Invalid message from the server')
+            return
+
+        future = self._pending.pop(message.pop('id', None), None)
+        if future:
+            if not future.done():
+                future.set_result(message)
+        else:
+            self.events.put_nowait(message)
+
+    def _fail_pending(self, exc: ConnectionError) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+        self._pending.clear()
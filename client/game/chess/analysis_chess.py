@@ -0,0 +1,141 @@
+"""Module that describes analysis board's instance"""
+from typing import Optional, Tuple, List, override
+import asyncio
+import logging
+import statistics
+import time
+
+import pygame
+
+from game.model.pieces.piece import PieceColor
+from game.chess.chess import BOARD_SIZE, PLAY_FIELD_SIZE, FILES_SIZE, \
+    FONT_SIZE, TEXT_COLOR
+from game.chess.local_chess import LocalChess
+from bot.uci_protocol import UCIProtocol
+from bot.uci_info import InfoLine, InfoStream
+from bot.engine_pool import EnginePool
+from utils.uci_move import to_uci
+
+EVAL_BAR_WIDTH = 24
+EVAL_BAR_MARGIN = 12
+EVAL_BAR_WHITE = (240, 240, 240)
+EVAL_BAR_BLACK = (40, 40, 40)
+PV_LENGTH = 8
+
+
+class AnalysisChess(LocalChess):
+    """Class for analysis board, where engine analyses\
+        the current position until a move is made"""
+
+    def __init__(self, screen: pygame.Surface, fen: str,
+                 pool: EnginePool) -> None:
+        super().__init__(screen, fen)
+        self.fen = fen
+        self.pool = pool
+        self.protocol: UCIProtocol = None
+        self.restart_times: List[float] = []
+        self._stream: Optional[InfoStream] = None
+        self._stream_white_to_move = True
+        self._position_changed = asyncio.Event()
+        self._logger = logging.getLogger('analysis_chess')
+
+    async def mainloop(self) -> None:
+        """Starts game's main loop"""
+        self.running = True
+        fisher = 'K' not in self.board.castle_rights[self.color]
+
+        async with self.pool.lease(fisher=fisher, fen=self.fen,
+                                   limit_strength=False) as protocol:
+            self.protocol = protocol
+            self._position_changed.set()
+            analysis = asyncio.create_task(self._analyse())
+            while self.running:
+                self._handle_input()
+                self._draw()
+                self._game_logic()
+                await asyncio.sleep(0)
+                self.clock.tick(60)
+
+            analysis.cancel()
+            await asyncio.gather(analysis, return_exceptions=True)
+            await protocol.stop_search()
+        self.protocol = None
+
+        if self.restart_times:
+            self._logger.info('Analysis restarts: %s, median %.1f ms, '
+                              'max %.1f ms', len(self.restart_times),
+                              statistics.median(self.restart_times) * 1000,
+                              max(self.restart_times) * 1000)
+
+    async def _analyse(self) -> None:
+        while True:
+            await self._position_changed.wait()
+            self._position_changed.clear()
+
+            start = time.perf_counter()
+            await self.protocol.stop_search()
+            self._stream = None
+            if self.game_over:
+                continue
+            self._stream_white_to_move = self.board.turn == PieceColor.WHITE
+            self._stream = self.protocol.search(None)
+            self.restart_times.append(time.perf_counter() - start)
+
+    @override
+    def _make_move(self, current_position: Tuple[int, int],
+                   new_position: Tuple[int, int],
+                   promote_str: Optional[str] = None) -> None:
+        super()._make_move(current_position, new_position, promote_str)
+        self.protocol.push_move(to_uci(current_position, new_position,
+                                       promote_str))
+        self._position_changed.set()
+
+    @override
+    def _draw_panels(self) -> None:
+        info = self._stream.last if self._stream else None
+        if not info:
+            return
+        self._draw_eval_bar(info)
+        self._draw_pv(info)
+
+    def _draw_eval_bar(self, info: InfoLine) -> None:
+        width, height = self.screen.get_size()
+        left = (width - BOARD_SIZE) // 2 - EVAL_BAR_MARGIN - EVAL_BAR_WIDTH
+        top = (height - BOARD_SIZE) // 2 + FILES_SIZE
+
+        white_share = self._white_share(info)
+        bottom_share = white_share if self.color == PieceColor.WHITE\
+            else 1 - white_share
+        bottom_height = int(PLAY_FIELD_SIZE * bottom_share)
+        bottom_color, top_color = (EVAL_BAR_WHITE, EVAL_BAR_BLACK)\
+            if self.color == PieceColor.WHITE\
+            else (EVAL_BAR_BLACK, EVAL_BAR_WHITE)
+
+        pygame.draw.rect(self.screen, top_color,
+                         (left, top, EVAL_BAR_WIDTH, PLAY_FIELD_SIZE))
+        pygame.draw.rect(self.screen, bottom_color,
+                         (left, top + PLAY_FIELD_SIZE - bottom_height,
+                          EVAL_BAR_WIDTH, bottom_height))
+
+    def _draw_pv(self, info: InfoLine) -> None:
+        width, height = self.screen.get_size()
+        font = pygame.font.Font(pygame.font.get_default_font(), FONT_SIZE)
+        pv = ' '.join(info.pv[:PV_LENGTH])
+        text = font.render(f'{self._score_text(info)}  depth {info.depth}'
+                           f'  {pv}', 1, TEXT_COLOR)
+        rect = text.get_rect(midtop=(width // 2,
+                                     (height + BOARD_SIZE) // 2 + 4))
+        self.screen.blit(text, rect)
+
+    def _white_share(self, info: InfoLine) -> float:
+        sign = 1 if self._stream_white_to_move else -1
+        if info.score_mate is not None:
+            return 1.0 if info.score_mate * sign > 0 else 0.0
+        score = (info.score_cp or 0) * sign
+        return 1 / (1 + 10 ** (-score / 400))
+
+    def _score_text(self, info: InfoLine) -> str:
+        sign = 1 if self._stream_white_to_move else -1
+        if info.score_mate is not None:
+            return f'#{info.score_mate * sign}'
+        return f'{(info.score_cp or 0) * sign / 100:+.2f}'
@@ -1,65 +1,114 @@
 """Module that describes bot chess game's instance"""
+from typing import Optional, Tuple, Dict, override
 import asyncio
+import logging
 
 import pygame
 
 from game.model.pieces.piece import PieceColor
 from game.chess.chess import Chess
 from bot.uci_protocol import UCIProtocol
-from utils.popen_uci import popen_uci
+from bot.engine_pool import EnginePool
+from utils.uci_move import to_uci, from_uci
+from utils.frame_stats import FrameStats
+
+MOVE_TIME = 0.5
+DEADLINE_FACTOR = 3
+MOVE_OVERHEAD = 0.05
 
 
 class BotChess(Chess):
     """Class for bot chess game's instance"""
 
     def __init__(self, screen: pygame.Surface, color: PieceColor,
-                 fen: str, engine: str, difficulty: int) -> None:
-        super().__init__(screen, color, fen)
-        self.engine = engine
-        self.transport: asyncio.SubprocessTransport = None
+                 fen: str, pool: EnginePool, difficulty: int,
+                 time_control: Optional[Tuple[float, float]] = None) -> None:
+        super().__init__(screen, color, fen, time_control)
+        self.fen = fen
+        self.pool = pool
         self.protocol: UCIProtocol = None
         self.difficulty = difficulty
+        self.frame_stats = FrameStats()
+        self._bot_task: Optional[asyncio.Task] = None
+        self._logger = logging.getLogger('bot_chess')
 
     async def mainloop(self) -> None:
         """Starts game's main loop"""
         self.running = True
+        fisher = 'K' not in self.board.castle_rights[self.color]
+
+        async with self.pool.lease(self.difficulty, fisher, ponder=True,
+                                   fen=self.fen) as protocol:
+            self.protocol = protocol
+            while self.running:
+                self._handle_input()
+                self._draw()
+                self._game_logic()
+                await asyncio.sleep(0)
+                self.frame_stats.add(self.clock.tick(60))
 
-        while self.running:
-            self._handle_input()
-            self._draw()
-            await self._game_logic()
-            self.clock.tick(60)
-        self.transport.close()
-
-    async def _game_logic(self) -> None:
-        if not self.transport:
-            self.transport, self.protocol = await popen_uci(self.engine)
-            self.protocol.limit_strength()
-            self.protocol.set_skill_level(self.difficulty)
-            fisher = 'K' not in self.board.castle_rights[self.color]
-            if fisher:
-                self.protocol.fisher_random()
+            if self._bot_task:
+                self._bot_task.cancel()
+                await asyncio.gather(self._bot_task, return_exceptions=True)
+                self._bot_task = None
+            await protocol.stop_search()
+            if protocol.pondering:
+                await protocol.stop_ponder()
+        self.protocol = None
+        self._logger.info('Frame times: %s', self.frame_stats.summary())
 
+    def _game_logic(self) -> None:
         self._check_game_over()
-        if self.game_over:
+        if self.game_over or self.color == self.board.turn:
+            return
+
+        if not self._bot_task:
+            self._bot_task = asyncio.create_task(self._get_bot_move())
             return
+        if not self._bot_task.done():
+            return
+
+        task, self._bot_task = self._bot_task, None
+        error = task.exception()
+        if error:
+            self._logger.error('Bot failed to find a move: %s', error)
+            self.game_over = True
+            self.game_over_info = 'Game aborted: engine error'
+            return
+        move = task.result()
+        cur_pos, new_pos, promote = from_uci(move)
+        self._make_move(cur_pos, new_pos, promote)
 
-        if self.color != self.board.turn:
-            fen = str(self.board)
-            move = await self.protocol.get_best_move(fen, 0.5)
+        self._check_game_over()
+        ponder_move = self.protocol.ponder_move
+        if ponder_move and not self.game_over:
+            limit, clock = self._search_limits()
+            self.protocol.start_ponder(None, ponder_move, limit, clock)
 
-            promote = None
-            if len(move) == 5:
-                promote = move[-1]
-            cur_pos_file, cur_pos_rank = move[0], move[1]
-            new_pos_file, new_pos_rank = move[2], move[3]
+    async def _get_bot_move(self) -> str:
+        limit, clock = self._search_limits()
+        pondering = self.protocol.pondering
+        if pondering and self.move_to_send:
+            if to_uci(*self.move_to_send) == pondering:
+                return await self.protocol.ponderhit(limit, clock)
+            await self.protocol.stop_ponder()
 
-            cur_pos_rank = 8 - int(cur_pos_rank)
-            new_pos_rank = 8 - int(new_pos_rank)
+        return await self.protocol.get_best_move(None, limit, clock)
 
-            cur_pos_file = ord(cur_pos_file) - ord('a')
-            new_pos_file = ord(new_pos_file) - ord('a')
+    def _search_limits(self) -> Tuple[float, Optional[Dict[str, int]]]:
+        if not self.game_clock:
+            return MOVE_TIME, None
+        bot_color = PieceColor(1 - self.color.value)
+        full_moves = self.board.moves_count['full']
+        budget = self.game_clock.budget(bot_color, full_moves)
+        remaining = self.game_clock.remaining(bot_color)
+        deadline = min(budget * DEADLINE_FACTOR, remaining - MOVE_OVERHEAD)
+        return max(deadline, budget), self.game_clock.uci_params()
 
-            cur_pos = cur_pos_file, cur_pos_rank
-            new_pos = new_pos_file, new_pos_rank
-            self._make_move(cur_pos, new_pos, promote)
+    @override
+    def _make_move(self, current_position: Tuple[int, int],
+                   new_position: Tuple[int, int],
+                   promote_str: Optional[str] = None) -> None:
+        super()._make_move(current_position, new_position, promote_str)
+        self.protocol.push_move(to_uci(current_position, new_position,
+                                       promote_str))
@@ -6,6 +6,7 @@ import sys
 import pygame
 
 from game.model.board import Board
+from game.model.game_clock import GameClock
 from game.model.pointer import Pointer
 from game.model.pieces.piece import Piece, PieceColor, CELL_SIZE
 from game.model.pieces.pawn import Pawn
@@ -39,15 +40,21 @@ BOARD_SIZE = FILES_SIZE * 2 + PLAY_FIELD_SIZE
 INACTIVE_BOARD_COLOR = (100, 100, 100, 75)
 PROMOTE_BOX_COLOR = (154, 205, 50, 150)
 MOVE_DOT_COLOR = (0, 0, 0, 50)
+CLOCK_FONT_SIZE = 28
+CLOCK_COLOR = (50, 50, 50)
+CLOCK_ACTIVE_COLOR = (255, 255, 255)
 
 
 class Chess(ABC):
     """Abstract class for chess game's instance"""
 
-    def __init__(self, screen: pygame.Surface,
-                 color: PieceColor, fen: str) -> None:
+    def __init__(self, screen: pygame.Surface, color: PieceColor, fen: str,
+                 time_control: Optional[Tuple[float, float]] = None) -> None:
         self.color = color
         self.board = Board(fen)
+        self.game_clock: Optional[GameClock] = None
+        if time_control:
+            self.game_clock = GameClock(*time_control)
         self.clock = pygame.time.Clock()
         self.screen = screen
         self.running = False
@@ -66,6 +73,8 @@ class Chess(ABC):
 
         self._set_initial_sprites()
         self.board.update_pieces_moves(self.board.turn)
+        if self.game_clock:
+            self.game_clock.start(self.board.turn)
         GAME_START.play()
 
     @abstractmethod
@@ -209,9 +218,9 @@ class Chess(ABC):
         if promote_piece:
             piece.kill()
             self.sprites.add(promote_piece)
-            self.board.pieces[current_position] = promote_piece
 
-        move = self.board.make_move(current_position, new_position)
+        move = self.board.make_move(current_position, new_position,
+                                    promote_piece)
         check = self.board.is_king_checked(PieceColor(1 - piece.color.value))
 
         if piece.color == self.color:
@@ -245,9 +254,21 @@ class Chess(ABC):
     def _change_turn(self) -> None:
         self.board.turn = PieceColor(1 - self.board.turn.value)
         self.board.update_pieces_moves(self.board.turn)
+        if self.game_clock:
+            self.game_clock.press()
 
     def _check_game_over(self) -> None:
         if self.game_over:
+            if self.game_clock:
+                self.game_clock.stop()
+            return
+
+        flagged = self.game_clock.flagged() if self.game_clock else None
+        if flagged:
+            self.game_over = True
+            winner = 'White' if flagged == PieceColor.BLACK else 'Black'
+            self.game_over_info = f'{winner} wins on time'
+            GAME_END.play()
             return
 
         color = self.board.turn
@@ -384,6 +405,9 @@ class Chess(ABC):
         self._set_sprites_coordinates()
         self.sprites.update()
         self.sprites.draw(self.screen)
+        if self.game_clock:
+            self._draw_clocks()
+        self._draw_panels()
         if self.picked_piece:
             self._draw_moves()
         if self.promote:
@@ -392,6 +416,9 @@ class Chess(ABC):
             self._draw_game_over()
         pygame.display.update()
 
+    def _draw_panels(self) -> None:
+        pass
+
     def _draw_board(self) -> None:
         board = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
         board.fill(BOARD_COLOR)
@@ -446,6 +473,26 @@ class Chess(ABC):
                                    cell.rect.center, CELL_SIZE // 7)
             self.screen.blit(surface, (0, 0))
 
+    def _draw_clocks(self) -> None:
+        width, height = self.screen.get_size()
+        font = pygame.font.Font(pygame.font.get_default_font(),
+                                CLOCK_FONT_SIZE)
+        right = (width + BOARD_SIZE) // 2
+        top = (height - BOARD_SIZE) // 2
+        bottom = (height + BOARD_SIZE) // 2
+        opponent = PieceColor(1 - self.color.value)
+
+        for color, y_coord in ((opponent, top - CLOCK_FONT_SIZE),
+                               (self.color, bottom + CLOCK_FONT_SIZE)):
+            minutes, seconds = divmod(self.game_clock.remaining(color), 60)
+            text = f'{int(minutes):02}:{seconds:04.1f}' if minutes < 1\
+                else f'{int(minutes):02}:{int(seconds):02}'
+            active = self.game_clock.running == color
+            clock = font.render(text, 1, CLOCK_ACTIVE_COLOR if active
+                                else CLOCK_COLOR)
+            rect = clock.get_rect(midright=(right, y_coord))
+            self.screen.blit(clock, rect)
+
     def _draw_promotion(self) -> None:
         width, height = self.screen.get_size()
         surface = pygame.Surface((CELL_SIZE * 8, CELL_SIZE * 8),
@@ -1,7 +1,8 @@
 """Module for chess game's menu screens"""
-from typing import Optional, Dict
+from typing import Optional, Tuple, Dict
 from abc import ABC, abstractmethod
 import asyncio
+import atexit
 import sys
 
 import pygame
@@ -16,9 +17,13 @@ import pygame_menu.widgets
 from game.model.pieces.piece import PieceColor, CELL_SIZE
 from game.chess.local_chess import LocalChess
 from game.chess.bot_chess import BotChess
+from game.chess.analysis_chess import AnalysisChess
+from bot.engine_pool import EnginePool
 # from game.chess.online_chess import OnlineChess
 from utils.get_position import get_classic_fen, get_fisher_fen
 
+TIME_CONTROLS = [('No clock', None), ('1+0', (60, 0)), ('3+2', (180, 2)),
+                 ('5+3', (300, 3)), ('10+5', (600, 5))]
 WHITE_KING = 'assets\\images\\white_king.png'
 BLACK_KING = 'assets\\images\\black_king.png'
 SELECT_SIDE_COLOR = (255, 255, 255, 255)
@@ -92,9 +97,9 @@ class MainMenu(Menu):
     """Class for main menu of the chess game"""
 
     def __init__(self, screen: pygame.Surface,
-                 server: Dict[str, str | int], engine: str) -> None:
+                 server: Dict[str, str | int], pool: EnginePool) -> None:
         super().__init__(screen, 'Chess')
-        self.select_mode_menu = SelectMode(self.screen, server, engine, self)
+        self.select_mode_menu = SelectMode(self.screen, server, pool, self)
 
     def select_mode(self) -> None:
         """Goes to the select game mode menu"""
@@ -111,10 +116,10 @@ class SelectMode(Menu):
     """Class for select game mode menu of the chess game"""
 
     def __init__(self, screen: pygame.Surface, server: Dict[str, str | int],
-                 engine: str, prev_menu: MainMenu) -> None:
+                 pool: EnginePool, prev_menu: MainMenu) -> None:
         super().__init__(screen, 'Select mode', prev_menu=prev_menu)
         self.fisher = False
-        self.bot_config_menu = BotConfig(self.screen, engine, self)
+        self.bot_config_menu = BotConfig(self.screen, pool, self)
         self.queue_menu = None
 
     def set_fisher(self, state: bool) -> None:
@@ -128,9 +133,18 @@ class SelectMode(Menu):
         chess.mainloop()
         self.resize()
 
+    def start_analysis(self) -> None:
+        """Starts analysis board"""
+        fen = get_fisher_fen() if self.fisher else get_classic_fen()
+        self.bot_config_menu.warm_up()
+        chess = AnalysisChess(self.screen, fen, self.bot_config_menu.pool)
+        self.bot_config_menu.loop.run_until_complete(chess.mainloop())
+        self.resize()
+
     def bot_config(self) -> None:
         """Goes to the bot config menu"""
         self.bot_config_menu.set_fisher(self.fisher)
+        self.bot_config_menu.warm_up()
         self.bot_config_menu.resize()
         self.bot_config_menu.mainloop()
 
@@ -143,6 +157,7 @@ class SelectMode(Menu):
         self.menu.add.button('Local', self.start_local_game, font_size=40)
         self.menu.add.button('Computer', self.bot_config, font_size=40)
         self.menu.add.button('Online', self.queue, font_size=40)
+        self.menu.add.button('Analysis', self.start_analysis, font_size=40)
         self.menu.add.button('Back', self.back)
         self.menu.add.toggle_switch('Fisher Random', onchange=self.set_fisher)
 
@@ -151,14 +166,17 @@ class BotConfig(Menu):
     """Class for bot config menu of the chess game"""
 
     def __init__(self, screen: pygame.Surface,
-                 engine: str, prev_menu: Menu) -> None:
+                 pool: EnginePool, prev_menu: Menu) -> None:
         self.white: pygame_menu.widgets.Image = None
         self.black: pygame_menu.widgets.Image = None
         self._bot_difficulty = 0
         self.color: PieceColor = None
+        self.time_control: Optional[Tuple[float, float]] = None
         super().__init__(screen, 'Bot config', prev_menu=prev_menu)
-        self.engine = engine
+        self.pool = pool
+        self.loop = asyncio.new_event_loop()
         self.fisher = False
+        atexit.register(self.close)
 
     @property
     def bot_difficulty(self) -> int:
@@ -177,13 +195,28 @@ class BotConfig(Menu):
         """Sets Fisher random mode"""
         self.fisher = state
 
+    def set_time_control(self, _: tuple,
+                         time_control: Optional[Tuple[float, float]]) -> None:
+        """Sets time control of a game"""
+        self.time_control = time_control
+
+    def warm_up(self) -> None:
+        """Starts engines of the pool if they are not started yet"""
+        self.loop.run_until_complete(self.pool.start())
+
+    def close(self) -> None:
+        """Closes engines of the pool and the event loop"""
+        if not self.loop.is_closed():
+            self.loop.run_until_complete(self.pool.close())
+            self.loop.close()
+
     def start_bot_game(self) -> None:
         """Starts bot game"""
         if self.color:
             fen = get_fisher_fen() if self.fisher else get_classic_fen()
-            chess = BotChess(self.screen, self.color, fen,
-                             self.engine, self.bot_difficulty)
-            asyncio.run(chess.mainloop())
+            chess = BotChess(self.screen, self.color, fen, self.pool,
+                             self.bot_difficulty, self.time_control)
+            self.loop.run_until_complete(chess.mainloop())
             self.resize()
 
     def set_color_white(self) -> None:
@@ -218,6 +251,9 @@ class BotConfig(Menu):
                                    range_text_value_enabled=False,
                                    onchange=self.bot_difficulty)\
             .translate(0, -75)
+        self.menu.add.selector('Time control', TIME_CONTROLS,
+                               onchange=self.set_time_control)\
+            .translate(0, -75)
         self.menu.add.button('Start Game', self.start_bot_game,
                              font_size=40).translate(0, -75)
         self.menu.add.button('Back', self.back).translate(0, -75)
@@ -1,5 +1,5 @@
 """Module that describes chessboard"""
-from typing import Optional, Tuple, Dict, List
+from typing import Callable, Optional, Tuple, Dict, List
 from enum import Enum
 
 import pygame
@@ -13,6 +13,10 @@ from game.model.pieces.queen import Queen
 from game.model.pieces.rook import Rook
 
 
+MoveListener = Callable[[List[Tuple[Tuple[int, int], str]],
+                          List[Tuple[Tuple[int, int], str]]], None]
+
+
 class InvalidFENError(Exception):
     """Error that raises when invalid FEN string was passed"""
 
@@ -69,21 +73,49 @@ class Board:
         self.en_passant: Optional[Tuple[int, int]] = None
         self.moves_count: Dict[str, int] = None
         self.cells: Dict[Tuple[int, int], Cell] = None
+        self._move_listeners: List[MoveListener] = []
 
         board_state = fen.split()
         self._set_board(board_state)
 
+    def add_move_listener(self, listener: MoveListener) -> None:
+        """Registers a callback that is called after every move.\
+            Callback receives lists of removed and added pieces\
+                as pairs of a position and a piece's symbol
+
+        Args:
+            listener (MoveListener): Callback
+        """
+        self._move_listeners.append(listener)
+
+    def remove_move_listener(self, listener: MoveListener) -> None:
+        """Unregisters a move callback
+
+        Args:
+            listener (MoveListener): Callback
+        """
+        self._move_listeners.remove(listener)
+
     def make_move(self, current_position: Tuple[int, int],
-                  new_position: Tuple[int, int]) -> str:
+                  new_position: Tuple[int, int],
+                  promote_piece: Optional[Piece] = None) -> str:
         """Makes move on a chessboard
 
         Args:
             current_position (Tuple[int, int]): Position of a piece to move
             new_position (Tuple[int, int]): New position of a piece
+            promote_piece (Optional[Piece]): Piece that replaces\
+                a promoted pawn. Defaults to None
 
         Returns:
             str: Type of move
         """
+        removed: List[Tuple[Tuple[int, int], str]] = [
+            (current_position, str(self.pieces[current_position]))]
+        added: List[Tuple[Tuple[int, int], str]] = []
+
+        if promote_piece:
+            self.pieces[current_position] = promote_piece
         piece = self.pieces.pop(current_position)
         captured_piece: Optional[Piece] = None
         castle = False
@@ -94,8 +126,11 @@ class Board:
             self.moves_count['half'] = 0
             file, rank = en_passant
             captured_piece = self.pieces.pop((file, rank - piece.direction))
+            removed.append(((file, rank - piece.direction),
+                            str(captured_piece)))
             piece.position = en_passant
             self.pieces[en_passant] = piece
+            added.append((en_passant, str(piece)))
         elif isinstance(piece, King):
             self.moves_count['half'] += 1
             file, rank = current_position
@@ -110,6 +145,7 @@ class Board:
                         rook = self.pieces[(7, rank)]
                         new_position = rook.position
                     self.pieces.pop(rook.position)
+                    removed.append((rook.position, str(rook)))
                     rook.position = (5, rank)
                     self.pieces[(5, rank)] = rook
                     piece.position = (6, rank)
@@ -119,15 +155,20 @@ class Board:
                         rook = self.pieces[(0, rank)]
                         new_position = rook.position
                     self.pieces.pop(rook.position)
+                    removed.append((rook.position, str(rook)))
                     rook.position = (3, rank)
                     self.pieces[(3, rank)] = rook
                     piece.position = (2, rank)
                     self.pieces[(2, rank)] = piece
+                added.append((rook.position, str(rook)))
+                added.append((piece.position, str(piece)))
             else:
                 if self.pieces.get(new_position):
                     captured_piece = self.pieces.pop(new_position)
+                    removed.append((new_position, str(captured_piece)))
                 piece.position = new_position
                 self.pieces[new_position] = piece
+                added.append((new_position, str(piece)))
             castle_rights = self.castle_rights[piece.color]
             if not piece.moved:
                 castle_rights.clear()
@@ -135,6 +176,7 @@ class Board:
             self.moves_count['half'] += 1
             if self.pieces.get(new_position):
                 captured_piece = self.pieces.pop(new_position)
+                removed.append((new_position, str(captured_piece)))
             if isinstance(piece, Rook):
                 file, _ = piece.position
                 castle_rights = self.castle_rights[piece.color]
@@ -155,6 +197,7 @@ class Board:
                     self.en_passant = (file, rank + piece.direction)
             piece.position = new_position
             self.pieces[new_position] = piece
+            added.append((new_position, str(piece)))
 
         if captured_piece:
             self.moves_count['half'] = 0
@@ -168,6 +211,9 @@ class Board:
         if self.turn == PieceColor.BLACK:
             self.moves_count['full'] += 1
 
+        for listener in self._move_listeners:
+            listener(removed, added)
+
         if castle:
             return 'castle'
         if captured_piece:
@@ -0,0 +1,144 @@
+"""Module that describes chess clock"""
+from typing import Optional, Dict
+import time
+
+from game.model.pieces.piece import PieceColor
+
+DEFAULT_MOVES_TO_GO = 40
+MIN_MOVES_TO_GO = 15
+MIN_MOVE_TIME = 0.05
+MOVE_OVERHEAD = 0.05
+
+
+class GameClock:
+    """Class for chess clock with base time and increment"""
+
+    def __init__(self, base: float, increment: float = 0) -> None:
+        self._base = base
+        self._increment = increment
+        self._remaining: Dict[PieceColor, float] = {
+            PieceColor.WHITE: base,
+            PieceColor.BLACK: base
+        }
+        self._running: Optional[PieceColor] = None
+        self._started_at = 0.0
+
+    @property
+    def base(self) -> float:
+        """Property that contains base time of each side in seconds
+
+        Returns:
+            float: Base time
+        """
+        return self._base
+
+    @property
+    def increment(self) -> float:
+        """Property that contains increment per move in seconds
+
+        Returns:
+            float: Increment
+        """
+        return self._increment
+
+    @property
+    def running(self) -> Optional[PieceColor]:
+        """Property that contains color of a side whose clock is running
+
+        Returns:
+            Optional[PieceColor]: Color if clock is running, None otherwise
+        """
+        return self._running
+
+    def start(self, color: PieceColor) -> None:
+        """Starts clock of a side
+
+        Args:
+            color (PieceColor): Color of a side
+        """
+        self._running = color
+        self._started_at = time.monotonic()
+
+    def stop(self) -> None:
+        """Stops running clock"""
+        if self._running:
+            self._remaining[self._running] = self.remaining(self._running)
+            self._running = None
+
+    def press(self) -> None:
+        """Stops clock of a side that has moved, adds increment to it\
+            and starts opponent's clock"""
+        color = self._running
+        if not color:
+            return
+        self.stop()
+        self._remaining[color] += self._increment
+        self.start(PieceColor(1 - color.value))
+
+    def remaining(self, color: PieceColor) -> float:
+        """Gets remaining time of a side
+
+        Args:
+            color (PieceColor): Color of a side
+
+        Returns:
+            float: Remaining time in seconds
+        """
+        remaining = self._remaining[color]
+        if color == self._running:
+            remaining -= time.monotonic() - self._started_at
+        return max(remaining, 0.0)
+
+    def flagged(self) -> Optional[PieceColor]:
+        """Gets a side that ran out of time
+
+        Returns:
+            Optional[PieceColor]: Color of a side if its time is over,\
+                None otherwise
+        """
+        for color in (PieceColor.WHITE, PieceColor.BLACK):
+            if self.remaining(color) <= 0:
+                return color
+        return None
+
+    def budget(self, color: PieceColor, full_moves: int = 1,
+               moves_to_go: Optional[int] = None) -> float:
+        """Gets time that a side may spend on its next move
+
+        Args:
+            color (PieceColor): Color of a side
+            full_moves (int): Number of the current full move,\
+                used to estimate moves to go. Defaults to 1
+            moves_to_go (Optional[int]): Moves until the next time control.\
+                Estimated from the number of moves if None. Defaults to None
+
+        Returns:
+            float: Time for a move in seconds
+        """
+        remaining = self.remaining(color)
+        if not moves_to_go:
+            moves_to_go = max(MIN_MOVES_TO_GO,
+                              DEFAULT_MOVES_TO_GO - full_moves // 2)
+
+        budget = remaining / moves_to_go + self._increment * 0.8
+        budget = min(budget, remaining / 2 - MOVE_OVERHEAD)
+        return max(budget, MIN_MOVE_TIME)
+
+    def uci_params(self) -> Dict[str, int]:
+        """Gets state of the clock as parameters of UCI go command
+
+        Returns:
+            Dict[str, int]: Values of wtime, btime, winc and binc\
+                in milliseconds
+        """
+        increment = int(self._increment * 1000)
+        return {
+            'wtime': int(self.remaining(PieceColor.WHITE) * 1000),
+            'btime': int(self.remaining(PieceColor.BLACK) * 1000),
+            'winc': increment,
+            'binc': increment
+        }
+
+    def __str__(self) -> str:
+        base = f'{self._base / 60:g}'
+        return f'{base}+{self._increment:g}'
@@ -0,0 +1,846 @@
+"""Module that describes chessboard without graphics,\
+    used for analysis, bot matches and server-side validation"""
+from typing import Callable, Optional, Tuple, Dict, List, Set
+import re
+
+START_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+FILES = 'abcdefgh'
+PIECE_VALUES = {'P': 1, 'N': 3, 'B': 3, 'R': 5, 'Q': 9, 'K': 0}
+SAN_PATTERN = re.compile(
+    r'^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQnbrq]))?$')
+
+Move = Tuple[int, int, str]
+MoveListener = Callable[[List[Tuple[Tuple[int, int], str]],
+                          List[Tuple[Tuple[int, int], str]]], None]
+
+
+class InvalidFENError(Exception):
+    """Error that raises when invalid FEN string was passed"""
+
+
+class IllegalMoveError(Exception):
+    """Error that raises when illegal or unparsable move was passed"""
+
+
+def _targets(offsets: List[Tuple[int, int]]) -> List[List[int]]:
+    targets = []
+    for square in range(64):
+        file, rank = square & 7, square >> 3
+        targets.append([(rank + rank_offset) * 8 + file + file_offset
+                        for file_offset, rank_offset in offsets
+                        if 0 <= file + file_offset <= 7 and
+                        0 <= rank + rank_offset <= 7])
+    return targets
+
+
+def _rays(directions: List[Tuple[int, int]]) -> List[List[List[int]]]:
+    rays = []
+    for square in range(64):
+        file, rank = square & 7, square >> 3
+        square_rays = []
+        for file_offset, rank_offset in directions:
+            ray = []
+            new_file, new_rank = file + file_offset, rank + rank_offset
+            while 0 <= new_file <= 7 and 0 <= new_rank <= 7:
+                ray.append(new_rank * 8 + new_file)
+                new_file += file_offset
+                new_rank += rank_offset
+            square_rays.append(ray)
+        rays.append(square_rays)
+    return rays
+
+
+KNIGHT_TARGETS = _targets([(-2, 1), (-1, 2), (1, 2), (2, 1),
+                           (2, -1), (1, -2), (-1, -2), (-2, -1)])
+KING_TARGETS = _targets([(-1, 0), (0, 1), (1, 0), (0, -1),
+                         (-1, 1), (1, 1), (1, -1), (-1, -1)])
+ROOK_RAYS = _rays([(-1, 0), (0, 1), (1, 0), (0, -1)])
+BISHOP_RAYS = _rays([(-1, 1), (1, 1), (1, -1), (-1, -1)])
+
+
+def square_name(square: int) -> str:
+    """Gets name of a square, e.g. 'e4'
+
+    Args:
+        square (int): Index of a square, where 0 is a8 and 63 is h1
+
+    Returns:
+        str: Name of a square
+    """
+    return f'{FILES[square & 7]}{8 - (square >> 3)}'
+
+
+def parse_square(name: str) -> int:
+    """Gets index of a square by its name
+
+    Args:
+        name (str): Name of a square, e.g. 'e4'
+
+    Returns:
+        int: Index of a square, where 0 is a8 and 63 is h1
+    """
+    return (8 - int(name[1])) * 8 + FILES.index(name[0])
+
+
+class HeadlessBoard:
+    """Class for chessboard without graphics.\
+        Squares are indexed from a8 (0) to h1 (63),\
+            the same way as (file, rank) positions of Board"""
+
+    def __init__(self, fen: str = START_FEN, chess960: bool = False) -> None:
+        self.chess960 = chess960
+        self.white_to_move = True
+        self.en_passant: Optional[int] = None
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self._squares: List[Optional[str]] = [None] * 64
+        self._castling: Set[int] = set()
+        self._kings: Dict[bool, int] = {}
+        self._history: List[tuple] = []
+        self._keys: List[int] = []
+        self._move_listeners: List[MoveListener] = []
+        self._set_fen(fen)
+
+    @property
+    def moves(self) -> List[str]:
+        """Property that contains moves made on the board
+
+        Returns:
+            List[str]: Moves in a long algebraic notation
+        """
+        return [self._uci(entry[0], entry[-1]) for entry in self._history]
+
+    @property
+    def ply(self) -> int:
+        """Property that contains number of moves made on the board
+
+        Returns:
+            int: Number of moves
+        """
+        return len(self._history)
+
+    @property
+    def key(self) -> int:
+        """Property that contains hash of the current position,\
+            equal for positions that count as repetitions
+
+        Returns:
+            int: Position's hash
+        """
+        return self._keys[-1]
+
+    def add_move_listener(self, listener: MoveListener) -> None:
+        """Registers a callback that is called after every move and undo.\
+            Callback receives lists of removed and added pieces\
+                as pairs of a position and a piece's symbol
+
+        Args:
+            listener (MoveListener): Callback
+        """
+        self._move_listeners.append(listener)
+
+    def pieces(self) -> Dict[Tuple[int, int], str]:
+        """Gets pieces' symbols by their (file, rank) positions
+
+        Returns:
+            Dict[Tuple[int, int], str]: Pieces' placement
+        """
+        return {(square & 7, square >> 3): piece
+                for square, piece in enumerate(self._squares) if piece}
+
+    def piece_at(self, square: int) -> Optional[str]:
+        """Gets piece at a square
+
+        Args:
+            square (int): Index of a square
+
+        Returns:
+            Optional[str]: Piece's symbol if square is occupied, else None
+        """
+        return self._squares[square]
+
+    def copy(self) -> 'HeadlessBoard':
+        """Copies board without its move history and listeners
+
+        Returns:
+            HeadlessBoard: Copy of the board
+        """
+        return HeadlessBoard(self.fen(), self.chess960)
+
+    def is_check(self) -> bool:
+        """Tells if the side to move is in check
+
+        Returns:
+            bool: True if king of the side to move is attacked
+        """
+        king = self._kings.get(self.white_to_move)
+        return king is not None and\
+            self.is_attacked(king, not self.white_to_move)
+
+    def is_king_attacked(self, white: bool) -> bool:
+        """Tells if king of a side is attacked, e.g. to check\
+            a pseudo legal move after it was made
+
+        Args:
+            white (bool): Color of king's side
+
+        Returns:
+            bool: True if the king is attacked, False otherwise
+        """
+        king = self._kings.get(white)
+        return king is not None and self.is_attacked(king, not white)
+
+    def is_attacked(self, square: int, by_white: bool) -> bool:
+        """Tells if a square is attacked by a side
+
+        Args:
+            square (int): Index of a square
+            by_white (bool): Color of attacking side
+
+        Returns:
+            bool: True if the square is attacked, False otherwise
+        """
+        squares = self._squares
+        pawn, knight, bishop, rook, queen, king = \
+            'PNBRQK' if by_white else 'pnbrqk'
+        file, rank = square & 7, square >> 3
+
+        pawn_rank = rank + 1 if by_white else rank - 1
+        if 0 <= pawn_rank <= 7:
+            for pawn_file in (file - 1, file + 1):
+                if 0 <= pawn_file <= 7 and\
+                        squares[pawn_rank * 8 + pawn_file] == pawn:
+                    return True
+        for target in KNIGHT_TARGETS[square]:
+            if squares[target] == knight:
+                return True
+        for target in KING_TARGETS[square]:
+            if squares[target] == king:
+                return True
+        for ray in ROOK_RAYS[square]:
+            for target in ray:
+                piece = squares[target]
+                if piece:
+                    if piece in (rook, queen):
+                        return True
+                    break
+        for ray in BISHOP_RAYS[square]:
+            for target in ray:
+                piece = squares[target]
+                if piece:
+                    if piece in (bishop, queen):
+                        return True
+                    break
+        return False
+
+    def pseudo_legal_moves(self, from_square: Optional[int] = None)\
+            -> List[Move]:
+        """Gets moves that follow pieces' rules,\
+            but may leave own king in check
+
+        Args:
+            from_square (Optional[int]): Generate only moves of a piece\
+                on this square if passed. Defaults to None
+
+        Returns:
+            List[Move]: Moves as (from square, to square, promotion).\
+                Castling is encoded as king's move to its own rook
+        """
+        moves: List[Move] = []
+        squares = self._squares
+        white = self.white_to_move
+        origins = range(64) if from_square is None else (from_square,)
+
+        for square in origins:
+            piece = squares[square]
+            if not piece or piece.isupper() != white:
+                continue
+            kind = piece.upper()
+
+            if kind == 'P':
+                self._pawn_moves(square, moves)
+            elif kind == 'N' or kind == 'K':
+                targets = KNIGHT_TARGETS if kind == 'N' else KING_TARGETS
+                for target in targets[square]:
+                    other = squares[target]
+                    if not other or other.isupper() != white:
+                        moves.append((square, target, ''))
+                if kind == 'K':
+                    self._castling_moves(square, moves)
+            else:
+                rays: List[List[int]] = []
+                if kind in 'RQ':
+                    rays.extend(ROOK_RAYS[square])
+                if kind in 'BQ':
+                    rays.extend(BISHOP_RAYS[square])
+                for ray in rays:
+                    for target in ray:
+                        other = squares[target]
+                        if not other:
+                            moves.append((square, target, ''))
+                            continue
+                        if other.isupper() != white:
+                            moves.append((square, target, ''))
+                        break
+        return moves
+
+    def legal_moves(self, from_square: Optional[int] = None) -> List[Move]:
+        """Gets legal moves of the side to move
+
+        Args:
+            from_square (Optional[int]): Generate only moves of a piece\
+                on this square if passed. Defaults to None
+
+        Returns:
+            List[Move]: Moves as (from square, to square, promotion)
+        """
+        white = self.white_to_move
+        moves = []
+        for move in self.pseudo_legal_moves(from_square):
+            self._make(move)
+            king = self._kings.get(white)
+            if king is None or not self.is_attacked(king, not white):
+                moves.append(move)
+            self._unmake()
+        return moves
+
+    def has_legal_moves(self) -> bool:
+        """Tells if the side to move has any legal move. Stops at the first\
+            legal move, so it's cheaper than generating all of them
+
+        Returns:
+            bool: True if there is a legal move, False otherwise
+        """
+        white = self.white_to_move
+        for square, piece in enumerate(self._squares):
+            if not piece or piece.isupper() != white:
+                continue
+            for move in self.pseudo_legal_moves(square):
+                self._make(move)
+                king = self._kings.get(white)
+                legal = king is None or not self.is_attacked(king, not white)
+                self._unmake()
+                if legal:
+                    return True
+        return False
+
+    def is_legal(self, move: Move) -> bool:
+        """Tells if a move is legal
+
+        Args:
+            move (Move): Move as (from square, to square, promotion)
+
+        Returns:
+            bool: True if the move is legal, False otherwise
+        """
+        if move not in self.pseudo_legal_moves(move[0]):
+            return False
+        white = self.white_to_move
+        self._make(move)
+        king = self._kings.get(white)
+        legal = king is None or not self.is_attacked(king, not white)
+        self._unmake()
+        return legal
+
+    def push(self, move: Move) -> None:
+        """Makes a move without checking its legality
+
+        Args:
+            move (Move): Move as (from square, to square, promotion)
+        """
+        changes = self._make(move)
+        self._keys.append(self._position_key())
+        if self._move_listeners:
+            self._notify_move_listeners(changes)
+
+    def pop(self) -> Move:
+        """Takes back the last move
+
+        Returns:
+            Move: Taken back move
+        """
+        move = self._history[-1][0]
+        self._keys.pop()
+        changes = self._unmake()
+        if self._move_listeners:
+            self._notify_move_listeners(changes)
+        return move
+
+    def push_uci(self, uci: str) -> Move:
+        """Makes a move in a long algebraic notation after checking it
+
+        Args:
+            uci (str): Move in a long algebraic notation
+
+        Raises:
+            IllegalMoveError: Raises when move is illegal
+
+        Returns:
+            Move: Made move
+        """
+        move = self.parse_uci(uci)
+        if not self.is_legal(move):
+            raise IllegalMoveError(f'Illegal move: {uci}')
+        self.push(move)
+        return move
+
+    def push_san(self, san: str) -> Move:
+        """Makes a move in a standard algebraic notation
+
+        Args:
+            san (str): Move in a standard algebraic notation
+
+        Raises:
+            IllegalMoveError: Raises when move is illegal or ambiguous
+
+        Returns:
+            Move: Made move
+        """
+        move = self.parse_san(san)
+        self.push(move)
+        return move
+
+    def parse_uci(self, uci: str) -> Move:
+        """Converts move in a long algebraic notation to a move.\
+            Castling can be written both as king's move by two squares\
+                and as king's move to its own rook
+
+        Args:
+            uci (str): Move in a long algebraic notation
+
+        Raises:
+            IllegalMoveError: Raises when move can't be parsed
+
+        Returns:
+            Move: Move as (from square, to square, promotion)
+        """
+        try:
+            from_square = parse_square(uci[0:2])
+            to_square = parse_square(uci[2:4])
+        except (ValueError, IndexError) as exc:
+            raise IllegalMoveError(f'Invalid move: {uci}') from exc
+        promote = uci[4:5].lower()
+        if promote and promote not in 'nbrq':
+            raise IllegalMoveError(f'Invalid move: {uci}')
+
+        piece = self._squares[from_square]
+        target = self._squares[to_square]
+        is_king = piece and piece.upper() == 'K'
+        if is_king and abs(to_square - from_square) == 2\
+                and not (target and target.upper() == 'R') and\
+                from_square >> 3 == to_square >> 3:
+            kingside = to_square > from_square
+            for rook in self._castling:
+                if rook >> 3 == from_square >> 3 and\
+                        (rook > from_square) == kingside:
+                    return from_square, rook, ''
+        return from_square, to_square, promote
+
+    def parse_san(self, san: str) -> Move:
+        """Converts move in a standard algebraic notation to a move
+
+        Args:
+            san (str): Move in a standard algebraic notation
+
+        Raises:
+            IllegalMoveError: Raises when move is illegal or ambiguous
+
+        Returns:
+            Move: Move as (from square, to square, promotion)
+        """
+        text = san.rstrip('+#!?')
+        legal = self.legal_moves()
+
+        if text in ('O-O', '0-0', 'O-O-O', '0-0-0'):
+            kingside = text in ('O-O', '0-0')
+            for move in legal:
+                if self._is_castling(move) and\
+                        (move[1] > move[0]) == kingside:
+                    return move
+            raise IllegalMoveError(f'Illegal move: {san}')
+
+        match = SAN_PATTERN.match(text)
+        if not match:
+            raise IllegalMoveError(f'Invalid move: {san}')
+        kind, file, rank, target, promote = match.groups()
+        kind = kind or 'P'
+        to_square = parse_square(target)
+
+        candidates = []
+        for move in legal:
+            from_square = move[0]
+            piece = self._squares[from_square].upper()
+            if piece != kind or move[1] != to_square or\
+                    self._is_castling(move):
+                continue
+            if file and FILES[from_square & 7] != file:
+                continue
+            if rank and str(8 - (from_square >> 3)) != rank:
+                continue
+            if move[2] != (promote or '').lower():
+                continue
+            candidates.append(move)
+
+        if len(candidates) != 1:
+            raise IllegalMoveError(f'Illegal or ambiguous move: {san}')
+        return candidates[0]
+
+    def to_uci(self, move: Move) -> str:
+        """Converts move to a long algebraic notation
+
+        Args:
+            move (Move): Move as (from square, to square, promotion)
+
+        Returns:
+            str: Move in a long algebraic notation. Castling is written\
+                as king's move to its rook in Fisher random mode
+        """
+        return self._uci(move, self._is_castling(move))
+
+    def outcome(self) -> Optional[Tuple[str, str]]:
+        """Gets result of a finished game
+
+        Returns:
+            Optional[Tuple[str, str]]: Result ('1-0', '0-1' or '1/2-1/2')\
+                and its reason if game is over, None otherwise
+        """
+        if not self.has_legal_moves():
+            if self.is_check():
+                return ('0-1' if self.white_to_move else '1-0'), 'checkmate'
+            return '1/2-1/2', 'stalemate'
+        if self.halfmove_clock >= 100:
+            return '1/2-1/2', 'fifty-move rule'
+        if self.is_insufficient_material():
+            return '1/2-1/2', 'insufficient material'
+        if self.is_repetition():
+            return '1/2-1/2', 'threefold repetition'
+        return None
+
+    def is_insufficient_material(self) -> bool:
+        """Tells if neither side can checkmate
+
+        Returns:
+            bool: True if there is not enough material to checkmate
+        """
+        minors = []
+        for square, piece in enumerate(self._squares):
+            if not piece or piece in 'Kk':
+                continue
+            if piece in 'PpRrQq':
+                return False
+            minors.append((piece, (square + (square >> 3)) % 2))
+        if len(minors) <= 1:
+            return True
+        bishops_colors = {color for piece, color in minors
+                          if piece in 'Bb'}
+        return len(bishops_colors) == 1 and\
+            all(piece in 'Bb' for piece, _ in minors)
+
+    def is_repetition(self, count: int = 3) -> bool:
+        """Tells if current position has occurred several times
+
+        Args:
+            count (int): Number of occurrences. Defaults to 3
+
+        Returns:
+            bool: True if position has occurred at least count times
+        """
+        if len(self._keys) < count:
+            return False
+        key = self._keys[-1]
+        return self._keys[-self.halfmove_clock - 1:].count(key) >= count
+
+    def material(self) -> int:
+        """Gets material balance in pawns
+
+        Returns:
+            int: White's material minus black's material
+        """
+        balance = 0
+        for piece in self._squares:
+            if piece:
+                value = PIECE_VALUES[piece.upper()]
+                balance += value if piece.isupper() else -value
+        return balance
+
+    def fen(self) -> str:
+        """Gets position in FEN notation
+
+        Returns:
+            str: FEN string
+        """
+        rows = []
+        for rank in range(8):
+            row, empty = '', 0
+            for piece in self._squares[rank * 8:rank * 8 + 8]:
+                if piece:
+                    row += (str(empty) if empty else '') + piece
+                    empty = 0
+                else:
+                    empty += 1
+            rows.append(row + (str(empty) if empty else ''))
+
+        castling = ''
+        for white in (True, False):
+            rights = []
+            for rook in sorted(self._castling, reverse=True):
+                if (rook >> 3 == 7) != white:
+                    continue
+                if self.chess960:
+                    char = FILES[rook & 7]
+                else:
+                    char = 'k' if rook > self._kings[white] else 'q'
+                rights.append(char.upper() if white else char)
+            castling += ''.join(rights)
+
+        placement = '/'.join(rows)
+        turn = 'w' if self.white_to_move else 'b'
+        castling = castling or '-'
+        en_passant = square_name(self.en_passant)\
+            if self.en_passant is not None else '-'
+        return f'{placement} {turn} {castling} {en_passant} ' +\
+            f'{self.halfmove_clock} {self.fullmove_number}'
+
+    def _uci(self, move: Move, castling: bool) -> str:
+        from_square, to_square, promote = move
+        if castling and not self.chess960:
+            rank = from_square >> 3
+            to_square = rank * 8 + (6 if to_square > from_square else 2)
+        return f'{square_name(from_square)}{square_name(to_square)}{promote}'
+
+    def _pawn_moves(self, square: int, moves: List[Move]) -> None:
+        squares = self._squares
+        white = self.white_to_move
+        direction = -8 if white else 8
+        start_rank = 6 if white else 1
+        last_rank = 0 if white else 7
+        file = square & 7
+
+        def add(target: int) -> None:
+            if target >> 3 == last_rank:
+                for promote in 'qrbn':
+                    moves.append((square, target, promote))
+            else:
+                moves.append((square, target, ''))
+
+        push = square + direction
+        if not squares[push]:
+            add(push)
+            double_push = push + direction
+            if square >> 3 == start_rank and not squares[double_push]:
+                moves.append((square, double_push, ''))
+
+        for file_offset in (-1, 1):
+            if not 0 <= file + file_offset <= 7:
+                continue
+            target = push + file_offset
+            other = squares[target]
+            if (other and other.isupper() != white) or\
+                    target == self.en_passant:
+                add(target)
+
+    def _castling_moves(self, king: int, moves: List[Move]) -> None:
+        white = self.white_to_move
+        rank = king >> 3
+        if not self._castling or self.is_attacked(king, not white):
+            return
+
+        for rook in self._castling:
+            if rook >> 3 != rank or self._squares[rook] != \
+                    ('R' if white else 'r'):
+                continue
+            kingside = rook > king
+            king_target = rank * 8 + (6 if kingside else 2)
+            rook_target = rank * 8 + (5 if kingside else 3)
+
+            path = set(range(min(king, king_target),
+                             max(king, king_target) + 1))
+            path |= set(range(min(rook, rook_target),
+                              max(rook, rook_target) + 1))
+            if any(self._squares[square] for square in path
+                   if square not in (king, rook)):
+                continue
+            step = 1 if king_target > king else -1
+            if any(self.is_attacked(square, not white)
+                   for square in range(king + step, king_target + step, step)
+                   if square != king):
+                continue
+            moves.append((king, rook, ''))
+
+    def _is_castling(self, move: Move) -> bool:
+        piece = self._squares[move[0]]
+        target = self._squares[move[1]]
+        return piece is not None and piece in 'Kk' and target is not None\
+            and target == ('R' if piece == 'K' else 'r')
+
+    def _make(self, move: Move) -> List[Tuple[int, Optional[str]]]:
+        from_square, to_square, promote = move
+        squares = self._squares
+        piece = squares[from_square]
+        white = piece.isupper()
+        castle = self._is_castling(move)
+        changes: List[Tuple[int, Optional[str]]] = []
+        self._history.append((move, changes, self._castling,
+                              self.en_passant, self.halfmove_clock,
+                              dict(self._kings), castle))
+
+        def put(square: int, new_piece: Optional[str]) -> None:
+            changes.append((square, squares[square]))
+            squares[square] = new_piece
+
+        self.halfmove_clock += 1
+        en_passant = None
+        if castle:
+            rook = squares[to_square]
+            rank = from_square >> 3
+            kingside = to_square > from_square
+            king_target = rank * 8 + (6 if kingside else 2)
+            rook_target = rank * 8 + (5 if kingside else 3)
+            put(from_square, None)
+            put(to_square, None)
+            put(king_target, piece)
+            put(rook_target, rook)
+            self._kings[white] = king_target
+        else:
+            if squares[to_square]:
+                self.halfmove_clock = 0
+            if piece in 'Pp':
+                self.halfmove_clock = 0
+                if to_square == self.en_passant:
+                    put(to_square + (8 if white else -8), None)
+                if abs(to_square - from_square) == 16:
+                    en_passant = (from_square + to_square) // 2
+                if promote:
+                    piece = promote.upper() if white else promote
+            elif piece in 'Kk':
+                self._kings[white] = to_square
+            put(from_square, None)
+            put(to_square, piece)
+
+        if self._castling:
+            if piece in 'Kk':
+                self._castling = {rook for rook in self._castling
+                                  if (rook >> 3 == 7) != white}
+            if from_square in self._castling or\
+                    to_square in self._castling:
+                self._castling = self._castling - {from_square, to_square}
+
+        self.en_passant = en_passant
+        if not white:
+            self.fullmove_number += 1
+        self.white_to_move = not white
+        return changes
+
+    def _unmake(self) -> List[Tuple[int, Optional[str]]]:
+        _, changes, castling, en_passant, halfmove_clock, kings, _ = \
+            self._history.pop()
+        undone = []
+        for square, piece in reversed(changes):
+            undone.append((square, self._squares[square]))
+            self._squares[square] = piece
+        self._castling = castling
+        self.en_passant = en_passant
+        self.halfmove_clock = halfmove_clock
+        self._kings = kings
+        self.white_to_move = not self.white_to_move
+        if not self.white_to_move:
+            self.fullmove_number -= 1
+        return undone
+
+    def _notify_move_listeners(self, changes: List[Tuple[int,
+                                                         Optional[str]]])\
+            -> None:
+        before: Dict[int, Optional[str]] = {}
+        for square, piece in changes:
+            before.setdefault(square, piece)
+
+        removed, added = [], []
+        for square, piece in before.items():
+            current = self._squares[square]
+            if piece == current:
+                continue
+            position = square & 7, square >> 3
+            if piece:
+                removed.append((position, piece))
+            if current:
+                added.append((position, current))
+
+        for listener in self._move_listeners:
+            listener(removed, added)
+
+    def _position_key(self) -> int:
+        return hash((tuple(self._squares), self.white_to_move,
+                     frozenset(self._castling), self.en_passant))
+
+    def _set_fen(self, fen: str) -> None:
+        fields = fen.split()
+        if len(fields) < 4:
+            raise InvalidFENError('Invalid FEN')
+        placement, turn, castling, en_passant = fields[:4]
+
+        rows = placement.split('/')
+        if len(rows) != 8:
+            raise InvalidFENError('Invalid position')
+        for rank, row in enumerate(rows):
+            file = 0
+            for char in row:
+                if char.isnumeric():
+                    file += int(char)
+                    continue
+                if char.upper() not in PIECE_VALUES or file > 7:
+                    raise InvalidFENError('Invalid position')
+                self._squares[rank * 8 + file] = char
+                if char in 'Kk':
+                    self._kings[char == 'K'] = rank * 8 + file
+                file += 1
+            if file != 8:
+                raise InvalidFENError('Invalid position')
+        if len(self._kings) != 2 or placement.count('K') != 1 or\
+                placement.count('k') != 1:
+            raise InvalidFENError('Invalid position')
+
+        if turn not in ('w', 'b'):
+            raise InvalidFENError('Invalid turn')
+        self.white_to_move = turn == 'w'
+
+        if castling != '-':
+            for char in castling:
+                self._castling.add(self._castling_rook(char))
+
+        if en_passant != '-':
+            try:
+                self.en_passant = parse_square(en_passant)
+            except (ValueError, IndexError) as exc:
+                raise InvalidFENError('Invalid en passant target') from exc
+
+        try:
+            self.halfmove_clock = int(fields[4]) if len(fields) > 4 else 0
+            self.fullmove_number = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError as exc:
+            raise InvalidFENError('Invalid move counters') from exc
+        self._keys.append(self._position_key())
+
+    def _castling_rook(self, char: str) -> int:
+        white = char.isupper()
+        rank = 7 if white else 0
+        rook = 'R' if white else 'r'
+        king = self._kings[white]
+        if king >> 3 != rank:
+            raise InvalidFENError('Invalid castle rights')
+
+        match char.lower():
+            case 'k':
+                files = range(7, king & 7, -1)
+            case 'q':
+                files = range(0, king & 7)
+            case file_char if file_char in FILES:
+                files = [FILES.index(file_char)]
+            case _:
+                raise InvalidFENError('Invalid castle rights')
+        for file in files:
+            if self._squares[rank * 8 + file] == rook:
+                return rank * 8 + file
+        raise InvalidFENError('Invalid castle rights')
+
+    def __str__(self) -> str:
+        return self.fen()
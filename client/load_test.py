@@ -0,0 +1,429 @@
+"""Module with load generator that plays games against the server\
+    through many simulated clients.
+
+Run from the client directory against a running server:
+    python load_test.py -c 1000 -d 60 --think 0.5 2
+Thresholds make it a regression gate, exit code is 1 if one is exceeded:
+    python load_test.py -c 200 -d 30 --max-p99 50 --max-error-rate 0.001
+"""
+from typing import Optional, Tuple, Dict, List
+import argparse
+import asyncio
+import logging
+import random
+import json
+import time
+import sys
+
+from client import ChessClient
+from game.model.headless_board import HeadlessBoard, IllegalMoveError,\
+    START_FEN
+from utils.pgn import read_pgn
+
+TIME_CONTROL = '10+0'
+THINK_TIME = (0.0, 0.1)
+EVENT_TIMEOUT = 30.0
+MAX_RESYNCS = 3
+CONNECT_CONCURRENCY = 100
+QUANTILES = {'p50': 0.5, 'p99': 0.99, 'p999': 0.999}
+
+Script = List[str]
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Gets percentile of sorted values by the nearest rank
+
+    Args:
+        values (List[float]): Sorted values
+        share (float): Percentile from 0 to 1, e.g. 0.999
+
+    Returns:
+        float: Percentile, 0.0 if there are no values
+    """
+    if not values:
+        return 0.0
+    return values[min(int(share * len(values)), len(values) - 1)]
+
+
+def read_scripts(path: str) -> List[Script]:
+    """Reads games from the standard starting position from a PGN file
+
+    Args:
+        path (str): Path to the PGN file
+
+    Returns:
+        List[Script]: Moves of every game in a long algebraic notation
+    """
+    scripts = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for game in read_pgn(file):
+            if game.start_fen != START_FEN or game.chess960:
+                continue
+            try:
+                scripts.append([move for _, move in game.positions()
+                                if move])
+            except IllegalMoveError:
+                continue
+    return scripts
+
+
+class LoadStats:
+    """Class that collects latencies and errors of queries\
+        of all simulated clients"""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+        self.games = 0
+        self.moves = 0
+
+    def record(self, method: str, latency: float, error: bool) -> None:
+        """Records query
+
+        Args:
+            method (str): Query's method
+            latency (float): Time until response in seconds
+            error (bool): True if response is an error
+        """
+        self.latencies.setdefault(method, []).append(latency)
+        if error:
+            self.error(method)
+
+    def error(self, kind: str) -> None:
+        """Records error that isn't a response, e.g. lost connection
+
+        Args:
+            kind (str): Kind of error or query's method
+        """
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, elapsed: float, cpu: float) -> dict:
+        """Summarizes collected stats
+
+        Args:
+            elapsed (float): Duration of the test in seconds
+            cpu (float): CPU time of the generator in seconds
+
+        Returns:
+            dict: Throughput, latency percentiles in milliseconds\
+                and error rates, in total and by method
+        """
+        methods = {}
+        for method, latencies in self.latencies.items():
+            latencies.sort()
+            methods[method] = {
+                'queries': len(latencies),
+                'errors': self.errors.get(method, 0),
+                **{name: percentile(latencies, share) * 1000
+                   for name, share in QUANTILES.items()}}
+        latencies = sorted(latency for values in self.latencies.values()
+                           for latency in values)
+        errors = sum(self.errors.values())
+        return {'elapsed': elapsed,
+                'queries': len(latencies),
+                'throughput': len(latencies) / elapsed,
+                'moves_per_sec': self.moves / elapsed,
+                'games': self.games,
+                'errors': dict(self.errors),
+                'error_rate': errors / max(len(latencies), 1),
+                **{name: percentile(latencies, share) * 1000
+                   for name, share in QUANTILES.items()},
+                'generator_cpu': cpu / elapsed,
+                'methods': methods}
+
+
+class SimulatedPlayer:
+    """Class for a client that queues for games and plays them\
+        until cancelled. Moves are taken from scripts, shared by both\
+            players of a game, or chosen randomly when script ends.\
+                If a move is rejected, position is fetched again\
+                    with resume and another move is sent"""
+
+    def __init__(self, client: ChessClient, stats: LoadStats,
+                 time_control: str = TIME_CONTROL,
+                 think_time: Tuple[float, float] = THINK_TIME,
+                 scripts: Optional[List[Script]] = None) -> None:
+        self._client = client
+        self._stats = stats
+        self._time_control = time_control
+        self._think_time = think_time
+        self._scripts = scripts or []
+        self._rating = random.randint(1400, 1600)
+
+    async def run(self) -> None:
+        """Plays games one after another"""
+        while True:
+            if not self._client.connected:
+                self._stats.error('connection')
+                return
+            response = await self._fetch('queue', {
+                'rating': self._rating, 'time_control': self._time_control})
+            if 'error' in response:
+                return
+            match = await self._wait('match')
+            if match is None or not await self._play(match['data']):
+                return
+
+    async def _play(self, match: dict) -> bool:
+        game_id = match['game']
+        white = match['color'] == 'white'
+        script = self._scripts[game_id % len(self._scripts)]\
+            if self._scripts else []
+        board = HeadlessBoard()
+        resyncs = 0
+        failed = False
+        while True:
+            if board.white_to_move == white and not failed and\
+                    self._client.events.empty() and board.outcome() is None:
+                await asyncio.sleep(random.uniform(*self._think_time))
+                move = self._choose(board, script)
+                response = await self._fetch('move', {'game': game_id,
+                                                      'move': move})
+                if 'error' not in response:
+                    board.push_uci(move)
+                    self._stats.moves += 1
+                    resyncs = 0
+                elif resyncs == MAX_RESYNCS:
+                    self._stats.error('desync')
+                    return False
+                else:
+                    resyncs += 1
+                    synced = await self._resync(match['token'])
+                    if synced:
+                        board = synced
+                        continue
+                    failed = True
+
+            event = await self._wait('move', 'game_over')
+            if event is None:
+                return False
+            if event['event'] == 'game_over':
+                self._stats.games += 1
+                return True
+            if event['data']['index'] == board.ply + 1:
+                board.push_uci(event['data']['move'])
+
+    async def _resync(self, token: str) -> Optional[HeadlessBoard]:
+        response = await self._fetch('resume', {'token': token, 'index': 0})
+        if 'error' in response:
+            return None
+        board = HeadlessBoard()
+        for move in response['data']['moves']:
+            board.push_uci(move)
+        return board
+
+    @staticmethod
+    def _choose(board: HeadlessBoard, script: Script) -> str:
+        if board.ply < len(script):
+            try:
+                move = board.parse_uci(script[board.ply])
+                if board.is_legal(move):
+                    return script[board.ply]
+            except IllegalMoveError:
+                pass
+        moves = board.pseudo_legal_moves()
+        random.shuffle(moves)
+        for move in moves:
+            if board.is_legal(move):
+                return board.to_uci(move)
+        raise IllegalMoveError('No legal moves')
+
+    async def _fetch(self, method: str, body: dict) -> dict:
+        start = time.perf_counter()
+        try:
+            response = await self._client.fetch({'method': method,
+                                                 'body': body})
+        except ConnectionError:
+            self._stats.error('connection')
+            return {'error': 'Connection lost'}
+        self._stats.record(method, time.perf_counter() - start,
+                           'error' in response)
+        return response
+
+    async def _wait(self, *events: str) -> Optional[dict]:
+        try:
+            async with asyncio.timeout(EVENT_TIMEOUT):
+                while True:
+                    event = await self._client.events.get()
+                    if event.get('event') in events:
+                        return event
+        except TimeoutError:
+            self._stats.error('timeout')
+            return None
+
+
+async def load_test(address: Tuple[str, int], clients: int,
+                    duration: float, recv_size: int = 4096,
+                    encoding: str = 'json',
+                    time_control: str = TIME_CONTROL,
+                    think_time: Tuple[float, float] = THINK_TIME,
+                    scripts: Optional[List[Script]] = None) -> dict:
+    """Connects clients, lets them play for a while and reports stats
+
+    Args:
+        address (Tuple[str, int]): Server's address
+        clients (int): Number of simulated clients
+        duration (float): Time of playing in seconds
+        recv_size (int): Size of reads from the server. Defaults to 4096
+        encoding (str): 'json' or 'binary'. Defaults to 'json'
+        time_control (str): Time control of games. Defaults to '10+0'
+        think_time (Tuple[float, float]): Bounds of random time before\
+            every move in seconds. Defaults to (0.0, 0.1)
+        scripts (Optional[List[Script]]): Games to replay. Defaults to None
+
+    Returns:
+        dict: Report of LoadStats
+    """
+    stats = LoadStats()
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def connect() -> ChessClient:
+        async with semaphore:
+            client = ChessClient(address, recv_size, encoding=encoding)
+            await client.connect()
+            if not client.connected:
+                stats.error('connect')
+            return client
+
+    connected = await asyncio.gather(*(connect() for _ in range(clients)))
+    players = [SimulatedPlayer(client, stats, time_control, think_time,
+                               scripts)
+               for client in connected if client.connected]
+
+    start, cpu = time.perf_counter(), time.process_time()
+    tasks = [asyncio.create_task(player.run()) for player in players]
+    await asyncio.wait(tasks, timeout=duration)
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for client in connected:
+        if client.connected:
+            await client.disconnect()
+    return stats.report(elapsed, cpu)
+
+
+def check(report: dict, max_p99: Optional[float] = None,
+          max_error_rate: Optional[float] = None,
+          min_throughput: Optional[float] = None) -> List[str]:
+    """Compares report with thresholds of a regression gate
+
+    Args:
+        report (dict): Report of load_test
+        max_p99 (Optional[float]): Maximum p99 latency in milliseconds.\
+            Defaults to None
+        max_error_rate (Optional[float]): Maximum share of failed queries.\
+            Defaults to None
+        min_throughput (Optional[float]): Minimum queries/sec.\
+            Defaults to None
+
+    Returns:
+        List[str]: Exceeded thresholds
+    """
+    failures = []
+    if max_p99 is not None and report['p99'] > max_p99:
+        failures.append(f'p99 {report["p99"]:.2f} ms > {max_p99} ms')
+    if max_error_rate is not None and report['error_rate'] > max_error_rate:
+        failures.append(f'error rate {report["error_rate"]:.4f} > '
+                        f'{max_error_rate}')
+    if min_throughput is not None and report['throughput'] < min_throughput:
+        failures.append(f'throughput {report["throughput"]:.0f}/s < '
+                        f'{min_throughput}/s')
+    return failures
+
+
+def raise_file_limit() -> None:
+    """Raises limit of open files to the maximum, so that thousands\
+        of clients can connect. Does nothing on Windows"""
+    if sys.platform == 'win32':
+        return
+    import resource  # pylint: disable=import-outside-toplevel
+    _, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def print_report(report: dict) -> None:
+    """Prints report as a table
+
+    Args:
+        report (dict): Report of load_test
+    """
+    print(f'{report["queries"]} queries in {report["elapsed"]:.1f} s: '
+          f'{report["throughput"]:.0f} queries/s, '
+          f'{report["moves_per_sec"]:.0f} moves/s, '
+          f'{report["games"]} games finished')
+    print(f'{"method":<12}{"queries":>10}{"errors":>8}'
+          f'{"p50 ms":>10}{"p99 ms":>10}{"p999 ms":>10}')
+    for method, stats in sorted(report['methods'].items()):
+        print(f'{method:<12}{stats["queries"]:>10}{stats["errors"]:>8}'
+              f'{stats["p50"]:>10.2f}{stats["p99"]:>10.2f}'
+              f'{stats["p999"]:>10.2f}')
+    print(f'{"total":<12}{report["queries"]:>10}'
+          f'{sum(report["errors"].values()):>8}{report["p50"]:>10.2f}'
+          f'{report["p99"]:>10.2f}{report["p999"]:>10.2f}')
+    print(f'Error rate {report["error_rate"]:.4%}, errors: '
+          f'{report["errors"] or "none"}')
+    if report['generator_cpu'] > 0.9:
+        print(f'Generator used {report["generator_cpu"]:.0%} of a CPU, '
+              'latencies include its own delays')
+
+
+def main() -> None:
+    """Parses command line arguments and runs load test"""
+    with open('config.json', 'r', encoding='utf-8') as config_file:
+        server = json.load(config_file)['server']
+
+    parser = argparse.ArgumentParser(
+        description='Plays games against the server through many clients')
+    parser.add_argument('-c', '--clients', type=int, default=100,
+                        help='Number of simulated clients')
+    parser.add_argument('-d', '--duration', type=float, default=30.0,
+                        help='Time of playing in seconds')
+    parser.add_argument('--host', default=server['host'],
+                        help='Server\'s host')
+    parser.add_argument('--port', type=int, default=server['port'],
+                        help='Server\'s port')
+    parser.add_argument('--encoding', default='json',
+                        choices=('json', 'binary'), help='Wire encoding')
+    parser.add_argument('--time-control', default=TIME_CONTROL,
+                        help='Time control of games, e.g. 3+2')
+    parser.add_argument('--think', type=float, nargs=2, default=THINK_TIME,
+                        metavar=('MIN', 'MAX'),
+                        help='Bounds of random time before every move '
+                        'in seconds')
+    parser.add_argument('--pgn', default=None,
+                        help='PGN file with games to replay instead of '
+                        'random moves')
+    parser.add_argument('--json', default=None,
+                        help='File to write report to')
+    parser.add_argument('--max-p99', type=float, default=None,
+                        help='Fail if p99 latency exceeds it, ms')
+    parser.add_argument('--max-error-rate', type=float, default=None,
+                        help='Fail if share of failed queries exceeds it')
+    parser.add_argument('--min-throughput', type=float, default=None,
+                        help='Fail if queries/s is below it')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    raise_file_limit()
+
+    scripts = read_scripts(args.pgn) if args.pgn else None
+    report = asyncio.run(load_test(
+        (args.host, args.port), args.clients, args.duration,
+        server['recv_size'], args.encoding, args.time_control,
+        tuple(args.think), scripts))
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=4)
+
+    failures = check(report, args.max_p99, args.max_error_rate,
+                     args.min_throughput)
+    for failure in failures:
+        print(f'FAILED: {failure}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
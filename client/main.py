@@ -5,6 +5,8 @@ import json
 import pygame
 
 from game.menu import MainMenu
+from bot.engine_pool import EnginePool
+from bot.engine_cache import EngineCache
 
 
 def main():
@@ -12,6 +14,8 @@ def main():
         data: Dict[str, Dict] = json.load(file)
         server: Dict[str, str | int] = data['server']
         engine: str = data['engine']
+        engine_pool_size: int = data['engine_pool_size']
+        engine_cache: Dict[str, str | int] = data['engine_cache']
 
         log_config: Dict[str, str] = data['log_config']
         log_file: str = log_config['log_file']
@@ -31,7 +35,10 @@ def main():
     pygame.display.set_caption('Chess')
     pygame.display.set_icon(icon)
 
-    menu = MainMenu(screen, server, engine)
+    cache = EngineCache(engine_cache['path'], engine_cache['max_entries'],
+                        engine_cache.get('limited_strength', False))
+    pool = EnginePool(engine, engine_pool_size, cache)
+    menu = MainMenu(screen, server, pool)
     menu.mainloop()
 
 
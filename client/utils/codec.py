@@ -0,0 +1,246 @@
+"""Module with encodings of protocol's messages. JSON is readable and\
+    is used by default, binary encoding packs frequent messages with struct\
+        and falls back to JSON for the rest"""
+from typing import Callable, Optional, Dict, List
+from abc import ABC, abstractmethod
+import struct
+import json
+import time
+
+FILES = 'abcdefgh'
+PROMOTIONS = ' nbrq'
+
+JSON_TYPE = 0
+PING_QUERY = 1
+PING_RESPONSE = 2
+MOVE_QUERY = 3
+OK_RESPONSE = 4
+MOVE_EVENT = 5
+ERROR_RESPONSE = 6
+
+HEADER = struct.Struct('>BI')
+MOVE_QUERY_FORMAT = struct.Struct('>BIQH')
+MOVE_EVENT_FORMAT = struct.Struct('>BQHHII')
+TYPE_FORMAT = struct.Struct('>B')
+
+
+def pack_move(move: str) -> int:
+    """Packs move in a long algebraic notation into 15 bits
+
+    Args:
+        move (str): Move, e.g. 'e7e8q'
+
+    Raises:
+        ValueError: If move can't be packed
+
+    Returns:
+        int: Origin square, destination square and promotion piece
+    """
+    if len(move) not in (4, 5) or move[0] not in FILES or\
+            move[2] not in FILES or move[1:2] not in '12345678' or\
+            move[3:4] not in '12345678':
+        raise ValueError(f'Invalid move: {move}')
+    from_square = FILES.index(move[0]) + 8 * (int(move[1]) - 1)
+    to_square = FILES.index(move[2]) + 8 * (int(move[3]) - 1)
+    promotion = PROMOTIONS.index(move[4]) if len(move) == 5 else 0
+    if not promotion and len(move) == 5:
+        raise ValueError(f'Invalid move: {move}')
+    return from_square | to_square << 6 | promotion << 12
+
+
+def unpack_move(packed: int) -> str:
+    """Unpacks move packed with pack_move
+
+    Args:
+        packed (int): Packed move
+
+    Raises:
+        ValueError: If packed move has an unknown promotion piece
+
+    Returns:
+        str: Move in a long algebraic notation
+    """
+    from_square, to_square = packed & 63, packed >> 6 & 63
+    if packed >> 12 >= len(PROMOTIONS):
+        raise ValueError(f'Invalid packed move: {packed}')
+    promotion = PROMOTIONS[packed >> 12].strip()
+    return f'{FILES[from_square & 7]}{(from_square >> 3) + 1}'\
+        f'{FILES[to_square & 7]}{(to_square >> 3) + 1}{promotion}'
+
+
+class Codec(ABC):
+    """Base class for encodings of messages"""
+    name = ''
+
+    @abstractmethod
+    def encode(self, message: dict) -> bytes:
+        """Encodes message
+
+        Args:
+            message (dict): Message
+
+        Returns:
+            bytes: Payload of a frame
+        """
+
+    @abstractmethod
+    def decode(self, payload: bytes) -> dict:
+        """Decodes message
+
+        Args:
+            payload (bytes): Payload of a frame
+
+        Raises:
+            ValueError: If payload is not a valid message
+
+        Returns:
+            dict: Message
+        """
+
+
+class JSONCodec(Codec):
+    """Class for JSON encoding"""
+    name = 'json'
+
+    def encode(self, message: dict) -> bytes:
+        return json.dumps(message).encode()
+
+    def decode(self, payload: bytes) -> dict:
+        message = json.loads(payload)
+        if not isinstance(message, dict):
+            raise ValueError('Message is not an object')
+        return message
+
+
+class BinaryCodec(Codec):
+    """Class for binary encoding. Pings, moves and their responses\
+        are packed with a type byte, other messages are sent\
+            as JSON after a zero type byte"""
+    name = 'binary'
+
+    def __init__(self) -> None:
+        self._json = JSONCodec()
+
+    def encode(self, message: dict) -> bytes:
+        try:
+            packed = self._pack(message)
+        except (KeyError, TypeError, ValueError, struct.error):
+            packed = None
+        if packed is not None:
+            return packed
+        return TYPE_FORMAT.pack(JSON_TYPE) + self._json.encode(message)
+
+    def decode(self, payload: bytes) -> dict:
+        if not payload:
+            raise ValueError('Empty message')
+        try:
+            match payload[0]:
+                case 0:
+                    return self._json.decode(payload[1:])
+                case 1:
+                    _, query_id = HEADER.unpack(payload)
+                    return {'method': 'ping', 'body': {}, 'id': query_id}
+                case 2:
+                    _, query_id = HEADER.unpack(payload)
+                    return {'data': 'ping', 'id': query_id}
+                case 3:
+                    _, query_id, game, move = MOVE_QUERY_FORMAT.unpack(
+                        payload)
+                    return {'method': 'move', 'id': query_id,
+                            'body': {'game': game,
+                                     'move': unpack_move(move)}}
+                case 4:
+                    _, query_id = HEADER.unpack(payload)
+                    return {'data': 'ok', 'id': query_id}
+                case 5:
+                    _, game, index, move, white_time, black_time =\
+                        MOVE_EVENT_FORMAT.unpack(payload)
+                    return {'event': 'move',
+                            'data': {'game': game, 'index': index,
+                                     'move': unpack_move(move),
+                                     'clock': [white_time, black_time]}}
+                case 6:
+                    _, query_id = HEADER.unpack_from(payload)
+                    error = payload[HEADER.size:].decode()
+                    return {'error': error, 'id': query_id}
+        except (struct.error, UnicodeDecodeError) as exc:
+            raise ValueError(f'Invalid message: {exc}') from exc
+        raise ValueError(f'Unknown message type: {payload[0]}')
+
+    def _pack(self, message: dict) -> Optional[bytes]:
+        keys = message.keys()
+        if keys == {'method', 'body', 'id'}:
+            body = message['body']
+            if message['method'] == 'ping' and not body:
+                return HEADER.pack(PING_QUERY, message['id'])
+            if message['method'] == 'move' and body.keys() == {'game',
+                                                               'move'}:
+                return MOVE_QUERY_FORMAT.pack(MOVE_QUERY, message['id'],
+                                              body['game'],
+                                              pack_move(body['move']))
+        elif keys == {'data', 'id'}:
+            if message['data'] == 'ping':
+                return HEADER.pack(PING_RESPONSE, message['id'])
+            if message['data'] == 'ok':
+                return HEADER.pack(OK_RESPONSE, message['id'])
+        elif keys == {'error', 'id'} and isinstance(message['error'], str):
+            return HEADER.pack(ERROR_RESPONSE, message['id']) +\
+                message['error'].encode()
+        elif keys == {'event', 'data'} and message['event'] == 'move':
+            data = message['data']
+            if data.keys() == {'game', 'index', 'move', 'clock'}:
+                white_time, black_time = data['clock']
+                return MOVE_EVENT_FORMAT.pack(MOVE_EVENT, data['game'],
+                                              data['index'],
+                                              pack_move(data['move']),
+                                              white_time, black_time)
+        return None
+
+
+CODECS: Dict[str, Codec] = {codec.name: codec
+                            for codec in (JSONCodec(), BinaryCodec())}
+
+
+def sample_messages() -> List[dict]:
+    """Gets a mix of frequent messages of a game
+
+    Returns:
+        List[dict]: Messages
+    """
+    return [
+        {'method': 'ping', 'body': {}, 'id': 1},
+        {'data': 'ping', 'id': 1},
+        {'method': 'move', 'body': {'game': 42, 'move': 'e2e4'}, 'id': 2},
+        {'data': 'ok', 'id': 2},
+        {'event': 'move', 'data': {'game': 42, 'index': 1, 'move': 'e7e8q',
+                                   'clock': [179500, 180000]}}
+    ]
+
+
+def benchmark(rounds: int = 100000) -> Dict[str, float]:
+    """Measures encoding and decoding speed of every codec
+
+    Args:
+        rounds (int): Number of times every sample message is encoded\
+            and decoded. Defaults to 100000
+
+    Returns:
+        Dict[str, float]: Messages/sec for every codec
+    """
+    messages = sample_messages()
+    results = {}
+    for name, codec in CODECS.items():
+        encode: Callable[[dict], bytes] = codec.encode
+        decode: Callable[[bytes], dict] = codec.decode
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for message in messages:
+                decode(encode(message))
+        results[name] = rounds * len(messages) /\
+            (time.perf_counter() - start)
+    return results
+
+
+if __name__ == '__main__':
+    for codec_name, speed in benchmark().items():
+        print(f'{codec_name}: {speed:.0f} messages/sec')
@@ -0,0 +1,57 @@
+"""Module with statistics of frame times"""
+from typing import Deque, Dict
+from collections import deque
+
+FRAME_BUDGET = 1000 / 60
+
+
+class FrameStats:
+    """Class that keeps recent frame times and their percentiles"""
+
+    def __init__(self, size: int = 3600,
+                 budget: float = FRAME_BUDGET) -> None:
+        self._times: Deque[float] = deque(maxlen=size)
+        self._budget = budget
+        self.frames = 0
+        self.slow_frames = 0
+
+    def add(self, frame_time: float) -> None:
+        """Adds frame time
+
+        Args:
+            frame_time (float): Time since the previous frame in milliseconds
+        """
+        self._times.append(frame_time)
+        self.frames += 1
+        if frame_time > self._budget * 1.5:
+            self.slow_frames += 1
+
+    def percentile(self, percent: float) -> float:
+        """Gets percentile of recent frame times
+
+        Args:
+            percent (float): Percent from 0 to 100
+
+        Returns:
+            float: Frame time in milliseconds, 0 if there are no frames
+        """
+        if not self._times:
+            return 0.0
+        times = sorted(self._times)
+        index = min(int(len(times) * percent / 100), len(times) - 1)
+        return times[index]
+
+    def summary(self) -> Dict[str, float]:
+        """Gets summary of recent frame times
+
+        Returns:
+            Dict[str, float]: Median, 99th percentile and maximum frame\
+                times in milliseconds, number of frames and slow frames
+        """
+        return {
+            'frames': self.frames,
+            'slow_frames': self.slow_frames,
+            'p50': self.percentile(50),
+            'p99': self.percentile(99),
+            'max': max(self._times, default=0.0)
+        }
@@ -0,0 +1,171 @@
+"""Module with length-prefixed framing of messages over asyncio streams.\
+    Every frame is a 4-byte big-endian payload size followed by payload"""
+from typing import Iterable, List, Tuple
+import asyncio
+import struct
+import json
+import sys
+import time
+
+HEADER = struct.Struct('>I')
+MAX_FRAME_SIZE = 1 << 20
+READ_SIZE = 65536
+
+
+class FrameTooLargeError(Exception):
+    """Error that raises when received frame exceeds maximum size"""
+
+
+def encode_frame(payload: bytes) -> bytes:
+    """Prefixes payload with its size
+
+    Args:
+        payload (bytes): Message
+
+    Returns:
+        bytes: Frame
+    """
+    return HEADER.pack(len(payload)) + payload
+
+
+def write_frames(writer: asyncio.StreamWriter,
+                 payloads: Iterable[bytes]) -> None:
+    """Writes several frames with one write, so that they are sent\
+        together on the next drain
+
+    Args:
+        writer (asyncio.StreamWriter): Stream to write to
+        payloads (Iterable[bytes]): Messages
+    """
+    writer.write(b''.join(HEADER.pack(len(payload)) + payload
+                          for payload in payloads))
+
+
+class FrameReader:
+    """Class that reads frames from a stream. All frames that arrived\
+        with one read are returned together, so that pipelined messages\
+            can be handled and answered in one batch"""
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 max_frame_size: int = MAX_FRAME_SIZE,
+                 read_size: int = READ_SIZE) -> None:
+        self._reader = reader
+        self._max_frame_size = max_frame_size
+        self._read_size = read_size
+        self._buffer = bytearray()
+
+    async def read(self) -> List[bytes]:
+        """Waits for at least one complete frame
+
+        Raises:
+            ConnectionError: If stream is closed
+            FrameTooLargeError: If frame exceeds maximum size
+
+        Returns:
+            List[bytes]: Payloads of all complete frames in order
+        """
+        while True:
+            frames = self._split()
+            if frames:
+                return frames
+            chunk = await self._reader.read(self._read_size)
+            if not chunk:
+                raise ConnectionError('Connection closed')
+            self._buffer.extend(chunk)
+
+    def feed(self, data: bytes) -> None:
+        """Adds data received elsewhere, e.g. by another process\
+            before connection was handed over
+
+        Args:
+            data (bytes): Received data
+        """
+        self._buffer.extend(data)
+
+    def detach(self) -> bytes:
+        """Takes bytes of incomplete frames out of the buffer
+
+        Returns:
+            bytes: Buffered data
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def _split(self) -> List[bytes]:
+        buffer = self._buffer
+        frames = []
+        start = 0
+        while len(buffer) - start >= HEADER.size:
+            (size,) = HEADER.unpack_from(buffer, start)
+            if size > self._max_frame_size:
+                raise FrameTooLargeError(
+                    f'Frame of {size} bytes exceeds {self._max_frame_size}')
+            end = start + HEADER.size + size
+            if end > len(buffer):
+                break
+            frames.append(bytes(buffer[start + HEADER.size:end]))
+            start = end
+        if start:
+            del buffer[:start]
+        return frames
+
+
+async def _echo(reader: asyncio.StreamReader,
+                writer: asyncio.StreamWriter) -> None:
+    frames = FrameReader(reader)
+    try:
+        while True:
+            payloads = await frames.read()
+            write_frames(writer, [json.dumps(json.loads(payload)).encode()
+                                  for payload in payloads])
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def _client(address: Tuple[str, int], messages: int,
+                  pipeline: int) -> None:
+    reader, writer = await asyncio.open_connection(*address)
+    frames = FrameReader(reader)
+    query = json.dumps({'method': 'ping', 'body': {}}).encode()
+    for _ in range(messages // pipeline):
+        write_frames(writer, [query] * pipeline)
+        await writer.drain()
+        received = 0
+        while received < pipeline:
+            received += len(await frames.read())
+    writer.close()
+    await writer.wait_closed()
+
+
+async def benchmark(connections: int = 100, messages: int = 2000,
+                    pipeline: int = 1) -> float:
+    """Measures throughput of framed JSON echo under concurrent load
+
+    Args:
+        connections (int): Number of concurrent clients. Defaults to 100
+        messages (int): Messages per client. Defaults to 2000
+        pipeline (int): Messages that client sends before waiting\
+            for responses. Defaults to 1
+
+    Returns:
+        float: Messages/sec
+    """
+    server = await asyncio.start_server(_echo, '127.0.0.1', 0)
+    address = server.sockets[0].getsockname()[:2]
+    async with server:
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(address, messages, pipeline)
+                               for _ in range(connections)))
+        elapsed = time.perf_counter() - start
+    return connections * (messages // pipeline * pipeline) / elapsed
+
+
+if __name__ == '__main__':
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    for depth in (1, 16):
+        speed = asyncio.run(benchmark(clients, pipeline=depth))
+        print(f'{clients} clients, pipeline {depth}: {speed:.0f} messages/sec')
@@ -0,0 +1,140 @@
+"""Module with framing of a byte stream into lines"""
+from typing import Callable, Iterable, List, Tuple
+import sys
+import time
+
+LineCallback = Callable[[memoryview], None]
+
+
+class LineBuffer:
+    """Buffer that splits incoming chunks into lines without copying them.\
+        Incomplete line is kept until the next chunk"""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes, callback: LineCallback) -> None:
+        """Passes every complete line of the chunk to the callback.\
+            Line is a view without line ending, which is valid only\
+                during the call, so callback must copy or decode it
+
+        Args:
+            data (bytes): Received chunk
+            callback (LineCallback): Called for every complete line
+        """
+        buffer = self._buffer
+        source = data
+        if buffer:
+            buffer.extend(data)
+            source = buffer
+
+        start = 0
+        with memoryview(source) as view:
+            end = source.find(b'\n')
+            while end != -1:
+                line_end = end
+                if line_end > start and source[line_end - 1] == 13:
+                    line_end -= 1
+                with view[start:line_end] as line:
+                    callback(line)
+                start = end + 1
+                end = source.find(b'\n', start)
+
+            if source is not buffer:
+                buffer.extend(view[start:])
+        if source is buffer and start:
+            del buffer[:start]
+
+
+def split_lines(buffer: bytearray, data: bytes) -> Tuple[List[str],
+                                                         bytearray]:
+    """Splits lines by re-slicing the buffer after every line.\
+        Used as a baseline in the benchmark
+
+    Args:
+        buffer (bytearray): Incomplete line from the previous chunk
+        data (bytes): Received chunk
+
+    Returns:
+        Tuple[List[str], bytearray]: Decoded lines and the rest of buffer
+    """
+    lines = []
+    buffer.extend(data)
+    while b'\n' in buffer:
+        line_bytes, buffer = buffer.split(b'\n', 1)
+        if line_bytes.endswith(b'\r'):
+            line_bytes = line_bytes[:-1]
+        lines.append(line_bytes.decode())
+    return lines, buffer
+
+
+def record_output(lines: int = 20000) -> bytes:
+    """Generates output of an engine that searches at high depth
+
+    Args:
+        lines (int): Number of info lines. Defaults to 20000
+
+    Returns:
+        bytes: Engine's output
+    """
+    pv = ' '.join(['e2e4', 'e7e5', 'g1f3', 'b8c6', 'f1b5', 'a7a6'] * 4)
+    output = [f'info depth {30 + i % 20} seldepth {40 + i % 20} multipv 1 '
+              f'score cp {i % 50} nodes {i * 1000} nps 1500000 '
+              f'hashfull {i % 1000} tbhits 0 time {i} pv {pv}\r\n'
+              for i in range(lines)]
+    output.append('bestmove e2e4 ponder e7e5\r\n')
+    return ''.join(output).encode()
+
+
+def benchmark(output: bytes, chunk_size: int = 65536,
+              dispatched: Iterable[bytes] = (b'bestmove',))\
+        -> Tuple[float, float]:
+    """Measures framing speed of recorded engine's output
+
+    Args:
+        output (bytes): Recorded output
+        chunk_size (int): Size of received chunks. Defaults to 65536
+        dispatched (Iterable[bytes]): Prefixes of lines that are decoded,\
+            other lines are skipped. Defaults to bestmove lines
+
+    Returns:
+        Tuple[float, float]: Re-slicing and view-based lines/sec
+    """
+    chunks = [output[i:i + chunk_size]
+              for i in range(0, len(output), chunk_size)]
+    count = output.count(b'\n')
+    prefixes = tuple(dispatched)
+
+    start = time.perf_counter()
+    buffer = bytearray()
+    for chunk in chunks:
+        _, buffer = split_lines(buffer, chunk)
+    baseline = count / (time.perf_counter() - start)
+
+    decoded = []
+
+    def dispatch(line: memoryview) -> None:
+        if line[:8].tobytes().startswith(prefixes):
+            decoded.append(str(line, 'utf-8'))
+
+    start = time.perf_counter()
+    line_buffer = LineBuffer()
+    for chunk in chunks:
+        line_buffer.feed(chunk, dispatch)
+    framed = count / (time.perf_counter() - start)
+
+    return baseline, framed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as file:
+            recorded = file.read()
+    else:
+        recorded = record_output()
+    baseline_speed, framed_speed = benchmark(recorded)
+    print(f'split and re-slice: {baseline_speed:.0f} lines/sec')
+    print(f'memoryview framing: {framed_speed:.0f} lines/sec')
@@ -0,0 +1,127 @@
+"""Module with utility functions that read games and positions\
+    from PGN and EPD files"""
+from typing import Iterator, Iterable, Optional, Tuple, Dict, List
+import re
+
+from game.model.headless_board import HeadlessBoard, START_FEN
+
+HEADER_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+TOKEN_PATTERN = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\(|\)|[^\s(){};]+')
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+
+class PGNGame:
+    """Class for a game read from a PGN file"""
+
+    def __init__(self, headers: Dict[str, str], moves: List[str]) -> None:
+        self.headers = headers
+        self.moves = moves
+
+    @property
+    def start_fen(self) -> str:
+        """Property that contains starting position of the game
+
+        Returns:
+            str: FEN string of a starting position
+        """
+        return self.headers.get('FEN', START_FEN)
+
+    @property
+    def chess960(self) -> bool:
+        """Property that tells whether game is Fisher random or not
+
+        Returns:
+            bool: True if game is Fisher random, False otherwise
+        """
+        variant = self.headers.get('Variant', '').lower()
+        return '960' in variant or 'fischer' in variant
+
+    def positions(self) -> Iterator[Tuple[str, Optional[str]]]:
+        """Replays game's moves
+
+        Raises:
+            IllegalMoveError: Raises when game has an illegal move
+
+        Yields:
+            Tuple[str, Optional[str]]: Position in FEN notation before\
+                each move and the move in a long algebraic notation.\
+                    The last position is yielded with None
+        """
+        board = HeadlessBoard(self.start_fen, self.chess960)
+        for san in self.moves:
+            move = board.parse_san(san)
+            yield board.fen(), board.to_uci(move)
+            board.push(move)
+        yield board.fen(), None
+
+
+def read_pgn(lines: Iterable[str]) -> Iterator[PGNGame]:
+    """Reads games from PGN text lazily, one game at a time
+
+    Args:
+        lines (Iterable[str]): Lines of PGN text, e.g. opened file
+
+    Yields:
+        PGNGame: Game with its headers and moves in SAN
+    """
+    headers: Dict[str, str] = {}
+    movetext: List[str] = []
+
+    for line in lines:
+        header = HEADER_PATTERN.match(line)
+        if header:
+            if movetext:
+                yield PGNGame(headers, _parse_movetext(' '.join(movetext)))
+                headers, movetext = {}, []
+            headers[header.group(1)] = header.group(2)
+        elif line.strip() and not line.startswith('%'):
+            movetext.append(line)
+
+    if headers or movetext:
+        yield PGNGame(headers, _parse_movetext(' '.join(movetext)))
+
+
+def read_epd(lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """Reads positions from EPD text lazily
+
+    Args:
+        lines (Iterable[str]): Lines of EPD text, e.g. opened file
+
+    Yields:
+        Tuple[str, Dict[str, str]]: Position in FEN notation\
+            and EPD operations, e.g. 'id' or 'bm'
+    """
+    for line in lines:
+        fields = line.split(maxsplit=4)
+        if len(fields) < 4:
+            continue
+
+        operations: Dict[str, str] = {}
+        rest = fields[4] if len(fields) > 4 else ''
+        for operation in rest.split(';'):
+            operation = operation.strip()
+            if operation:
+                name, _, value = operation.partition(' ')
+                operations[name] = value.strip().strip('"')
+
+        position = ' '.join(fields[:4])
+        halfmove = operations.pop('hmvc', '0')
+        fullmove = operations.pop('fmvn', '1')
+        yield f'{position} {halfmove} {fullmove}', operations
+
+
+def _parse_movetext(movetext: str) -> List[str]:
+    moves: List[str] = []
+    depth = 0
+    for token in TOKEN_PATTERN.findall(movetext):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+        elif depth or token[0] in '{;$' or token in RESULTS:
+            continue
+        else:
+            token = token.split('.')[-1]
+            if token:
+                moves.append(token)
+    return moves
@@ -0,0 +1,41 @@
+"""Module with utility functions that convert moves\
+    from and to long algebraic notation used by UCI"""
+from typing import Optional, Tuple
+
+FILES = 'abcdefgh'
+
+
+def to_uci(current_position: Tuple[int, int], new_position: Tuple[int, int],
+           promote: Optional[str] = None) -> str:
+    """Converts move on a chessboard to a long algebraic notation
+
+    Args:
+        current_position (Tuple[int, int]): Position of a piece to move
+        new_position (Tuple[int, int]): New position of a piece
+        promote (Optional[str]): Promotion piece's symbol. Defaults to None
+
+    Returns:
+        str: Move in a long algebraic notation
+    """
+    cur_file, cur_rank = current_position
+    new_file, new_rank = new_position
+    move = f'{FILES[cur_file]}{8 - cur_rank}{FILES[new_file]}{8 - new_rank}'
+    return move + (promote.lower() if promote else '')
+
+
+def from_uci(move: str) -> Tuple[Tuple[int, int], Tuple[int, int],
+                                 Optional[str]]:
+    """Converts move in a long algebraic notation to a move on a chessboard
+
+    Args:
+        move (str): Move in a long algebraic notation
+
+    Returns:
+        Tuple[Tuple[int, int], Tuple[int, int], Optional[str]]:\
+            Position of a piece to move, its new position\
+                and promotion piece's symbol
+    """
+    promote = move[4] if len(move) == 5 else None
+    cur_pos = FILES.index(move[0]), 8 - int(move[1])
+    new_pos = FILES.index(move[2]), 8 - int(move[3])
+    return cur_pos, new_pos, promote
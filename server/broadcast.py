@@ -0,0 +1,229 @@
+"""Module that describes broadcast of game's events to spectators"""
+from typing import Callable, Dict, List, Tuple
+import asyncio
+import logging
+import socket
+import time
+import sys
+
+from utils.framing import FrameReader, encode_frame
+from utils.codec import Codec, CODECS
+
+HIGH_WATER = 64 * 1024
+LOW_WATER = 16 * 1024
+MAX_LAG = 10.0
+SEND_BUFFER = 4096
+
+Snapshot = Callable[[], dict]
+
+
+class Subscriber:
+    """Class for a spectator's connection. Spectator that has more\
+        than HIGH_WATER bytes unsent starts lagging and gets no events\
+            until the buffer drops below LOW_WATER, then it gets\
+                a snapshot instead of skipped events"""
+
+    def __init__(self, writer: asyncio.StreamWriter, codec: Codec) -> None:
+        self.writer = writer
+        self.codec = codec
+        self.lagging_since: float | None = None
+
+    @property
+    def buffered(self) -> int:
+        """Property that contains size of unsent data
+
+        Returns:
+            int: Size in bytes
+        """
+        return self.writer.transport.get_write_buffer_size()
+
+
+class Broadcast:
+    """Class that fans out events of a game to its spectators.\
+        Every event is encoded once per encoding and written without\
+            waiting, so slow spectators don't stall the game"""
+
+    def __init__(self, snapshot: Snapshot, high_water: int = HIGH_WATER,
+                 low_water: int = LOW_WATER, max_lag: float = MAX_LAG) -> None:
+        self._snapshot = snapshot
+        self._high_water = high_water
+        self._low_water = low_water
+        self._max_lag = max_lag
+        self._subscribers: Dict[tuple, Subscriber] = {}
+        self._logger = logging.getLogger('broadcast')
+        self.resyncs = 0
+        self.drops = 0
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, client: tuple, writer: asyncio.StreamWriter,
+                  codec: Codec) -> None:
+        """Adds spectator
+
+        Args:
+            client (tuple): Spectator's address
+            writer (asyncio.StreamWriter): Spectator's StreamWriter
+            codec (Codec): Spectator's encoding
+        """
+        self._subscribers[client] = Subscriber(writer, codec)
+
+    def unsubscribe(self, client: tuple) -> None:
+        """Removes spectator
+
+        Args:
+            client (tuple): Spectator's address
+        """
+        self._subscribers.pop(client, None)
+
+    def publish(self, message: dict) -> List[tuple]:
+        """Sends event to all spectators
+
+        Args:
+            message (dict): Event
+
+        Returns:
+            List[tuple]: Spectators that lagged too long and were dropped
+        """
+        frames: Dict[str, bytes] = {}
+        dropped = []
+        now = time.monotonic()
+        for client, subscriber in self._subscribers.items():
+            buffered = subscriber.buffered
+            if subscriber.lagging_since is not None:
+                if buffered > self._low_water:
+                    if now - subscriber.lagging_since > self._max_lag:
+                        dropped.append(client)
+                    continue
+                self._resync(subscriber)
+                continue
+            if buffered > self._high_water:
+                subscriber.lagging_since = now
+                continue
+
+            subscriber.writer.write(_frame(frames, subscriber.codec, message))
+
+        for client in dropped:
+            self._drop(client)
+        return dropped
+
+    def close(self, message: dict) -> List[tuple]:
+        """Sends the last event to all spectators, lagging ones included,\
+            and removes them
+
+        Args:
+            message (dict): Last event, e.g. game's result
+
+        Returns:
+            List[tuple]: Removed spectators
+        """
+        frames: Dict[str, bytes] = {}
+        for subscriber in self._subscribers.values():
+            if not subscriber.writer.is_closing():
+                subscriber.writer.write(_frame(frames, subscriber.codec,
+                                               message))
+        clients = list(self._subscribers)
+        self._subscribers.clear()
+        return clients
+
+    def _resync(self, subscriber: Subscriber) -> None:
+        subscriber.lagging_since = None
+        snapshot = {"event": "snapshot", "data": self._snapshot()}
+        subscriber.writer.write(encode_frame(subscriber.codec.encode(
+            snapshot)))
+        self.resyncs += 1
+
+    def _drop(self, client: tuple) -> None:
+        subscriber = self._subscribers.pop(client)
+        subscriber.writer.transport.abort()
+        self.drops += 1
+        self._logger.info('Dropped slow spectator %s', client)
+
+
+def _frame(frames: Dict[str, bytes], codec: Codec, message: dict) -> bytes:
+    frame = frames.get(codec.name)
+    if frame is None:
+        frame = frames[codec.name] = encode_frame(codec.encode(message))
+    return frame
+
+
+async def benchmark(spectators: int = 2000, events: int = 1000,
+                    slow: int = 10) -> Tuple[float, int, int]:
+    """Measures time of broadcasting an event to many spectators\
+        over local connections, some of which don't read
+
+    Kernel's socket buffers are shrunk, so that spectators that don't read\
+        fall behind after a few events
+
+    Args:
+        spectators (int): Number of spectators. Defaults to 2000
+        events (int): Number of events. Defaults to 1000
+        slow (int): Spectators that never read. Defaults to 10
+
+    Returns:
+        Tuple[float, int, int]: Microseconds per event and spectator,\
+            dropped and resynced spectators
+    """
+    writers: List[asyncio.StreamWriter] = []
+    connected = asyncio.Event()
+
+    async def accept(_: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        sock = writer.get_extra_info('socket')
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        writers.append(writer)
+        if len(writers) == spectators:
+            connected.set()
+
+    async def watch(reader: asyncio.StreamReader) -> None:
+        frames = FrameReader(reader)
+        try:
+            while True:
+                await frames.read()
+        except ConnectionError:
+            pass
+
+    server = await asyncio.start_server(accept, '127.0.0.1', 0)
+    address = server.sockets[0].getsockname()[:2]
+    watchers = []
+    connections = []
+    for index in range(spectators):
+        reader, writer = await asyncio.open_connection(*address)
+        writer.get_extra_info('socket').setsockopt(
+            socket.SOL_SOCKET, socket.SO_RCVBUF, SEND_BUFFER)
+        connections.append(writer)
+        if index < slow:
+            writer.transport.pause_reading()
+        else:
+            watchers.append(asyncio.create_task(watch(reader)))
+    await connected.wait()
+
+    broadcast = Broadcast(lambda: {'moves': ['e2e4'] * 100},
+                          high_water=4096, low_water=1024, max_lag=0.0)
+    for index, writer in enumerate(writers):
+        broadcast.subscribe(('spectator', index), writer, CODECS['json'])
+
+    event = {'event': 'move', 'data': {'game': 1, 'index': 0, 'move': 'e2e4',
+                                       'clock': [0, 0]}}
+    elapsed = 0.0
+    for index in range(events):
+        event['data']['index'] = index
+        start = time.perf_counter()
+        broadcast.publish(event)
+        elapsed += time.perf_counter() - start
+        await asyncio.sleep(0)
+
+    for watcher in watchers:
+        watcher.cancel()
+    for writer in connections:
+        writer.close()
+    server.close()
+    return elapsed / events / spectators * 1e6, broadcast.drops,\
+        broadcast.resyncs
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    speed, drops, resyncs = asyncio.run(benchmark(count))
+    print(f'{count} spectators: {speed:.2f} us per event and spectator, '
+          f'dropped {drops}, resynced {resyncs}')
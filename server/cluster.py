@@ -0,0 +1,225 @@
+"""Module that describes workers of a multi-process server and channels\
+    between them. Connections are moved between workers by passing\
+        their file descriptors over unix datagram sockets"""
+from typing import Optional, Tuple, List
+import bisect
+import asyncio
+import socket
+import struct
+import json
+import zlib
+
+REPLICAS = 64
+MATCHMAKER = 0
+MAX_MESSAGE_SIZE = 65536
+SEND_RETRY_DELAY = 0.001
+HEADER = struct.Struct('>I')
+
+Message = Tuple[dict, bytes, List[int]]
+
+
+class Handoff(Exception):
+    """Error that raises when connection must be served by another worker"""
+
+    def __init__(self, worker: int) -> None:
+        super().__init__(f'Connection belongs to worker {worker}')
+        self.worker = worker
+
+
+class HashRing:
+    """Consistent hashing ring that maps keys to workers.\
+        Every worker has several points on the ring, so keys are spread\
+            evenly and only few keys move when number of workers changes"""
+
+    def __init__(self, workers: List[int], replicas: int = REPLICAS) -> None:
+        points = sorted((self._hash(f'{worker}:{replica}'), worker)
+                        for worker in workers for replica in range(replicas))
+        self._hashes = [point for point, _ in points]
+        self._workers = [worker for _, worker in points]
+
+    def owner(self, key: int | str) -> int:
+        """Gets worker that owns a key
+
+        Args:
+            key (int | str): Key, e.g. game's id
+
+        Returns:
+            int: Worker's index
+        """
+        index = bisect.bisect(self._hashes, self._hash(str(key)))
+        return self._workers[index % len(self._workers)]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return zlib.crc32(value.encode())
+
+
+class Cluster:
+    """Class for worker's view of the cluster: its index, ring of workers\
+        and channels to other workers and to the supervisor"""
+
+    def __init__(self, index: int, inbox: socket.socket,
+                 outboxes: List[socket.socket],
+                 supervisor: socket.socket) -> None:
+        self.index = index
+        self.size = len(outboxes)
+        self.ring = HashRing(list(range(self.size)))
+        self._inbox = inbox
+        self._outboxes = outboxes
+        self._supervisor = supervisor
+        for sock in (inbox, supervisor, *outboxes):
+            sock.setblocking(False)
+
+    @property
+    def is_matchmaker(self) -> bool:
+        """Property that indicates if worker pairs players
+
+        Returns:
+            bool: True if worker runs matchmaking, False otherwise
+        """
+        return self.index == MATCHMAKER
+
+    def owner(self, game_id: int) -> int:
+        """Gets worker that hosts a game
+
+        Args:
+            game_id (int): Game's id
+
+        Returns:
+            int: Worker's index
+        """
+        return self.ring.owner(game_id)
+
+    async def send(self, worker: int, header: dict, data: bytes = b'',
+                   fds: Optional[List[int]] = None) -> None:
+        """Sends message to another worker
+
+        Args:
+            worker (int): Worker's index
+            header (dict): Message's header
+            data (bytes): Raw data, e.g. unhandled queries.\
+                Defaults to b''
+            fds (Optional[List[int]]): File descriptors to pass.\
+                Defaults to None
+
+        Raises:
+            ValueError: If message is too large
+        """
+        await send_message(self._outboxes[worker], header, data, fds or [])
+
+    async def receive(self) -> Message:
+        """Waits for a message from another worker
+
+        Returns:
+            Message: Header, raw data and received file descriptors
+        """
+        return await receive_message(self._inbox)
+
+    def report(self, load: dict) -> None:
+        """Reports worker's load to the supervisor. Report is dropped\
+            if supervisor doesn't keep up
+
+        Args:
+            load (dict): Worker's load
+        """
+        try:
+            self._supervisor.send(pack_message({'worker': self.index,
+                                                **load}, b''))
+        except BlockingIOError:
+            pass
+
+
+def pack_message(header: dict, data: bytes) -> bytes:
+    """Packs message into a datagram
+
+    Args:
+        header (dict): Message's header
+        data (bytes): Raw data
+
+    Raises:
+        ValueError: If message is too large
+
+    Returns:
+        bytes: Datagram
+    """
+    encoded = json.dumps(header).encode()
+    message = HEADER.pack(len(encoded)) + encoded + data
+    if len(message) > MAX_MESSAGE_SIZE:
+        raise ValueError(f'Message of {len(message)} bytes is too large')
+    return message
+
+
+def unpack_message(message: bytes) -> Tuple[dict, bytes]:
+    """Unpacks datagram packed with pack_message
+
+    Args:
+        message (bytes): Datagram
+
+    Returns:
+        Tuple[dict, bytes]: Header and raw data
+    """
+    (size,) = HEADER.unpack_from(message)
+    end = HEADER.size + size
+    return json.loads(message[HEADER.size:end]), message[end:]
+
+
+async def send_message(sock: socket.socket, header: dict, data: bytes,
+                       fds: List[int]) -> None:
+    """Sends datagram with file descriptors, waiting while receiver's\
+        queue is full
+
+    Args:
+        sock (socket.socket): Non-blocking unix datagram socket
+        header (dict): Message's header
+        data (bytes): Raw data
+        fds (List[int]): File descriptors to pass
+    """
+    message = pack_message(header, data)
+    while True:
+        try:
+            socket.send_fds(sock, [message], fds)
+            return
+        except BlockingIOError:
+            await asyncio.sleep(SEND_RETRY_DELAY)
+
+
+async def receive_message(sock: socket.socket) -> Message:
+    """Waits for datagram with file descriptors
+
+    Args:
+        sock (socket.socket): Non-blocking unix datagram socket
+
+    Returns:
+        Message: Header, raw data and received file descriptors
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            message, fds, _, _ = socket.recv_fds(sock, MAX_MESSAGE_SIZE, 4)
+            header, data = unpack_message(message)
+            return header, data, fds
+        except BlockingIOError:
+            readable = loop.create_future()
+            loop.add_reader(sock, lambda: readable.done() or
+                            readable.set_result(None))
+            try:
+                await readable
+            finally:
+                loop.remove_reader(sock)
+
+
+def channels(workers: int) -> Tuple[List[socket.socket],
+                                    List[socket.socket]]:
+    """Creates inboxes of workers and of the supervisor.\
+        Must be called before workers are forked
+
+    Args:
+        workers (int): Number of workers
+
+    Returns:
+        Tuple[List[socket.socket], List[socket.socket]]: Receiving\
+            and sending ends, the last pair belongs to the supervisor
+    """
+    pairs = [socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+             for _ in range(workers + 1)]
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
@@ -0,0 +1,332 @@
+"""Module that describes append-only log of hosted games, which lets\
+    the server recover games after a restart"""
+from typing import Callable, Iterable, Optional, TextIO, Tuple, Dict, List
+import itertools
+import asyncio
+import logging
+import random
+import json
+import time
+import sys
+import os
+
+from game_session import GameSession, GameError, random_games
+
+FLUSH_INTERVAL = 0.05
+SNAPSHOT_INTERVAL = 300.0
+SNAPSHOT_RECORDS = 1000000
+SNAPSHOT_CHUNK = 1000
+
+Sessions = Callable[[], Iterable[GameSession]]
+
+
+class GameLog:
+    """Class for a directory with log segments and snapshots of games.
+
+    Records are buffered and written with one fsync per batch by another\
+        thread, so the event loop never waits for the disk. Games that were\
+            played for less than FLUSH_INTERVAL before a crash may lose\
+                their last moves.
+
+    Snapshot is started by switching to a new segment, then states\
+        of games are collected in chunks between other tasks.\
+            It's fuzzy: a game may be stored with moves that are also\
+                in the new segment, so moves are replayed by their index"""
+
+    def __init__(self, directory: str, flush_interval: float = FLUSH_INTERVAL,
+                 snapshot_interval: float = SNAPSHOT_INTERVAL,
+                 snapshot_records: int = SNAPSHOT_RECORDS) -> None:
+        self._directory = directory
+        self._flush_interval = flush_interval
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_records = snapshot_records
+        self._pending: List[str] = []
+        self._records = 0
+        self._segment = 0
+        self._next_game = 1
+        self._file: Optional[TextIO] = None
+        self._logger = logging.getLogger('game_log')
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, record: dict) -> None:
+        """Adds record to the log. Record is written with the next batch
+
+        Args:
+            record (dict): Record with 'op' and 'game' keys
+        """
+        self._pending.append(json.dumps(record))
+        self._next_game = max(self._next_game, record['game'] + 1)
+
+    def start(self, session: GameSession) -> None:
+        """Logs start of a game
+
+        Args:
+            session (GameSession): Started game
+        """
+        self.append({'op': 'start', **session.state()})
+
+    def move(self, event: dict) -> None:
+        """Logs a move
+
+        Args:
+            event (dict): Data of move event
+        """
+        self.append({'op': 'move', **event})
+
+    def end(self, game_id: int) -> None:
+        """Logs end of a game
+
+        Args:
+            game_id (int): Game's id
+        """
+        self.append({'op': 'end', 'game': game_id})
+
+    def reserve(self, game_id: int) -> None:
+        """Logs id of a game that is hosted elsewhere, so that ids aren't\
+            reused after recovery
+
+        Args:
+            game_id (int): Game's id
+        """
+        self.append({'op': 'id', 'game': game_id})
+
+    def recover(self) -> Tuple[List[GameSession], int]:
+        """Loads the latest snapshot and replays segments written after it.\
+            Must be called before the log is run
+
+        Returns:
+            Tuple[List[GameSession], int]: Unfinished games and next free\
+                game's id
+        """
+        snapshots = self._files('snapshot')
+        segments = self._files('log')
+        states: Dict[int, dict] = {}
+        sessions: Dict[int, GameSession] = {}
+        base = 0
+        if snapshots:
+            base = snapshots[-1]
+            with open(self._path('snapshot', base), encoding='utf-8') as file:
+                header = json.loads(file.readline())
+                self._next_game = header['next_game']
+                for line in file:
+                    state = json.loads(line)
+                    states[state['game']] = state
+
+        for segment in segments:
+            if segment >= base:
+                self._replay(segment, states, sessions)
+
+        for game_id, state in states.items():
+            sessions[game_id] = GameSession.restore(self._players(state))
+        self._segment = max([base, *segments]) + 1
+        self._logger.info('Recovered %s games from %s segments',
+                          len(sessions), len(segments))
+        return list(sessions.values()), self._next_game
+
+    async def run(self, sessions: Sessions) -> None:
+        """Writes batches of records and snapshots until cancelled
+
+        Args:
+            sessions (Sessions): Callable that gets hosted games
+        """
+        await asyncio.to_thread(self._open, self._segment)
+        last_snapshot = time.monotonic()
+        try:
+            while True:
+                await asyncio.sleep(self._flush_interval)
+                await self.flush()
+                if self._records >= self._snapshot_records or\
+                        time.monotonic() - last_snapshot >=\
+                        self._snapshot_interval:
+                    await self.snapshot(sessions)
+                    last_snapshot = time.monotonic()
+        finally:
+            await self.flush()
+            self._file.close()
+
+    async def flush(self) -> None:
+        """Writes pending records and waits until they are on disk"""
+        if not self._pending:
+            return
+        lines, self._pending = self._pending, []
+        self._records += len(lines)
+        await asyncio.to_thread(self._write, lines)
+
+    async def snapshot(self, sessions: Sessions) -> None:
+        """Stores states of hosted games, then removes older segments\
+            and snapshots
+
+        Args:
+            sessions (Sessions): Callable that gets hosted games
+        """
+        await self.flush()
+        segment = self._segment + 1
+        await asyncio.to_thread(self._open, segment)
+        self._records = 0
+
+        start = time.perf_counter()
+        lines = [json.dumps({'next_game': self._next_game})]
+        for index, session in enumerate(list(sessions())):
+            if not session.finished:
+                lines.append(json.dumps(session.state()))
+            if index % SNAPSHOT_CHUNK == SNAPSHOT_CHUNK - 1:
+                await asyncio.sleep(0)
+        await asyncio.to_thread(self._write_snapshot, segment, lines)
+        self._logger.info('Snapshot of %s games took %.3f s',
+                          len(lines) - 1, time.perf_counter() - start)
+
+    def _replay(self, segment: int, states: Dict[int, dict],
+                sessions: Dict[int, GameSession]) -> None:
+        with open(self._path('log', segment), encoding='utf-8') as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    self._logger.warning('Torn record in segment %s',
+                                         segment)
+                    break
+                game_id = record['game']
+                self._next_game = max(self._next_game, game_id + 1)
+                match record['op']:
+                    case 'start':
+                        sessions.pop(game_id, None)
+                        states[game_id] = record
+                    case 'move':
+                        self._replay_move(record, states, sessions)
+                    case 'end':
+                        states.pop(game_id, None)
+                        sessions.pop(game_id, None)
+
+    def _replay_move(self, record: dict, states: Dict[int, dict],
+                     sessions: Dict[int, GameSession]) -> None:
+        game_id = record['game']
+        session = sessions.get(game_id)
+        if session is None:
+            state = states.get(game_id)
+            if state is None or record['index'] <= len(state['moves']):
+                return
+            session = sessions[game_id] = GameSession.restore(
+                self._players(state))
+            del states[game_id]
+        if record['index'] != len(session.moves) + 1:
+            return
+        try:
+            session.replay(record['move'], record['clock'])
+        except GameError as exc:
+            self._logger.error('Could not replay game %s: %s', game_id, exc)
+            del sessions[game_id]
+
+    @staticmethod
+    def _players(state: dict) -> dict:
+        white, black = state['white'], state['black']
+        return {**state,
+                'white': tuple(white) if isinstance(white, list) else white,
+                'black': tuple(black) if isinstance(black, list) else black}
+
+    def _files(self, prefix: str) -> List[int]:
+        numbers = []
+        for name in os.listdir(self._directory):
+            kind, _, number = name.partition('.')
+            if kind == prefix and number.isdigit():
+                numbers.append(int(number))
+        return sorted(numbers)
+
+    def _path(self, prefix: str, number: int) -> str:
+        return os.path.join(self._directory, f'{prefix}.{number:08d}')
+
+    def _open(self, segment: int) -> None:
+        previous = self._file
+        self._file = open(self._path('log', segment), mode='a',
+                          encoding='utf-8')
+        self._segment = segment
+        self._sync_directory()
+        if previous:
+            previous.close()
+
+    def _write(self, lines: List[str]) -> None:
+        self._file.write('\n'.join(lines) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_snapshot(self, segment: int, lines: List[str]) -> None:
+        path = self._path('snapshot', segment)
+        with open(f'{path}.tmp', mode='w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(f'{path}.tmp', path)
+        self._sync_directory()
+
+        for prefix in ('log', 'snapshot'):
+            for number in self._files(prefix):
+                if number < segment:
+                    os.remove(self._path(prefix, number))
+
+    def _sync_directory(self) -> None:
+        fd = os.open(self._directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+async def benchmark(directory: str, games: int = 100000,
+                    templates: int = 200) -> Tuple[float, int, int]:
+    """Measures recovery of games from a snapshot and a segment that\
+        continues a tenth of them
+
+    Args:
+        directory (str): Empty directory for the log
+        games (int): Number of games. Defaults to 100000
+        templates (int): Number of distinct random games. Defaults to 200
+
+    Returns:
+        Tuple[float, int, int]: Seconds of recovery, recovered games\
+            and replayed moves
+    """
+    states = []
+    for moves in random_games(templates, max_plies=80):
+        ply = len(moves) // 2
+        session = GameSession(0, 'white', 'black', '5+3')
+        for index, move in enumerate(moves[:ply]):
+            session.play(('white', 'black')[index % 2], move)
+        states.append((session.state(), moves[ply:ply + 4]))
+
+    sessions = []
+    tails = []
+    for game_id, (state, moves) in zip(range(1, games + 1),
+                                       itertools.cycle(states)):
+        sessions.append(GameSession.restore({
+            **state, 'game': game_id, 'white': ('127.0.0.1', 2 * game_id),
+            'black': ('127.0.0.1', 2 * game_id + 1)}))
+        if random.random() < 0.1:
+            tails.append((sessions[-1], moves))
+
+    log = GameLog(directory, snapshot_interval=float('inf'))
+    task = asyncio.create_task(log.run(lambda: sessions))
+    await log.snapshot(lambda: sessions)
+    replayed = 0
+    for session, moves in tails:
+        players = session.white, session.black
+        for move in moves:
+            player = players[0 if session.board.white_to_move else 1]
+            log.move(session.play(player, move))
+            replayed += 1
+            if session.finished:
+                break
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    start = time.perf_counter()
+    recovered, _ = GameLog(directory).recover()
+    elapsed = time.perf_counter() - start
+    return elapsed, len(recovered), replayed
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    path = sys.argv[2] if len(sys.argv) > 2 else 'game_log_benchmark'
+    seconds, recovered_games, replayed_moves = asyncio.run(
+        benchmark(path, count))
+    print(f'{recovered_games} games recovered in {seconds:.2f} s, '
+          f'{replayed_moves} replayed moves')
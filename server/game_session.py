@@ -0,0 +1,403 @@
+"""Module that describes game sessions hosted by the server"""
+from typing import Hashable, Optional, Tuple, List
+import secrets
+import random
+import time
+import sys
+
+from game.model.headless_board import HeadlessBoard, IllegalMoveError, \
+    START_FEN
+
+
+class GameError(Exception):
+    """Error that raises when move can't be played in a game session"""
+
+
+def parse_time_control(time_control: str) -> Tuple[int, int]:
+    """Parses time control
+
+    Args:
+        time_control (str): Minutes and increment in seconds, e.g. '3+2'
+
+    Raises:
+        ValueError: If time control is invalid
+
+    Returns:
+        Tuple[int, int]: Initial time and increment in milliseconds
+    """
+    minutes, _, increment = time_control.partition('+')
+    initial = int(float(minutes) * 60000)
+    increment_ms = int(float(increment or 0) * 1000)
+    if initial <= 0 or increment_ms < 0:
+        raise ValueError(f'Invalid time control: {time_control}')
+    return initial, increment_ms
+
+
+def first_game_id() -> int:
+    """Gets id of the first game created by a worker. Ids start from\
+        worker's start time in microseconds, so that a restarted worker\
+            doesn't reuse ids of games that are still hosted elsewhere
+
+    Returns:
+        int: Game's id
+    """
+    return time.time_ns() // 1000
+
+
+def new_token(game_id: int) -> str:
+    """Creates player's session token. Token starts with game's id,\
+        so that any worker can find the game
+
+    Args:
+        game_id (int): Game's id
+
+    Returns:
+        str: Token
+    """
+    return f'{game_id}.{secrets.token_urlsafe(16)}'
+
+
+def token_game(token: str) -> int:
+    """Gets game's id from a session token
+
+    Args:
+        token (str): Token
+
+    Raises:
+        ValueError: If token is invalid
+
+    Returns:
+        int: Game's id
+    """
+    game_id, _, secret = token.partition('.')
+    if not secret:
+        raise ValueError(f'Invalid token: {token}')
+    return int(game_id)
+
+
+class GameSession:
+    """Class for a game hosted by the server. Session holds\
+        authoritative position and clocks, validates moves of players\
+            and builds events that are relayed to them"""
+
+    def __init__(self, game_id: int, white: Hashable, black: Hashable,
+                 time_control: str, fen: str = START_FEN,
+                 tokens: Optional[Tuple[str, str]] = None) -> None:
+        self.game_id = game_id
+        self.white = white
+        self.black = black
+        self.time_control = time_control
+        self.tokens = tokens or (new_token(game_id), new_token(game_id))
+        self.moves: List[str] = []
+        self._board: Optional[HeadlessBoard] = None
+        self._base_fen: Optional[str] = fen
+        self._base_ply = 0
+        self.result: Optional[Tuple[str, str]] = None
+        initial, self._increment = parse_time_control(time_control)
+        self._clock = [initial, initial]
+        self._last_move_time = time.monotonic()
+
+    @property
+    def board(self) -> HeadlessBoard:
+        """Property that contains authoritative position. Board is built\
+            when it's needed first, so restored games that nobody plays\
+                cost nothing
+
+        Raises:
+            GameError: If restored moves are illegal
+
+        Returns:
+            HeadlessBoard: Board
+        """
+        if self._board is None:
+            board = HeadlessBoard(self._base_fen)
+            try:
+                for move in self.moves[self._base_ply:]:
+                    board.push_uci(move)
+            except IllegalMoveError as exc:
+                raise GameError(str(exc)) from exc
+            self._board = board
+        return self._board
+
+    @property
+    def finished(self) -> bool:
+        """Property that indicates if game is over
+
+        Returns:
+            bool: True if game is over, False otherwise
+        """
+        return self.result is not None
+
+    @property
+    def white_to_move(self) -> bool:
+        """Property that tells whose turn it is. Board isn't built for it
+
+        Returns:
+            bool: True if it's white's turn, False otherwise
+        """
+        if self._board is not None:
+            return self._board.white_to_move
+        white = self._base_fen.split()[1] == 'w'
+        return white == ((len(self.moves) - self._base_ply) % 2 == 0)
+
+    def opponent(self, player: Hashable) -> Hashable:
+        """Gets opponent of a player
+
+        Args:
+            player (Hashable): Player's id
+
+        Returns:
+            Hashable: Opponent's id
+        """
+        return self.black if player == self.white else self.white
+
+    def player(self, token: str) -> Optional[Hashable]:
+        """Gets player by session token
+
+        Args:
+            token (str): Token
+
+        Returns:
+            Optional[Hashable]: Player's id if token is valid, None otherwise
+        """
+        for player, valid in zip((self.white, self.black), self.tokens):
+            if secrets.compare_digest(token.encode(), valid.encode()):
+                return player
+        return None
+
+    def claim(self, token: str, player: Hashable) -> Hashable:
+        """Moves player's side to a new id, e.g. when player reconnects
+
+        Args:
+            token (str): Player's session token
+            player (Hashable): Player's new id
+
+        Raises:
+            GameError: If token is invalid
+
+        Returns:
+            Hashable: Player's previous id
+        """
+        previous = self.player(token)
+        if previous is None:
+            raise GameError('Invalid token')
+        if token == self.tokens[0]:
+            self.white = player
+        else:
+            self.black = player
+        return previous
+
+    def clock(self, now: Optional[float] = None) -> List[int]:
+        """Gets remaining time of players, including time spent\
+            on the current move
+
+        Args:
+            now (Optional[float]): Current time of monotonic clock.\
+                Defaults to None
+
+        Returns:
+            List[int]: White's and black's time in milliseconds
+        """
+        clock = list(self._clock)
+        if not self.finished:
+            now = time.monotonic() if now is None else now
+            side = 0 if self.white_to_move else 1
+            elapsed = int((now - self._last_move_time) * 1000)
+            clock[side] = max(clock[side] - elapsed, 0)
+        return clock
+
+    def flag(self, now: Optional[float] = None) -> bool:
+        """Ends game with a loss of the player to move if player's time\
+            is over
+
+        Args:
+            now (Optional[float]): Current time of monotonic clock.\
+                Defaults to None
+
+        Returns:
+            bool: True if game ended on time, False otherwise
+        """
+        if self.finished:
+            return False
+        white = self.white_to_move
+        side = 0 if white else 1
+        if self.clock(now)[side]:
+            return False
+        self._clock[side] = 0
+        self.result = ('0-1' if white else '1-0'), 'time forfeit'
+        return True
+
+    def play(self, player: Hashable, move: str,
+             now: Optional[float] = None) -> dict:
+        """Validates and makes a move of a player
+
+        Args:
+            player (Hashable): Player's id
+            move (str): Move in a long algebraic notation
+            now (Optional[float]): Current time of monotonic clock.\
+                Defaults to None
+
+        Raises:
+            GameError: If game is over, it's not player's turn,\
+                player's time is over or move is illegal
+
+        Returns:
+            dict: Data of move event
+        """
+        if self.finished:
+            raise GameError('Game is over')
+        white = self.board.white_to_move
+        if player != (self.white if white else self.black):
+            raise GameError('Not your turn')
+
+        now = time.monotonic() if now is None else now
+        if self.flag(now):
+            raise GameError('Time is over')
+        side = 0 if white else 1
+        remaining = self.clock(now)[side]
+
+        try:
+            self.board.push_uci(move)
+        except IllegalMoveError as exc:
+            raise GameError(str(exc)) from exc
+
+        self._clock[side] = remaining + self._increment
+        self._last_move_time = now
+        self._append(move)
+        return {'game': self.game_id, 'index': len(self.moves),
+                'move': move, 'clock': list(self._clock)}
+
+    def replay(self, move: str, clock: List[int]) -> None:
+        """Makes a move that was already validated, e.g. when game\
+            is recovered from a log
+
+        Args:
+            move (str): Move in a long algebraic notation
+            clock (List[int]): White's and black's time after the move
+
+        Raises:
+            GameError: If move is illegal
+        """
+        try:
+            self.board.push_uci(move)
+        except IllegalMoveError as exc:
+            raise GameError(str(exc)) from exc
+        self._clock = list(clock)
+        self._last_move_time = time.monotonic()
+        self._append(move)
+
+    def state(self) -> dict:
+        """Gets state of the game that can be stored and restored.\
+            Position is stored as of the last capture or pawn move,\
+                so that restored board can still detect repetitions
+
+        Returns:
+            dict: Game's id, players, time control, session tokens,\
+                base position, moves and clocks after the last move
+        """
+        if self._base_fen is None:
+            board = self.board
+            undone = [board.pop()
+                      for _ in range(len(self.moves) - self._base_ply)]
+            self._base_fen = board.fen()
+            for move in reversed(undone):
+                board.push(move)
+        return {'game': self.game_id, 'white': self.white,
+                'black': self.black, 'time_control': self.time_control,
+                'tokens': list(self.tokens), 'fen': self._base_fen,
+                'ply': self._base_ply, 'moves': list(self.moves),
+                'clock': list(self._clock)}
+
+    @classmethod
+    def restore(cls, state: dict) -> 'GameSession':
+        """Creates session from a state. Clocks are stopped while game\
+            isn't hosted, so time starts running again from now
+
+        Args:
+            state (dict): State created by GameSession.state
+
+        Returns:
+            GameSession: Restored session
+        """
+        tokens = state.get('tokens')
+        session = cls(state['game'], state['white'], state['black'],
+                      state['time_control'], state['fen'],
+                      tuple(tokens) if tokens else None)
+        session.moves = list(state['moves'])
+        session._base_ply = state['ply']
+        session._clock = list(state['clock'])
+        return session
+
+    def _append(self, move: str) -> None:
+        self.moves.append(move)
+        if not self.board.halfmove_clock:
+            self._base_fen = None
+            self._base_ply = len(self.moves)
+        self.result = self.board.outcome()
+
+    def snapshot(self) -> dict:
+        """Gets state of the game for a spectator that joins or falls behind
+
+        Returns:
+            dict: Game's id, moves and clocks
+        """
+        return {'game': self.game_id, 'moves': list(self.moves),
+                'clock': self.clock()}
+
+    def resign(self, player: Hashable) -> None:
+        """Ends game with a loss of a player, e.g. when player leaves
+
+        Args:
+            player (Hashable): Player's id
+        """
+        if not self.finished:
+            self.result = ('0-1' if player == self.white else '1-0'),\
+                'abandonment'
+
+
+def random_games(count: int, max_plies: int = 200) -> List[List[str]]:
+    """Plays random legal games
+
+    Args:
+        count (int): Number of games
+        max_plies (int): Maximum length of a game. Defaults to 200
+
+    Returns:
+        List[List[str]]: Moves of every game
+    """
+    games = []
+    for _ in range(count):
+        board = HeadlessBoard()
+        for _ in range(max_plies):
+            legal_moves = board.legal_moves()
+            if not legal_moves or board.outcome():
+                break
+            board.push(random.choice(legal_moves))
+        games.append(board.moves)
+    return games
+
+
+def benchmark(games: List[List[str]]) -> float:
+    """Measures how many moves sessions validate and apply
+
+    Args:
+        games (List[List[str]]): Moves of every game
+
+    Returns:
+        float: Moves/sec
+    """
+    sessions = [GameSession(index, 'white', 'black', '60+0')
+                for index in range(len(games))]
+    count = sum(len(moves) for moves in games)
+    start = time.perf_counter()
+    for session, moves in zip(sessions, games):
+        players = ('white', 'black')
+        for index, move in enumerate(moves):
+            session.play(players[index % 2], move)
+    return count / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    speed = benchmark(random_games(number))
+    print(f'{number} games: {speed:.0f} moves/sec')
@@ -1,9 +1,16 @@
 from typing import Tuple, Dict
+from pathlib import Path
 import logging
 import asyncio
 import json
+import sys
 
+CLIENT_DIR = Path(__file__).resolve().parent.parent / 'client'
+sys.path.append(str(CLIENT_DIR))
+
+# pylint: disable=wrong-import-position
 from server import ChessServer
+from supervisor import Supervisor
 
 
 async def main():
@@ -13,6 +20,11 @@ async def main():
         server: Dict[str, str | int] = data['server']
         server_address: Tuple[str, int] = server['host'], server['port']
         recv_size: int = server['recv_size']
+        max_frame_size: int = server['max_frame_size']
+        workers: int = server['workers']
+        metrics_file: str | None = server.get('metrics_file')
+        metrics_interval: float = server.get('metrics_interval', 10.0)
+        game_log: str | None = server.get('game_log')
 
         log_config: Dict[str, str] = data['log_config']
         log_file: str = log_config['log_file']
@@ -25,7 +37,16 @@ async def main():
                         datefmt=log_datefmt,
                         level=logging.DEBUG)
 
-    chess_server = ChessServer(server_address, recv_size)
+    if workers > 1:
+        supervisor = Supervisor(server_address, recv_size, max_frame_size,
+                                workers, metrics_file, metrics_interval,
+                                game_log)
+        await supervisor.run()
+        return
+
+    chess_server = ChessServer(server_address, recv_size,
+                               max_frame_size, None, metrics_file,
+                               metrics_interval, game_log)
     await chess_server.start_server()
 
 if __name__ == '__main__':
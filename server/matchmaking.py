@@ -0,0 +1,194 @@
+"""Module that describes matchmaking of players waiting for a game"""
+from typing import Callable, Optional, Tuple, Dict, Deque, Hashable
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+import asyncio
+import logging
+import time
+
+BUCKET_SIZE = 100
+BASE_WINDOW = 100
+WIDEN_RATE = 50
+MAX_WINDOW = 1000
+WIDEN_INTERVAL = 1.0
+
+
+@dataclass(slots=True)
+class Ticket:
+    """Class for a player waiting for a game"""
+    player: Hashable
+    rating: int
+    time_control: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def window(self, now: float) -> int:
+        """Gets rating difference that player accepts after waiting
+
+        Args:
+            now (float): Current time of monotonic clock
+
+        Returns:
+            int: Maximum rating difference
+        """
+        waited = now - self.enqueued_at
+        return min(BASE_WINDOW + int(WIDEN_RATE * waited), MAX_WINDOW)
+
+
+Match = Tuple[Ticket, Ticket]
+MatchCallback = Callable[[Ticket, Ticket], None]
+Bucket = OrderedDict[Hashable, Ticket]
+
+
+class Matchmaker:
+    """Class that pairs players by time control and rating.\
+        Players are kept in rating buckets, so enqueue checks only\
+            a few neighbouring buckets instead of scanning all players.\
+                Windows of waiting players widen over time"""
+
+    def __init__(self, on_match: MatchCallback,
+                 bucket_size: int = BUCKET_SIZE) -> None:
+        self._on_match = on_match
+        self._bucket_size = bucket_size
+        self._queues: Dict[str, Dict[int, Bucket]] = {}
+        self._tickets: Dict[Hashable, Ticket] = {}
+        self._match_times: Deque[float] = deque(maxlen=1000)
+        self._matches = 0
+        self._logger = logging.getLogger('matchmaking')
+
+    @property
+    def depth(self) -> int:
+        """Property that contains number of waiting players
+
+        Returns:
+            int: Number of waiting players
+        """
+        return len(self._tickets)
+
+    def enqueue(self, player: Hashable, rating: int,
+                time_control: str) -> Optional[Match]:
+        """Pairs player with a waiting player or puts player in the queue
+
+        Args:
+            player (Hashable): Player's id
+            rating (int): Player's rating
+            time_control (str): Time control, e.g. '3+2'
+
+        Returns:
+            Optional[Match]: Tickets of paired players if player\
+                was paired at once, None otherwise
+        """
+        self.cancel(player)
+        ticket = Ticket(player, rating, time_control)
+        buckets = self._queues.setdefault(time_control, {})
+        now = time.monotonic()
+
+        opponent = self._find_opponent(buckets, ticket, ticket.window(now))
+        if opponent:
+            return self._match(buckets, opponent, ticket, now)
+
+        index = rating // self._bucket_size
+        buckets.setdefault(index, OrderedDict())[player] = ticket
+        self._tickets[player] = ticket
+        return None
+
+    def cancel(self, player: Hashable) -> bool:
+        """Removes player from the queue
+
+        Args:
+            player (Hashable): Player's id
+
+        Returns:
+            bool: True if player was waiting, False otherwise
+        """
+        ticket = self._tickets.pop(player, None)
+        if not ticket:
+            return False
+        buckets = self._queues[ticket.time_control]
+        self._remove(buckets, ticket)
+        return True
+
+    def widen(self) -> int:
+        """Retries pairing of the longest waiting player of every bucket\
+            with windows widened by waiting time
+
+        Returns:
+            int: Number of new matches
+        """
+        now = time.monotonic()
+        matches = 0
+        for buckets in self._queues.values():
+            for index in sorted(buckets):
+                bucket = buckets.get(index)
+                if not bucket:
+                    continue
+                ticket = next(iter(bucket.values()))
+                opponent = self._find_opponent(buckets, ticket,
+                                               ticket.window(now))
+                if opponent:
+                    self._remove(buckets, ticket)
+                    del self._tickets[ticket.player]
+                    self._match(buckets, opponent, ticket, now)
+                    matches += 1
+        return matches
+
+    async def run(self, interval: float = WIDEN_INTERVAL) -> None:
+        """Widens windows of waiting players periodically
+
+        Args:
+            interval (float): Time between retries in seconds.\
+                Defaults to 1.0
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.widen()
+
+    def stats(self) -> Dict[str, int | float]:
+        """Gets queue depth and time-to-match statistics
+
+        Returns:
+            Dict[str, int | float]: Number of waiting players, matches\
+                and median and 95th percentile of time to match in seconds
+        """
+        times = sorted(self._match_times)
+        return {
+            'waiting': self.depth,
+            'matches': self._matches,
+            'match_time_p50': times[len(times) // 2] if times else 0.0,
+            'match_time_p95': times[int(len(times) * 0.95)] if times
+            else 0.0
+        }
+
+    def _find_opponent(self, buckets: Dict[int, Bucket], ticket: Ticket,
+                       window: int) -> Optional[Ticket]:
+        index = ticket.rating // self._bucket_size
+        reach = window // self._bucket_size + 1
+        for distance in range(reach + 1):
+            for neighbour in {index - distance, index + distance}:
+                bucket = buckets.get(neighbour)
+                if not bucket:
+                    continue
+                for opponent in bucket.values():
+                    if opponent is not ticket and\
+                            abs(opponent.rating - ticket.rating) <= window:
+                        return opponent
+        return None
+
+    def _match(self, buckets: Dict[int, Bucket], opponent: Ticket,
+               ticket: Ticket, now: float) -> Match:
+        self._remove(buckets, opponent)
+        del self._tickets[opponent.player]
+        for matched in (opponent, ticket):
+            self._match_times.append(now - matched.enqueued_at)
+        self._matches += 1
+        self._logger.info('Matched %s (%s) with %s (%s), %s',
+                          opponent.player, opponent.rating, ticket.player,
+                          ticket.rating, ticket.time_control)
+        self._on_match(opponent, ticket)
+        return opponent, ticket
+
+    def _remove(self, buckets: Dict[int, Bucket], ticket: Ticket) -> None:
+        index = ticket.rating // self._bucket_size
+        bucket = buckets[index]
+        del bucket[ticket.player]
+        if not bucket:
+            del buckets[index]
@@ -0,0 +1,290 @@
+"""Module with in-process metrics: counters, gauges and histograms,\
+    which can be exported as a dict or in OpenMetrics text format"""
+from typing import Callable, Optional, Iterable, Tuple, Dict, List
+import bisect
+import asyncio
+import math
+import os
+import time
+
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+DURATION_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 7200)
+WRITE_INTERVAL = 10.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Class for a value that only grows"""
+    kind = 'counter'
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        """Increases counter
+
+        Args:
+            amount (int): Increment. Defaults to 1
+        """
+        self.value += amount
+
+    def samples(self, name: str) -> List[Tuple[str, Labels, float]]:
+        """Gets samples of OpenMetrics exposition
+
+        Args:
+            name (str): Name of metric
+
+        Returns:
+            List[Tuple[str, Labels, float]]: Names, extra labels and values
+        """
+        return [(f'{name}_total', (), self.value)]
+
+    def export(self) -> int | float | dict:
+        """Gets value for stats query
+
+        Returns:
+            int | float | dict: Value
+        """
+        return self.value
+
+
+class Gauge(Counter):
+    """Class for a value that goes up and down. Value can be read\
+        from a callback at export time, so it costs nothing to keep"""
+    kind = 'gauge'
+
+    def __init__(self, callback: Optional[Callable[[], float]] = None)\
+            -> None:
+        super().__init__()
+        self._callback = callback
+
+    def set(self, value: float) -> None:
+        """Sets value
+
+        Args:
+            value (float): New value
+        """
+        self.value = value
+
+    def samples(self, name: str) -> List[Tuple[str, Labels, float]]:
+        return [(name, (), self.export())]
+
+    def export(self) -> int | float | dict:
+        return self._callback() if self._callback else self.value
+
+
+class Histogram:
+    """Class for distribution of observed values in fixed buckets"""
+    kind = 'histogram'
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        self._bounds = sorted(buckets)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Records value
+
+        Args:
+            value (float): Observed value, e.g. duration in seconds
+        """
+        self._counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, share: float) -> float:
+        """Estimates quantile by upper bound of its bucket
+
+        Args:
+            share (float): Quantile, e.g. 0.99
+
+        Returns:
+            float: Upper bound of the bucket, inf if it's above all buckets,\
+                0.0 if nothing was observed
+        """
+        if not self.count:
+            return 0.0
+        rank = share * self.count
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            if seen >= rank and seen:
+                return bound
+        return float('inf')
+
+    def samples(self, name: str) -> List[Tuple[str, Labels, float]]:
+        samples = []
+        seen = 0
+        for bound, count in zip(self._bounds, self._counts):
+            seen += count
+            samples.append((f'{name}_bucket', (('le', repr(bound)),), seen))
+        samples.append((f'{name}_bucket', (('le', '+Inf'),), self.count))
+        samples.append((f'{name}_count', (), self.count))
+        samples.append((f'{name}_sum', (), self.sum))
+        return samples
+
+    def export(self) -> int | float | dict:
+        quantiles = {name: self.quantile(share)
+                     for name, share in (('p50', 0.5), ('p99', 0.99))}
+        return {'count': self.count, 'sum': self.sum,
+                **{name: None if math.isinf(value) else value
+                   for name, value in quantiles.items()}}
+
+
+Metric = Counter | Gauge | Histogram
+
+
+class Registry:
+    """Class that keeps metrics by name and labels"""
+
+    def __init__(self, prefix: str = 'chess') -> None:
+        self._prefix = prefix
+        self._families: Dict[str, Tuple[str, str]] = {}
+        self._metrics: Dict[Tuple[str, Labels], Metric] = {}
+
+    def counter(self, name: str, description: str, **labels: str) -> Counter:
+        """Gets or creates counter
+
+        Args:
+            name (str): Name of metric
+            description (str): Help text
+
+        Returns:
+            Counter: Counter
+        """
+        return self._get(name, description, labels, Counter)
+
+    def gauge(self, name: str, description: str,
+              callback: Optional[Callable[[], float]] = None,
+              **labels: str) -> Gauge:
+        """Gets or creates gauge
+
+        Args:
+            name (str): Name of metric
+            description (str): Help text
+            callback (Optional[Callable[[], float]]): Reads value\
+                at export time. Defaults to None
+
+        Returns:
+            Gauge: Gauge
+        """
+        return self._get(name, description, labels,
+                         lambda: Gauge(callback))
+
+    def histogram(self, name: str, description: str,
+                  buckets: Iterable[float] = LATENCY_BUCKETS,
+                  **labels: str) -> Histogram:
+        """Gets or creates histogram
+
+        Args:
+            name (str): Name of metric
+            description (str): Help text
+            buckets (Iterable[float]): Upper bounds of buckets.\
+                Defaults to LATENCY_BUCKETS
+
+        Returns:
+            Histogram: Histogram
+        """
+        return self._get(name, description, labels,
+                         lambda: Histogram(buckets))
+
+    def to_dict(self) -> dict:
+        """Exports metrics for stats query
+
+        Returns:
+            dict: Values by name, labelled metrics are nested by labels
+        """
+        result = {}
+        for (name, labels), metric in self._metrics.items():
+            if labels:
+                key = ','.join(f'{label}={value}' for label, value in labels)
+                result.setdefault(name, {})[key] = metric.export()
+            else:
+                result[name] = metric.export()
+        return result
+
+    def to_openmetrics(self) -> str:
+        """Exports metrics in OpenMetrics text format
+
+        Returns:
+            str: Exposition
+        """
+        lines = []
+        for name, (kind, description) in self._families.items():
+            full_name = f'{self._prefix}_{name}'
+            lines.append(f'# TYPE {full_name} {kind}')
+            lines.append(f'# HELP {full_name} {description}')
+            for (metric_name, labels), metric in self._metrics.items():
+                if metric_name != name:
+                    continue
+                for sample, extra, value in metric.samples(full_name):
+                    lines.append(f'{sample}{self._labels(labels + extra)} '
+                                 f'{value}')
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    async def write_periodically(self, path: str,
+                                 interval: float = WRITE_INTERVAL) -> None:
+        """Writes OpenMetrics file periodically. File is replaced\
+            atomically, so readers never see a partial file
+
+        Args:
+            path (str): Path to the file
+            interval (float): Time between writes in seconds.\
+                Defaults to 10.0
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self._write, path,
+                                    self.to_openmetrics())
+
+    @staticmethod
+    def _write(path: str, text: str) -> None:
+        temporary = f'{path}.tmp'
+        with open(temporary, mode='w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _labels(labels: Labels) -> str:
+        if not labels:
+            return ''
+        pairs = ','.join(f'{label}="{value}"' for label, value in labels)
+        return f'{{{pairs}}}'
+
+    def _get(self, name: str, description: str, labels: Dict[str, str],
+             factory: Callable[[], Metric]) -> Metric:
+        key = name, tuple(sorted(labels.items()))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = self._metrics[key] = factory()
+            self._families.setdefault(name, (metric.kind, description))
+        return metric
+
+
+def benchmark(queries: int = 1000000) -> float:
+    """Measures overhead of metrics that are recorded per query
+
+    Args:
+        queries (int): Number of simulated queries. Defaults to 1000000
+
+    Returns:
+        float: Microseconds per query
+    """
+    registry = Registry()
+    histogram = registry.histogram('query_duration_seconds', 'Latency',
+                                   method='ping')
+    errors = registry.counter('query_errors', 'Errors', method='ping')
+    start = time.perf_counter()
+    for _ in range(queries):
+        begin = time.perf_counter()
+        errors.inc(0)
+        histogram.observe(time.perf_counter() - begin)
+    return (time.perf_counter() - start) / queries * 1e6
+
+
+if __name__ == '__main__':
+    print(f'metrics overhead: {benchmark():.2f} us per query')
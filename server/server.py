@@ -1,22 +1,64 @@
 """Module that describes chess game's server"""
-from typing import Tuple, Dict
+from typing import Optional, Tuple, Dict, List
+import itertools
 import asyncio
 import logging
-import json
+import random
+import socket
+import time
+
+from matchmaking import Matchmaker, Ticket
+from game_session import GameSession, GameError, parse_time_control, \
+    new_token, token_game, first_game_id
+from cluster import Cluster, Handoff, MATCHMAKER
+from broadcast import Broadcast
+from game_log import GameLog
+from metrics import Registry, DURATION_BUCKETS, WRITE_INTERVAL
+from utils.framing import FrameReader, FrameTooLargeError, write_frames, \
+    encode_frame, MAX_FRAME_SIZE
+from utils.codec import Codec, CODECS
+
+LOAD_REPORT_INTERVAL = 1.0
+RESUME_GRACE = 60.0
+METHODS = ('ping', 'hello', 'move', 'queue', 'leave_queue', 'queue_stats',
+           'spectate', 'resume', 'stats', 'invalid')
 
 
-# TODO: handler for clients requests
-# TODO: implement game queue
 class ChessServer:
-    """Class that describes chess game's server"""
+    """Class that describes chess game's server. Server can run alone\
+        or as a worker of a cluster, then games are hosted by workers\
+            that own them and connections are handed over to these workers"""
 
-    def __init__(self, address: Tuple[str, int], recv_size: int):
+    def __init__(self, address: Tuple[str, int], recv_size: int,
+                 max_frame_size: int = MAX_FRAME_SIZE,
+                 cluster: Optional[Cluster] = None,
+                 metrics_file: Optional[str] = None,
+                 metrics_interval: float = WRITE_INTERVAL,
+                 game_log: Optional[str] = None):
         self._host, self._port = address
         self._recv_size = recv_size
+        self._max_frame_size = max_frame_size
+        self._cluster = cluster
         self._logger = logging.getLogger('server')
         self._clients: Dict[tuple, asyncio.StreamWriter] = {}
-        self._game_queue = asyncio.Queue()
+        self._codecs: Dict[tuple, Codec] = {}
+        self._tasks: Dict[tuple, asyncio.Task] = {}
+        self._handoffs: Dict[tuple, Tuple[int, dict]] = {}
+        self._awaited: Dict[tuple, List[dict]] = {}
+        self._metrics_file = metrics_file
+        self._metrics_interval = metrics_interval
+        self._log = GameLog(game_log) if game_log else None
+        self._matchmaker = Matchmaker(self._start_game)
+        self._games: Dict[int, GameSession] = {}
+        self._player_games: Dict[tuple, int] = {}
+        self._broadcasts: Dict[int, Broadcast] = {}
+        self._spectating: Dict[tuple, int] = {}
+        self._grace: Dict[str, asyncio.TimerHandle] = {}
+        self._flags: Dict[int, asyncio.TimerHandle] = {}
+        self._game_ids = itertools.count(first_game_id())
         self._lock = asyncio.Lock()
+        self._metrics = Registry()
+        self._init_metrics()
 
     @property
     def address(self) -> Tuple[str, int]:
@@ -28,67 +70,507 @@ class ChessServer:
         return self._host, self._port
 
     async def handle_client(self, reader: asyncio.StreamReader,
-                            writer: asyncio.StreamWriter):
+                            writer: asyncio.StreamWriter,
+                            encoding: str = 'json', received: bytes = b''):
         """Coroutine for handing clients
 
         Args:
             reader (asyncio.StreamReader): Client's StreamReader
             writer (asyncio.StreamWriter): Client's StreamWriter
+            encoding (str): Client's encoding. Defaults to 'json'
+            received (bytes): Data that was received by another worker\
+                before connection was handed over. Defaults to b''
         """
-        client_address: tuple = writer.get_extra_info('peername')
+        client_address: tuple = tuple(writer.get_extra_info('peername'))
+        connected_at = time.monotonic()
+        self._connections.inc()
         self._clients[client_address] = writer
+        self._codecs[client_address] = CODECS[encoding]
+        self._tasks[client_address] = asyncio.current_task()
         self._logger.info('Client connected: %s', client_address)
+        for message in self._awaited.pop(client_address, []):
+            self._notify(client_address, message)
 
+        frames = FrameReader(reader, self._max_frame_size, self._recv_size)
+        frames.feed(received)
+        handoff = None
         try:
-            while True:
-                query = await reader.read(self._recv_size)
-                if not query:
-                    raise ConnectionError(
-                        f'Lost connection to client: {client_address}')
-                self._logger.info('Received query from %s', client_address)
-
-                response = self.handle_query(query)
-                writer.write(response.encode())
+            while handoff is None:
+                queries = await frames.read()
+                self._logger.debug('Received %s queries from %s',
+                                   len(queries), client_address)
+
+                responses = []
+                for index, query in enumerate(queries):
+                    try:
+                        responses.append(self.handle_query(query,
+                                                           client_address))
+                    except Handoff as exc:
+                        handoff = exc.worker, {}
+                        received = b''.join(map(encode_frame,
+                                                queries[index:]))
+                        break
+                write_frames(writer, responses)
                 await writer.drain()
-        except (ConnectionError, asyncio.CancelledError) as exc:
-            self._logger.error('%s', exc)
+        except FrameTooLargeError as exc:
+            self._logger.error('%s from %s', exc, client_address)
+            self._frame_errors.inc()
+            codec = self._codecs[client_address]
+            write_frames(writer, [codec.encode({"error": str(exc)})])
+        except asyncio.CancelledError as exc:
+            handoff = self._handoffs.get(client_address)
+            received = b''
+            if not handoff:
+                self._logger.error('%s: %s', exc, client_address)
+        except ConnectionError as exc:
+            self._logger.error('%s: %s', exc, client_address)
         finally:
+            encoding = self._codecs.pop(client_address).name
             del self._clients[client_address]
+            del self._tasks[client_address]
+            self._handoffs.pop(client_address, None)
+            self._stop_spectating(client_address)
+            self._connection_time.observe(time.monotonic() - connected_at)
+            if handoff:
+                self._handed_off.inc()
+                worker, header = handoff
+                await self._hand_off(reader, writer, worker,
+                                     {**header, "encoding": encoding},
+                                     received + frames.detach())
+            else:
+                self._matchmaker.cancel(client_address)
+                self._leave_game(client_address)
             writer.close()
-            await writer.wait_closed()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
             self._logger.info('Client disconnected: %s', client_address)
 
-    def handle_query(self, query: bytes) -> str:
+    def handle_query(self, query: bytes, client_address: tuple) -> bytes:
+        """Handles one query. Response contains id of the query if it\
+            was given, so that client can match pipelined responses
+
+        Args:
+            query (bytes): Payload of query's frame
+            client_address (tuple): Client's address
+
+        Returns:
+            bytes: Payload of response's frame
+        """
+        start = time.perf_counter()
+        self._queries.inc()
+        codec = self._codecs[client_address]
+        timer, errors = self._query_metrics['invalid']
+        try:
+            query: dict = codec.decode(query)
+            timer, errors = self._query_metrics.get(
+                query['method'], (timer, errors))
+            response = self._dispatch(query['method'], query['body'],
+                                      client_address)
+            if 'id' in query:
+                response['id'] = query['id']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            response = {"error": "Invalid query"}
+        if 'error' in response:
+            errors.inc()
+        payload = codec.encode(response)
+        timer.observe(time.perf_counter() - start)
+        return payload
+
+    def _dispatch(self, method: str, body: dict,
+                  client_address: tuple) -> dict:
+        match method:
+            case 'ping': return self.handle_ping()
+            case 'hello': return self.handle_hello(body, client_address)
+            case 'move': return self.handle_move(body, client_address)
+            case 'queue': return self.handle_queue(body, client_address)
+            case 'leave_queue': return self.handle_leave_queue(client_address)
+            case 'queue_stats': return self.handle_queue_stats()
+            case 'spectate': return self.handle_spectate(body, client_address)
+            case 'resume': return self.handle_resume(body, client_address)
+            case 'stats': return self.handle_stats()
+            case _: return {'error': 'Invalid method'}
+
+    def handle_ping(self) -> dict:
+        return {"data": "ping"}
+
+    def handle_hello(self, body: dict, client_address: tuple) -> dict:
+        codec = CODECS.get(body.get('encoding'))
+        if not codec:
+            return {"error": "Unknown encoding"}
+        self._codecs[client_address] = codec
+        return {"data": codec.name}
+
+    def handle_move(self, body: dict, client_address: tuple) -> dict:
         try:
-            query: dict = json.loads(query)
-            method: str = query['method']
-            body = query['body']
-
-            match method:
-                case 'ping': return self.handle_ping()
-                case 'move': return self.handle_move(body)
-                case 'ask': pass
-                case _: return json.dumps({'error': 'Invalid method'})
-        except (json.JSONDecodeError, KeyError):
-            return json.dumps({"error": "Invalid query"})
-
-    def handle_ping(self) -> str:
-        return json.dumps({"data": "ping"})
-
-    def handle_move(self, body: dict) -> str:
-        pass
-        # try:
-        #     opponent: str = body['opponent']
-        #     move: str = body['move']
-        #     response = {"data": "success"}
-
-        #     return json.dumps(response)
-        # except KeyError:
-        #     return json.dumps({"error": "Invalid body"})
+            game_id = int(body['game'])
+            move = str(body['move'])
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid body"}
+
+        session = self._games.get(game_id)
+        if not session or self._player_games.get(client_address) != game_id:
+            return {"error": "Unknown game"}
+
+        try:
+            event = session.play(client_address, move)
+        except GameError as exc:
+            if session.finished:
+                self._finish_game(session)
+            return {"error": str(exc)}
+
+        if self._log:
+            self._log.move(event)
+        message = {"event": "move", "data": event}
+        self._notify(session.opponent(client_address), message)
+        self._publish(game_id, message)
+        if session.finished:
+            self._finish_game(session)
+        else:
+            self._schedule_flag(session)
+        return {"data": "ok"}
+
+    def handle_queue(self, body: dict, client_address: tuple) -> dict:
+        try:
+            rating = int(body['rating'])
+            time_control = str(body['time_control'])
+            parse_time_control(time_control)
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid body"}
+        if client_address in self._player_games:
+            return {"error": "Already in game"}
+        if self._cluster and not self._cluster.is_matchmaker:
+            raise Handoff(MATCHMAKER)
+
+        self._matchmaker.enqueue(client_address, rating, time_control)
+        return {"data": "queued"}
+
+    def handle_leave_queue(self, client_address: tuple) -> dict:
+        if not self._matchmaker.cancel(client_address):
+            return {"error": "Not in queue"}
+        return {"data": "left"}
+
+    def handle_queue_stats(self) -> dict:
+        return {"data": self._matchmaker.stats()}
+
+    def handle_stats(self) -> dict:
+        stats = self._metrics.to_dict()
+        if self._cluster:
+            stats['worker'] = self._cluster.index
+        return {"data": stats}
+
+    def handle_spectate(self, body: dict, client_address: tuple) -> dict:
+        try:
+            game_id = int(body['game'])
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid body"}
+        if client_address in self._player_games:
+            return {"error": "Already in game"}
+
+        self._stop_spectating(client_address)
+        owner = self._cluster.owner(game_id) if self._cluster else None
+        if owner is not None and owner != self._cluster.index:
+            self._matchmaker.cancel(client_address)
+            raise Handoff(owner)
+
+        session = self._games.get(game_id)
+        if not session:
+            return {"error": "Unknown game"}
+        self._broadcasts[game_id].subscribe(client_address,
+                                            self._clients[client_address],
+                                            self._codecs[client_address])
+        self._spectating[client_address] = game_id
+        return {"data": session.snapshot()}
+
+    def handle_resume(self, body: dict, client_address: tuple) -> dict:
+        try:
+            token = str(body['token'])
+            index = int(body['index'])
+            game_id = token_game(token)
+        except (KeyError, TypeError, ValueError):
+            return {"error": "Invalid body"}
+        playing = self._player_games.get(client_address)
+        if playing not in (None, game_id):
+            return {"error": "Already in game"}
+
+        self._matchmaker.cancel(client_address)
+        self._stop_spectating(client_address)
+        owner = self._cluster.owner(game_id) if self._cluster else None
+        if owner is not None and owner != self._cluster.index:
+            raise Handoff(owner)
+
+        session = self._games.get(game_id)
+        if not session or session.player(token) is None:
+            return {"error": "Unknown game"}
+        if playing is not None and session.player(token) != client_address:
+            return {"error": "Already in game"}
+        if not 0 <= index <= len(session.moves):
+            return {"error": "Invalid index"}
+
+        previous = session.claim(token, client_address)
+        if previous != client_address:
+            handle = self._grace.pop(token, None)
+            if handle:
+                handle.cancel()
+            self._player_games.pop(previous, None)
+            self._awaited.pop(previous, None)
+            self._player_games[client_address] = game_id
+            stale = self._clients.get(previous)
+            if stale:
+                stale.transport.abort()
+            self._notify(session.opponent(client_address),
+                         {"event": "opponent_returned",
+                          "data": {"game": game_id}})
+        self._logger.info('Client %s resumed game %s from move %s',
+                          client_address, game_id, index)
+        return {"data": {"game": game_id,
+                         "color": 'white' if session.white == client_address
+                         else 'black',
+                         "time_control": session.time_control,
+                         "index": len(session.moves),
+                         "moves": session.moves[index:],
+                         "clock": session.clock()}}
+
+    def _publish(self, game_id: int, message: dict) -> None:
+        broadcast = self._broadcasts[game_id]
+        if broadcast:
+            dropped = broadcast.publish(message)
+            self._spectators_dropped.inc(len(dropped))
+            for client_address in dropped:
+                del self._spectating[client_address]
+
+    def _stop_spectating(self, client_address: tuple) -> None:
+        game_id = self._spectating.pop(client_address, None)
+        if game_id is not None:
+            self._broadcasts[game_id].unsubscribe(client_address)
+
+    def _start_game(self, first: Ticket, second: Ticket) -> None:
+        game_id = next(self._game_ids)
+        white, black = (first, second) if random.random() < 0.5\
+            else (second, first)
+        tokens = new_token(game_id), new_token(game_id)
+        loop = asyncio.get_running_loop()
+        for ticket, opponent, color, token in (
+                (white, black, 'white', tokens[0]),
+                (black, white, 'black', tokens[1])):
+            event = {"event": "match",
+                     "data": {"game": game_id, "color": color,
+                              "opponent_rating": opponent.rating,
+                              "time_control": ticket.time_control,
+                              "token": token}}
+            loop.call_soon(self._notify, ticket.player, event)
+
+        owner = self._cluster.owner(game_id) if self._cluster else None
+        if owner is None or owner == self._cluster.index:
+            self._create_game(game_id, white.player, black.player,
+                              white.time_control, tokens)
+            return
+
+        if self._log:
+            self._log.reserve(game_id)
+        game = {"game": game_id, "white": white.player,
+                "black": black.player, "time_control": white.time_control,
+                "tokens": tokens}
+        for ticket in (white, black):
+            self._handoffs[ticket.player] = owner, {"create_game": game}
+            loop.call_soon(self._tasks[ticket.player].cancel)
+
+    def _create_game(self, game_id: int, white: tuple, black: tuple,
+                     time_control: str, tokens: Tuple[str, str]) -> None:
+        session = GameSession(game_id, white, black, time_control,
+                              tokens=tokens)
+        self._host_game(session)
+        self._player_games[white] = game_id
+        self._player_games[black] = game_id
+        self._games_started.inc()
+        if self._log:
+            self._log.start(session)
+
+    def _host_game(self, session: GameSession) -> None:
+        self._games[session.game_id] = session
+        self._broadcasts[session.game_id] = Broadcast(session.snapshot)
+        self._schedule_flag(session)
+
+    def _schedule_flag(self, session: GameSession) -> None:
+        handle = self._flags.get(session.game_id)
+        if handle:
+            handle.cancel()
+        side = 0 if session.white_to_move else 1
+        remaining = session.clock()[side] / 1000
+        loop = asyncio.get_running_loop()
+        self._flags[session.game_id] = loop.call_later(
+            remaining, self._check_flag, session)
+
+    def _check_flag(self, session: GameSession) -> None:
+        del self._flags[session.game_id]
+        if session.game_id not in self._games:
+            return
+        if session.flag():
+            self._finish_game(session)
+        else:
+            self._schedule_flag(session)
+
+    def _recover_games(self) -> None:
+        sessions, next_game = self._log.recover()
+        for session in sessions:
+            self._host_game(session)
+            for token in session.tokens:
+                self._suspend(session, token)
+        self._game_ids = itertools.count(max(next_game, first_game_id()))
+        self._logger.info('Recovered %s games', len(sessions))
+
+    def _finish_game(self, session: GameSession) -> None:
+        del self._games[session.game_id]
+        result, reason = session.result
+        self._games_finished.inc()
+        handle = self._flags.pop(session.game_id, None)
+        if handle:
+            handle.cancel()
+        for token in session.tokens:
+            handle = self._grace.pop(token, None)
+            if handle:
+                handle.cancel()
+        if self._log:
+            self._log.end(session.game_id)
+        event = {"event": "game_over",
+                 "data": {"game": session.game_id, "result": result,
+                          "reason": reason}}
+        loop = asyncio.get_running_loop()
+        for player in (session.white, session.black):
+            self._player_games.pop(player, None)
+            loop.call_soon(self._notify, player, event)
+        for spectator in self._broadcasts.pop(session.game_id).close(event):
+            del self._spectating[spectator]
+        self._logger.info('Game %s is over: %s (%s), %s moves',
+                          session.game_id, result, reason,
+                          len(session.moves))
+
+    def _leave_game(self, client_address: tuple) -> None:
+        game_id = self._player_games.pop(client_address, None)
+        if game_id is None:
+            return
+        session = self._games[game_id]
+        token = session.tokens[0 if session.white == client_address else 1]
+        self._suspend(session, token)
+        self._notify(session.opponent(client_address),
+                     {"event": "opponent_left",
+                      "data": {"game": game_id, "grace": RESUME_GRACE}})
+
+    def _suspend(self, session: GameSession, token: str) -> None:
+        loop = asyncio.get_running_loop()
+        self._grace[token] = loop.call_later(RESUME_GRACE, self._abandon,
+                                             session, token)
+
+    def _abandon(self, session: GameSession, token: str) -> None:
+        del self._grace[token]
+        if session.game_id in self._games:
+            session.resign(session.player(token))
+            self._finish_game(session)
+
+    def _notify(self, client_address: tuple, message: dict) -> None:
+        if client_address in self._awaited:
+            self._awaited[client_address].append(message)
+            return
+        writer = self._clients.get(client_address)
+        if writer and not writer.is_closing():
+            write_frames(writer,
+                         [self._codecs[client_address].encode(message)])
+
+    async def _hand_off(self, reader: asyncio.StreamReader,
+                        writer: asyncio.StreamWriter, worker: int,
+                        header: dict, received: bytes) -> None:
+        writer.transport.pause_reading()
+        reader.feed_eof()
+        received += await reader.read()
+        try:
+            await writer.drain()
+            sock: socket.socket = writer.get_extra_info('socket')
+            await self._cluster.send(worker, header, received,
+                                     [sock.fileno()])
+            self._logger.info('Client handed over to worker %s', worker)
+        except (ConnectionError, ValueError) as exc:
+            self._logger.error('Could not hand over client: %s', exc)
+
+    async def _receive_handoffs(self) -> None:
+        while True:
+            header, received, fds = await self._cluster.receive()
+            game = header.get('create_game')
+            if game and game['game'] not in self._games:
+                players = tuple(game['white']), tuple(game['black'])
+                self._create_game(game['game'], *players,
+                                  game['time_control'],
+                                  tuple(game['tokens']))
+                for player in players:
+                    if player not in self._clients:
+                        self._awaited[player] = []
+            for fd in fds:
+                reader, writer = await asyncio.open_connection(
+                    sock=socket.socket(fileno=fd))
+                asyncio.create_task(self.handle_client(
+                    reader, writer, header['encoding'], received))
+
+    async def _report_load(self) -> None:
+        while True:
+            await asyncio.sleep(LOAD_REPORT_INTERVAL)
+            self._cluster.report({"connections": len(self._clients),
+                                  "games": len(self._games),
+                                  "waiting": self._matchmaker.depth,
+                                  "queries": self._queries.value})
+
+    def _init_metrics(self) -> None:
+        metrics = self._metrics
+        self._connections = metrics.counter(
+            'connections', 'Accepted and handed over connections')
+        self._connection_time = metrics.histogram(
+            'connection_duration_seconds', 'Time connections were served',
+            DURATION_BUCKETS)
+        self._handed_off = metrics.counter(
+            'handoffs', 'Connections handed over to other workers')
+        self._frame_errors = metrics.counter(
+            'frame_errors', 'Connections closed because of too large frames')
+        self._queries = metrics.counter('queries', 'Handled queries')
+        self._query_metrics = {
+            method: (metrics.histogram('query_duration_seconds',
+                                       'Time of handling queries',
+                                       method=method),
+                     metrics.counter('query_errors',
+                                     'Queries answered with an error',
+                                     method=method))
+            for method in METHODS}
+        self._games_started = metrics.counter('games_started',
+                                              'Started games')
+        self._games_finished = metrics.counter('games_finished',
+                                               'Finished games')
+        self._spectators_dropped = metrics.counter(
+            'spectators_dropped', 'Spectators dropped for lagging')
+        metrics.gauge('clients', 'Open connections',
+                      lambda: len(self._clients))
+        metrics.gauge('games', 'Games in progress', lambda: len(self._games))
+        metrics.gauge('spectators', 'Spectating connections',
+                      lambda: len(self._spectating))
+        metrics.gauge('waiting', 'Players waiting for a match',
+                      lambda: self._matchmaker.depth)
 
     async def start_server(self):
         """Starts server"""
-        server = await asyncio.start_server(self.handle_client, *self.address)
+        if self._log:
+            self._recover_games()
+        server = await asyncio.start_server(
+            self.handle_client, *self.address,
+            reuse_port=self._cluster is not None)
+        tasks = []
+        if not self._cluster or self._cluster.is_matchmaker:
+            tasks.append(asyncio.create_task(self._matchmaker.run()))
+        if self._cluster:
+            tasks.append(asyncio.create_task(self._receive_handoffs()))
+            tasks.append(asyncio.create_task(self._report_load()))
+        if self._log:
+            tasks.append(asyncio.create_task(
+                self._log.run(self._games.values)))
+        if self._metrics_file:
+            tasks.append(asyncio.create_task(self._metrics.write_periodically(
+                self._metrics_file, self._metrics_interval)))
 
         async with server:
             try:
@@ -96,3 +578,7 @@ class ChessServer:
                 await server.serve_forever()
             except asyncio.CancelledError:
                 self._logger.error('Server was shut down')
+            finally:
+                for task in tasks:
+                    task.cancel()
+                self._logger.info('Matchmaking: %s', self._matchmaker.stats())
@@ -0,0 +1,135 @@
+"""Module that describes supervisor of a multi-process server"""
+from typing import Optional, Tuple, Dict, List
+import multiprocessing
+import asyncio
+import logging
+import socket
+import os
+
+from server import ChessServer
+from cluster import Cluster, channels, receive_message
+from metrics import WRITE_INTERVAL
+
+LOAD_LOG_INTERVAL = 10.0
+RESTART_CHECK_INTERVAL = 1.0
+
+
+def run_worker(index: int, address: Tuple[str, int], recv_size: int,
+               max_frame_size: int, inboxes: List[socket.socket],
+               outboxes: List[socket.socket],
+               metrics_file: Optional[str] = None,
+               metrics_interval: float = WRITE_INTERVAL,
+               game_log: Optional[str] = None) -> None:
+    """Runs server's worker in a forked process
+
+    Args:
+        index (int): Worker's index
+        address (Tuple[str, int]): Server's address
+        recv_size (int): Size of reads from clients
+        max_frame_size (int): Maximum size of a frame
+        inboxes (List[socket.socket]): Receiving ends of channels
+        outboxes (List[socket.socket]): Sending ends of channels
+        metrics_file (Optional[str]): Path to worker's metrics file.\
+            Defaults to None
+        metrics_interval (float): Time between writes of metrics file.\
+            Defaults to 10.0
+        game_log (Optional[str]): Directory of worker's game log.\
+            Defaults to None
+    """
+    cluster = Cluster(index, inboxes[index], outboxes[:-1], outboxes[-1])
+    server = ChessServer(address, recv_size, max_frame_size, cluster,
+                         metrics_file, metrics_interval, game_log)
+    try:
+        asyncio.run(server.start_server())
+    except KeyboardInterrupt:
+        pass
+
+
+class Supervisor:
+    """Class that forks workers sharing server's port,\
+        restarts them if they exit and collects their load"""
+
+    def __init__(self, address: Tuple[str, int], recv_size: int,
+                 max_frame_size: int, workers: int,
+                 metrics_file: Optional[str] = None,
+                 metrics_interval: float = WRITE_INTERVAL,
+                 game_log: Optional[str] = None) -> None:
+        self._address = address
+        self._recv_size = recv_size
+        self._max_frame_size = max_frame_size
+        self._workers = workers
+        self._metrics_file = metrics_file
+        self._metrics_interval = metrics_interval
+        self._game_log = game_log
+        self._context = multiprocessing.get_context('fork')
+        self._inboxes, self._outboxes = channels(workers)
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._loads: Dict[int, dict] = {}
+        self._logger = logging.getLogger('supervisor')
+
+    @property
+    def loads(self) -> Dict[int, dict]:
+        """Property that contains the last reported load of every worker
+
+        Returns:
+            Dict[int, dict]: Loads by worker's index
+        """
+        return self._loads
+
+    async def run(self) -> None:
+        """Starts workers and supervises them until cancelled"""
+        for index in range(self._workers):
+            self._start(index)
+        self._logger.info('Started %s workers at %s', self._workers,
+                          self._address)
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._collect_loads())
+                group.create_task(self._log_loads())
+                group.create_task(self._restart_workers())
+        finally:
+            for process in self._processes.values():
+                process.terminate()
+            for process in self._processes.values():
+                process.join()
+            self._logger.info('Workers stopped')
+
+    def _start(self, index: int) -> None:
+        metrics_file = None
+        if self._metrics_file:
+            root, extension = os.path.splitext(self._metrics_file)
+            metrics_file = f'{root}.{index}{extension}'
+        game_log = None
+        if self._game_log:
+            game_log = os.path.join(self._game_log, str(index))
+        process = self._context.Process(
+            target=run_worker, name=f'chess-worker-{index}', daemon=True,
+            args=(index, self._address, self._recv_size,
+                  self._max_frame_size, self._inboxes, self._outboxes,
+                  metrics_file, self._metrics_interval, game_log))
+        process.start()
+        self._processes[index] = process
+
+    async def _collect_loads(self) -> None:
+        inbox = self._inboxes[-1]
+        inbox.setblocking(False)
+        while True:
+            load, _, _ = await receive_message(inbox)
+            self._loads[load.pop('worker')] = load
+
+    async def _log_loads(self) -> None:
+        while True:
+            await asyncio.sleep(LOAD_LOG_INTERVAL)
+            for index, load in sorted(self._loads.items()):
+                self._logger.info('Worker %s: %s', index, load)
+
+    async def _restart_workers(self) -> None:
+        while True:
+            await asyncio.sleep(RESTART_CHECK_INTERVAL)
+            for index, process in list(self._processes.items()):
+                if not process.is_alive():
+                    self._logger.error('Worker %s exited with %s, restarting',
+                                       index, process.exitcode)
+                    self._loads.pop(index, None)
+                    self._start(index)
@@ -0,0 +1,9 @@
+"""Makes client's and server's modules importable in tests"""
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parent.parent
+
+for directory in ('client', 'server'):
+    if str(ROOT / directory) not in sys.path:
+        sys.path.append(str(ROOT / directory))
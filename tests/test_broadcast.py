@@ -0,0 +1,60 @@
+"""Tests of broadcasting game's events to spectators"""
+import json
+
+from broadcast import Broadcast
+from utils.codec import CODECS
+from utils.framing import encode_frame
+
+MOVE = {'event': 'move', 'data': {'game': 1, 'index': 0, 'move': 'e2e4',
+                                  'clock': [0, 0]}}
+GAME_OVER = {'event': 'game_over',
+             'data': {'game': 1, 'result': '1-0', 'reason': 'resignation'}}
+
+
+class FakeTransport:
+    """Transport with a fixed amount of unsent data"""
+
+    def __init__(self, buffered: int) -> None:
+        self.buffered = buffered
+
+    def get_write_buffer_size(self) -> int:
+        return self.buffered
+
+    def abort(self) -> None:
+        self.buffered = 0
+
+
+class FakeWriter:
+    """StreamWriter that keeps written frames"""
+
+    def __init__(self, buffered: int = 0) -> None:
+        self.transport = FakeTransport(buffered)
+        self.frames = []
+
+    def write(self, frame: bytes) -> None:
+        self.frames.append(frame)
+
+    def is_closing(self) -> bool:
+        return False
+
+
+def _frame(message: dict) -> bytes:
+    return encode_frame(json.dumps(message).encode())
+
+
+def test_lagging_spectator_gets_game_over():
+    broadcast = Broadcast(lambda: {'moves': []}, high_water=10,
+                          low_water=5, max_lag=60.0)
+    reading, lagging = FakeWriter(), FakeWriter(buffered=100)
+    broadcast.subscribe(('127.0.0.1', 1), reading, CODECS['json'])
+    broadcast.subscribe(('127.0.0.1', 2), lagging, CODECS['json'])
+
+    assert not broadcast.publish(MOVE)
+    assert reading.frames == [_frame(MOVE)]
+    assert not lagging.frames
+
+    assert broadcast.close(GAME_OVER) == [('127.0.0.1', 1),
+                                          ('127.0.0.1', 2)]
+    assert reading.frames == [_frame(MOVE), _frame(GAME_OVER)]
+    assert lagging.frames == [_frame(GAME_OVER)]
+    assert not broadcast
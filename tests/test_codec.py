@@ -0,0 +1,43 @@
+"""Tests of the binary encoding of messages"""
+import struct
+
+import pytest
+
+from utils.codec import BinaryCodec, MOVE_EVENT_FORMAT, MOVE_QUERY_FORMAT, \
+    pack_move, unpack_move
+
+
+@pytest.mark.parametrize('move', ['e2e4', 'a7a8q', 'h2h1n', 'b7c8r'])
+def test_move_round_trip(move):
+    assert unpack_move(pack_move(move)) == move
+
+
+@pytest.mark.parametrize('promotion', [5, 6, 7])
+def test_unknown_promotion(promotion):
+    with pytest.raises(ValueError):
+        unpack_move(promotion << 12)
+
+
+@pytest.mark.parametrize('payload', [
+    MOVE_QUERY_FORMAT.pack(3, 1, 5, 7 << 12),
+    MOVE_QUERY_FORMAT.pack(3, 1, 5, 1 << 15),
+    MOVE_QUERY_FORMAT.pack(3, 1, 5, 0)[:-1],
+    MOVE_EVENT_FORMAT.pack(5, 5, 0, 6 << 12, 1000, 1000),
+    MOVE_EVENT_FORMAT.pack(5, 5, 0, 0, 1000, 1000)[:-1],
+    struct.pack('>B', 3),
+    struct.pack('>B', 5),
+])
+def test_malformed_move_frames(payload):
+    with pytest.raises(ValueError):
+        BinaryCodec().decode(payload)
+
+
+def test_move_frames_round_trip():
+    codec = BinaryCodec()
+    query = {'method': 'move', 'id': 1,
+             'body': {'game': 5, 'move': 'e7e8q'}}
+    event = {'event': 'move',
+             'data': {'game': 5, 'index': 0, 'move': 'e2e4',
+                      'clock': [1000, 2000]}}
+    assert codec.decode(codec.encode(query)) == query
+    assert codec.decode(codec.encode(event)) == event
@@ -0,0 +1,62 @@
+"""Tests of resuming games on the server"""
+# pylint: disable=protected-access
+import asyncio
+
+from game_session import new_token
+from server import ChessServer
+
+WHITE = ('127.0.0.1', 50001)
+BLACK = ('127.0.0.1', 50002)
+GAME = 1
+TOKENS = new_token(GAME), new_token(GAME)
+
+
+def _run(test):
+    async def run():
+        server = ChessServer(('127.0.0.1', 0), 4096)
+        server._create_game(GAME, WHITE, BLACK, '5+0', TOKENS)
+        assert server.handle_move({'game': GAME, 'move': 'e2e4'},
+                                  WHITE) == {'data': 'ok'}
+        notified = []
+        server._notify = lambda player, message: notified.append(
+            (player, message))
+        try:
+            test(server, notified)
+        finally:
+            session = server._games[GAME]
+            session.resign(WHITE)
+            server._finish_game(session)
+    asyncio.run(run())
+
+
+def test_resume_from_same_connection():
+    def test(server, notified):
+        response = server.handle_resume({'token': TOKENS[1], 'index': 0},
+                                        BLACK)
+        assert response['data']['moves'] == ['e2e4']
+        assert response['data']['color'] == 'black'
+        assert server._player_games[BLACK] == GAME
+        assert not notified
+        assert server.handle_move({'game': GAME, 'move': 'e7e5'},
+                                  BLACK) == {'data': 'ok'}
+    _run(test)
+
+
+def test_resume_with_opponent_token():
+    def test(server, notified):
+        response = server.handle_resume({'token': TOKENS[0], 'index': 0},
+                                        BLACK)
+        assert response == {'error': 'Already in game'}
+        assert server._games[GAME].white == WHITE
+        assert server._player_games == {WHITE: GAME, BLACK: GAME}
+        assert not notified
+    _run(test)
+
+
+def test_resume_of_another_game():
+    def test(server, notified):
+        response = server.handle_resume(
+            {'token': new_token(GAME + 1), 'index': 0}, BLACK)
+        assert response == {'error': 'Already in game'}
+        assert not notified
+    _run(test)